@@ -21,6 +21,41 @@ class Settings(BaseSettings):
     # Debug
     DEBUG: bool = False
 
+    # --- Notes ---
+    NOTES_COUNT_CACHE_TTL: int = 30  # secondes (totaux exacts mis en cache)
+    NOTES_FACETS_CACHE_TTL: int = 30  # secondes (facettes mises en cache)
+    NOTES_BULK_MAX_ITEMS: int = 1000  # notes max par appel à POST /notes/bulk
+    VIEW_COUNT_FLUSH_INTERVAL: float = 5.0  # secondes entre deux reports des vues en base
+    SUMMARY_WORKERS: int = 2  # workers du calcul des résumés en arrière-plan
+    SUMMARY_CACHE_SIZE: int = 4096  # résumés gardés en mémoire (LRU par empreinte de contenu)
+    RELATED_INDEX_PATH: str = "data/related_notes.npz"  # instantané de l'index des notes similaires ("" = aucun)
+    RELATED_MAX_K: int = 50  # notes similaires max par appel
+    INDEX_CATCH_UP_INTERVAL: float = 30.0  # secondes entre deux rattrapages des index en mémoire sur la base (écritures des autres workers ; 0 = désactivé)
+    DUPLICATE_THRESHOLD: float = 0.8  # similarité de Jaccard estimée à partir de laquelle une note est un doublon
+    DUPLICATE_INDEX_PATH: str = "data/note_doublons.npz"  # instantané de l'index MinHash/LSH ("" = aucun)
+    SUGGEST_MODEL_PATH: str = "data/suggest_model.npz"  # modèle catégorie/priorité (python -m app.tools.train_suggestions)
+    SUGGEST_MAX_BATCH: int = 5000  # textes max par appel à POST /notes/suggest
+    TRENDING_HALF_LIFE_HOURS: float = Field(24.0, gt=0)  # demi-vie du score de tendance (> 0)
+    FEED_FANOUT_MAX_MEMBERS: int = 500  # au-delà, le fil de l'équipe est calculé à la lecture
+    UPLOAD_MAX_BYTES: int = 50 * 1024 * 1024  # taille max d'une pièce jointe / d'un avatar (octets)
+    STORAGE_BACKEND: str = "local"  # stockage des fichiers : "local" (UPLOAD_DIR) ou "s3" (AWS, MinIO… ; nécessite boto3)
+    UPLOAD_DIR: str = "uploads"  # racine du stockage local
+    S3_BUCKET: str = ""
+    S3_PREFIX: str = ""  # préfixe des clés dans le bucket
+    S3_ENDPOINT_URL: str = ""  # vide = AWS ; ex. http://localhost:9000 pour MinIO
+    S3_REGION: str = ""
+    S3_ACCESS_KEY_ID: str = ""  # vide = chaîne d'identifiants par défaut de boto3
+    S3_SECRET_ACCESS_KEY: str = ""
+    S3_PART_SIZE: int = 8 * 1024 * 1024  # taille des parties multipart (5 Mio minimum côté S3)
+    S3_MAX_CONCURRENCY: int = 4  # parties transférées en parallèle par fichier
+    S3_URL_EXPIRES: int = 300  # secondes de validité des URL de téléchargement présignées
+    UPLOAD_GC_INTERVAL: float = 6 * 3600  # secondes entre deux collectes des fichiers orphelins (0 = désactivée)
+    UPLOAD_GC_GRACE_SECONDS: int = 24 * 3600  # âge minimal d'un fichier orphelin avant suppression
+    UPLOAD_GC_MAX_OPS: float = 100  # opérations de stockage max par seconde pendant la collecte (0 = sans limite)
+    THUMBNAIL_WORKERS: int = 2  # processus de calcul des vignettes / aperçus d'images
+    THUMBNAIL_QUALITY: int = 80  # qualité WebP / JPEG des vignettes
+    THUMBNAIL_MAX_PIXELS: int = 40_000_000  # pixels max d'une image source (mémoire des workers ; au-delà, pas de vignette)
+
     # Email settings
     MAIL_USERNAME: str
     MAIL_PASSWORD: str
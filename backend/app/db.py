@@ -32,3 +32,15 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def dialect_insert(bind):
+    """
+    INSERT propre au dialecte (PostgreSQL / SQLite), qui expose
+    on_conflict_do_nothing() / on_conflict_do_update().
+    """
+    if bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
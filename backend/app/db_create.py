@@ -13,6 +13,11 @@ from app.models.note import Note
 from app.models.commentaire import Commentaire
 from app.models.fichier import FichierNote
 from app.models.eleve import Eleve, EleveHistory
+from app.models.like import NoteLike
+from app.models.resume import NoteSummary
+from app.models.trending import NoteTrending
+from app.models.stats import StatsEquipeJour, StatsAuteurJour
+from app.models.feed import FeedItem
 from passlib.context import CryptContext
 
 # 🔐 Hasher les mots de passe
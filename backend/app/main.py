@@ -1,9 +1,14 @@
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from app.db import Base, engine  # ✅ use session engine override-aware
 from app.config import settings
+from app.search import install_note_search
+from app.schema import upgrade_schema
 from app.routers import activation
 from app.routers import reset_password
 
@@ -14,12 +19,59 @@ os.environ["TESTING"] = "0"
 
 
 # Routers
-from app.routers import utilisateurs, notes, commentaires, login, eleves, router_password_change
+from app.routers import utilisateurs, notes, commentaires, login, eleves, router_password_change, stats, feed
+from app.services.vues import view_counter
+from app.services.resumes import summary_pool
+from app.services.related import related_index
+from app.services.doublons import duplicate_index
+from app.services.nettoyage import orphan_collector
+from app.services.trending import trending_rebaser
+from app.services.vignettes import variant_pool
+
+
+async def catch_up_indexes(interval: float):
+    """Index en mémoire propres à chaque worker : rattrapage périodique des écritures des autres."""
+    while True:
+        await asyncio.sleep(interval)
+        for index in (related_index, duplicate_index):
+            try:
+                await run_in_threadpool(index.catch_up, engine)
+            except Exception as e:
+                print(f"⚠️ Rattrapage de l'index impossible, nouvel essai au prochain cycle : {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 📈 Époque des scores de tendance avancée au démarrage puis périodiquement
+    trending_rebaser.start(engine)
+    # 👁️ Report périodique des vues ; dernier report à l'arrêt
+    view_counter.start(settings.VIEW_COUNT_FLUSH_INTERVAL)
+    # 🔗 Index des notes similaires : instantané + rattrapage, sinon construction
+    related_index.load_or_build(settings.RELATED_INDEX_PATH, engine)
+    duplicate_index.load_or_build(settings.DUPLICATE_INDEX_PATH, engine)
+    # 🔄 puis rattrapage périodique des écritures des autres workers
+    catch_up = None
+    if settings.INDEX_CATCH_UP_INTERVAL > 0:
+        catch_up = asyncio.create_task(catch_up_indexes(settings.INDEX_CATCH_UP_INTERVAL))
+    # 🧹 Collecte périodique des fichiers orphelins
+    orphan_collector.start(engine, settings.UPLOAD_GC_INTERVAL)
+    yield
+    if catch_up:
+        catch_up.cancel()
+    orphan_collector.stop()
+    view_counter.stop()
+    trending_rebaser.stop()
+    summary_pool.shutdown()  # 🧠 termine les résumés en file
+    variant_pool.shutdown()  # 🖼️ termine les vignettes en file
+    related_index.save(settings.RELATED_INDEX_PATH)
+    duplicate_index.save(settings.DUPLICATE_INDEX_PATH)
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     description="API Notes & Gestion Utilisateurs",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 IS_TEST = os.getenv("TESTING") == "1"
@@ -29,6 +81,9 @@ if IS_TEST:
 else:
     print("🚀 Application boot — Production mode")
     Base.metadata.create_all(bind=engine)  # ✅ only in prod
+    with engine.begin() as conn:
+        upgrade_schema(conn)  # 🧩 colonnes ajoutées depuis la création des tables
+        install_note_search(connection=conn)  # 🔍 index plein texte sur une base existante
 
 
 # ✅ CORS
@@ -43,7 +98,8 @@ app.add_middleware(
 print("✅ CORS:", settings.CORS_ORIGINS)
 
 # ✅ Static upload dir
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+app.mount("/uploads", StaticFiles(directory=settings.UPLOAD_DIR), name="uploads")
 
 
 @app.get("/")
@@ -60,6 +116,8 @@ app.include_router(utilisateurs.router, prefix="/utilisateurs", tags=["Utilisate
 app.include_router(notes.router, prefix="/notes", tags=["Notes"])
 app.include_router(commentaires.router, tags=["Commentaires"])
 app.include_router(eleves.router, prefix="/eleves", tags=["Élèves"])
+app.include_router(stats.router, prefix="/stats", tags=["Statistiques"])
+app.include_router(feed.router, prefix="/feed", tags=["Fil d'actualité"])
 
 
 if __name__ == "__main__":
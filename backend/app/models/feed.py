@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Index, JSON, UniqueConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.db import Base
+from datetime import datetime
+
+
+# ---------------- FIL D'ACTUALITÉ (FAN-OUT À L'ÉCRITURE) ----------------
+class FeedItem(Base):
+    __tablename__ = "feed_items"
+    __table_args__ = (
+        # 🔁 Fan-out idempotent : un événement au plus une fois par utilisateur
+        UniqueConstraint("user_id", "type", "objet_id", name="uq_feed_item_user_objet"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("utilisateurs.id", ondelete="CASCADE"), nullable=False)
+    type = Column(String(20), nullable=False)  # "note" | "commentaire"
+    objet_id = Column(Integer, nullable=False)  # id de la note ou du commentaire
+    note_id = Column(Integer, ForeignKey("notes.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Copiée de la source (même représentation que notes.created_at / commentaires.date)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+
+
+
+# 🔹 Index supplémentaires pour optimiser les requêtes fréquentes
+# ⏩ Pagination par curseur du fil de chaque utilisateur
+Index("idx_feed_user_created", FeedItem.user_id, FeedItem.created_at)
@@ -1,10 +1,23 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Index, JSON, UniqueConstraint
+from sqlalchemy import BigInteger, Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Index, JSON, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db import Base
 from datetime import datetime
 
 
+# ---------------- CONTENUS STOCKÉS (ADRESSÉS PAR SHA-256) ----------------
+class BlobFichier(Base):
+    __tablename__ = "fichiers_blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    taille = Column(BigInteger, nullable=False)
+    chemin = Column(String(255), nullable=False)  # clé de stockage : blobs/ab/cd/<sha256>
+    # 🔢 Nombre de FichierNote pointant sur ce contenu (0 → collectable)
+    nb_references = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
 # ---------------- FICHIERS DES NOTES ----------------
 class FichierNote(Base):
     __tablename__ = "fichiers_notes"
@@ -12,6 +25,8 @@ class FichierNote(Base):
     id = Column(Integer, primary_key=True, index=True)
     nom_fichier = Column(String(255), nullable=False)
     chemin = Column(String(255), nullable=False)
+    taille = Column(BigInteger, nullable=True)  # octets
+    sha256 = Column(String(64), ForeignKey("fichiers_blobs.sha256"), nullable=True)  # contenu (None : fichier antérieur au stockage adressé)
 
     note_id = Column(Integer, ForeignKey("notes.id", ondelete="CASCADE"))
     note = relationship("Note", back_populates="fichiers")
@@ -19,4 +34,5 @@ class FichierNote(Base):
 
 
 # 🔹 Index supplémentaires pour optimiser les requêtes fréquentes
-Index("idx_fichier_note", FichierNote.note_id)
\ No newline at end of file
+Index("idx_fichier_note", FichierNote.note_id)
+Index("idx_fichier_sha256", FichierNote.sha256)
\ No newline at end of file
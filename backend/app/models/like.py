@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Index, JSON, UniqueConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.db import Base
+from datetime import datetime
+
+
+# ---------------- LIKES DES NOTES ----------------
+class NoteLike(Base):
+    __tablename__ = "note_likes"
+
+    # 🔑 Clé composite : un utilisateur aime une note au plus une fois
+    note_id = Column(Integer, ForeignKey("notes.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("utilisateurs.id", ondelete="CASCADE"), primary_key=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    note = relationship("Note", back_populates="note_likes")
+
+
+
+# 🔹 Index supplémentaires pour optimiser les requêtes fréquentes
+Index("idx_note_like_user", NoteLike.user_id)
@@ -1,7 +1,9 @@
 from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Index, JSON, UniqueConstraint
+from sqlalchemy import event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db import Base
+from app.search import install_note_search, drop_note_search
 from datetime import datetime
 
 
@@ -22,6 +24,7 @@ class Note(Base):
     likes = Column(Integer, default=0)
     nb_vues = Column(Integer, default=0)
     resume_ia = Column(Text, nullable=True)
+    contenu_hash = Column(String(64), nullable=True)  # empreinte du contenu normalisé (cache des résumés)
 
     auteur = relationship("Utilisateur", back_populates="notes")
 
@@ -32,9 +35,17 @@ class Note(Base):
     commentaires = relationship("Commentaire", back_populates="note", cascade="all, delete-orphan")
     fichiers = relationship("FichierNote", back_populates="note", cascade="all, delete-orphan")  # 🔹 fichiers multiples
     eleves = relationship("Eleve", back_populates="note") 
+    note_likes = relationship("NoteLike", back_populates="note", cascade="all, delete-orphan")
 
 
 
 # 🔹 Index supplémentaires pour optimiser les requêtes fréquentes
 Index("idx_note_auteur", Note.auteur_id)
-Index("idx_note_equipe", Note.equipe)
\ No newline at end of file
+Index("idx_note_equipe", Note.equipe)
+# ⏩ Pagination par curseur (keyset sur created_at, id), globale et par auteur
+Index("idx_note_created_id", Note.created_at, Note.id)
+Index("idx_note_auteur_created_id", Note.auteur_id, Note.created_at, Note.id)
+
+# 🔍 Index plein texte (tsvector/GIN sur PostgreSQL, FTS5 sur SQLite)
+event.listen(Note.__table__, "after_create", install_note_search)
+event.listen(Note.__table__, "before_drop", drop_note_search)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Index, JSON, UniqueConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.db import Base
+from datetime import datetime
+
+
+# ---------------- RÉSUMÉS (CACHE PAR CONTENU) ----------------
+class NoteSummary(Base):
+    __tablename__ = "note_summaries"
+
+    # 🔑 Empreinte du contenu normalisé + version de l'algorithme de résumé
+    content_hash = Column(String(64), primary_key=True)
+    algo_version = Column(Integer, primary_key=True)
+    summary = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, Boolean, ForeignKey, Index, JSON, UniqueConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.db import Base
+from datetime import datetime
+
+
+# ---------------- STATISTIQUES JOURNALIÈRES PAR ÉQUIPE ----------------
+class StatsEquipeJour(Base):
+    __tablename__ = "stats_equipe_jour"
+
+    jour = Column(Date, primary_key=True)
+    equipe = Column(String(100), primary_key=True)  # "" = notes sans équipe
+    notes = Column(Integer, nullable=False, default=0)
+    commentaires = Column(Integer, nullable=False, default=0)
+    likes = Column(Integer, nullable=False, default=0)
+    vues = Column(Integer, nullable=False, default=0)
+    # 👩‍🎓 Variation du nombre d'élèves actifs ce jour-là (le total est la somme)
+    eleves_actifs = Column(Integer, nullable=False, default=0)
+
+
+# ---------------- STATISTIQUES JOURNALIÈRES PAR AUTEUR ----------------
+class StatsAuteurJour(Base):
+    __tablename__ = "stats_auteur_jour"
+
+    jour = Column(Date, primary_key=True)
+    equipe = Column(String(100), primary_key=True)
+    auteur_id = Column(Integer, ForeignKey("utilisateurs.id", ondelete="CASCADE"), primary_key=True)
+    notes = Column(Integer, nullable=False, default=0)
+    commentaires = Column(Integer, nullable=False, default=0)
+
+
+
+# 🔹 Index supplémentaires pour optimiser les requêtes fréquentes
+Index("idx_stats_equipe_equipe_jour", StatsEquipeJour.equipe, StatsEquipeJour.jour)
+Index("idx_stats_auteur_equipe_jour", StatsAuteurJour.equipe, StatsAuteurJour.jour)
@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, ForeignKey, Index, JSON, UniqueConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.db import Base
+from datetime import datetime
+
+
+# ---------------- SCORES DE TENDANCE ----------------
+class NoteTrending(Base):
+    __tablename__ = "note_trending"
+
+    note_id = Column(Integer, ForeignKey("notes.id", ondelete="CASCADE"), primary_key=True)
+    # 📈 Score à décroissance « avant » (forward decay) : chaque événement ajoute
+    # poids x 2^((t - époque) / demi-vie) ; l'ordre des scores est donc l'ordre
+    # des scores décrus à tout instant, sans recalcul.
+    score = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+
+# ---------------- ÉPOQUE DE LA DÉCROISSANCE ----------------
+class TrendingEpoch(Base):
+    __tablename__ = "trending_epoque"
+
+    # ⏱️ Ligne unique (id = 1) : les scores stockés sont relatifs à cette époque,
+    # avancée périodiquement (scores ramenés dessus) pour borner 2^(t / demi-vie)
+    id = Column(Integer, primary_key=True)
+    epoque = Column(DateTime(timezone=True), nullable=False)
+
+
+# 🔹 Index supplémentaires pour optimiser les requêtes fréquentes
+Index("idx_note_trending_score", NoteTrending.score)
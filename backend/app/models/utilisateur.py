@@ -22,6 +22,7 @@ class Utilisateur(Base):
     is_active = Column(Boolean, default=False)
     # 🆕 Champ pour la photo de profil
     avatar_url = Column(String(255), nullable=True)
+    avatar_chemin = Column(String(255), nullable=True)  # clé de stockage de l'avatar envoyé (avatars/…)
 
     # Relations
     notes = relationship("Note", back_populates="auteur", cascade="all, delete-orphan")
@@ -0,0 +1,20 @@
+# app/routers/feed.py
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from app.db import get_db
+from app.models.utilisateur import Utilisateur
+from app.schemas.schemas import FeedOut
+from app.services.feed import feed_service
+from app.auth import get_current_user
+
+router = APIRouter()
+
+# 📰 Fil d'actualité de l'équipe de l'utilisateur connecté
+@router.get("", response_model=FeedOut)
+def get_feed(
+    cursor: str = Query("", description="Curseur renvoyé par la page précédente (next_cursor)"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: Utilisateur = Depends(get_current_user),
+):
+    return feed_service(db, current_user, cursor=cursor, limit=limit)
@@ -1,34 +1,45 @@
 # app/api/v1/notes.py
-from fastapi import APIRouter, Depends, Form, File, UploadFile, Query, Request, HTTPException
-from typing import List, Optional
+from fastapi import APIRouter, Depends, Form, File, UploadFile, Query, Request, HTTPException, Body
+from fastapi.concurrency import run_in_threadpool
+from typing import Any, Dict, List, Optional, Union
 from sqlalchemy.orm import Session
 from app.db import get_db
 from app.models.utilisateur import Utilisateur
-from app.schemas.schemas import NoteOut, NoteDetailOut, NotesResponse, CommentaireOut, CommentaireCreate, NoteCreate
+from app.schemas.schemas import NoteOut, NoteDetailOut, NotesResponse, NotesSummaryResponse, NoteFacetsOut, NotesBulkResponse, NoteRelatedOut, NoteTrendingOut, NoteCreateOut, DoublonsOut, SuggestionIn, SuggestionOut, CommentaireOut, CommentaireCreate, NoteCreate
 from app.services.notes import (
     create_note_service,
+    bulk_create_notes_service,
     list_notes_service,
+    note_facets_service,
+    export_notes_service,
     get_note_detail_service,
     update_note_service,
     delete_note_service,
+    related_notes_service,
+    duplicate_clusters_service,
     like_note_service,
+    unlike_note_service,
     get_commentaires_service,
     add_commentaire_service,
+    download_file_service,
     delete_file_service,
 )
+from app.services.suggestions import suggest_service
+from app.services.trending import trending_notes_service
 from app.auth import get_current_user
+from app.config import settings
 
 router = APIRouter()
 
 # ---------------- CREATE ----------------
-@router.post("/", response_model=NoteOut)
+@router.post("/", response_model=NoteCreateOut)
 async def create_note(
     request: Request,
     titre: Optional[str] = Form(None),
     contenu: Optional[str] = Form(None),
     auteur_id: Optional[int] = Form(None),
     equipe: Optional[str] = Form(None),
-    priorite: Optional[str] = Form("moyenne"),
+    priorite: Optional[str] = Form("Moyenne"),
     categorie: Optional[str] = Form(None),
     fichiers: Optional[List[UploadFile]] = File(None),
     db: Session = Depends(get_db),
@@ -62,32 +73,117 @@ async def create_note(
         if not titre or not contenu:
             raise HTTPException(status_code=422, detail="titre et contenu sont obligatoires")
 
-    return create_note_service(
-        titre, contenu, auteur_id, equipe, priorite, categorie, fichiers, db, current_user
+    # 📎 Service synchrone (copie des fichiers en flux, base) exécuté hors de la boucle d'événements
+    return await run_in_threadpool(
+        create_note_service, titre, contenu, auteur_id, equipe, priorite, categorie, fichiers, db, current_user
     )
 
 
+# ---------------- CREATE (LOT) ----------------
+@router.post("/bulk", response_model=NotesBulkResponse)
+def bulk_create_notes(
+    notes: List[Dict[str, Any]] = Body(..., description="Tableau JSON de NoteCreate"),
+    db: Session = Depends(get_db),
+    current_user: Utilisateur = Depends(get_current_user),
+):
+    return bulk_create_notes_service(notes, db, current_user)
+
+
+# ---------------- SUGGESTION CATÉGORIE / PRIORITÉ ----------------
+@router.post("/suggest", response_model=Union[SuggestionOut, List[SuggestionOut]])
+def suggest(
+    payload: Union[SuggestionIn, List[SuggestionIn]] = Body(..., description="Un texte ou un tableau de textes"),
+):
+    if isinstance(payload, list):
+        return suggest_service(payload)
+    return suggest_service([payload])[0]
+
+
 # ---------------- LIST ----------------
-@router.get("/", response_model=NotesResponse)
+@router.get("/", response_model=Union[NotesResponse, NotesSummaryResponse])
 def list_notes(
     search: str = Query("", description="Mot-clé"),
     author: str = Query("", description="Nom auteur"),
-    sort: str = Query("date_desc", description="date_asc ou date_desc"),
+    sort: str = Query("date_desc", description="date_asc, date_desc ou relevance (avec search)"),
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Pagination par curseur (vide = première page, puis next_cursor)"),
+    count: Optional[str] = Query(None, pattern="^(exact|estimate|none)$", description="Total : exact (défaut en mode page), estimate ou none (défaut en mode curseur)"),
+    view: str = Query("full", pattern="^(full|summary)$", description="full (NoteOut) ou summary (colonnes de liste)"),
+    equipe: str = Query("", description="Équipe (valeur exacte)"),
+    categorie: str = Query("", description="Catégorie (valeur exacte)"),
+    priorite: str = Query("", description="Priorité (valeur exacte)"),
     db: Session = Depends(get_db),
     current_user: Utilisateur = Depends(get_current_user),
 ):
     # appel du service
-    result = list_notes_service(search, author, sort, page, limit, db, current_user)
+    result = list_notes_service(
+        search, author, sort, page, limit, db, current_user,
+        cursor=cursor, count=count, view=view, equipe=equipe, categorie=categorie, priorite=priorite,
+    )
 
-    # ✅ Retourne TOUJOURS un dict matching NotesResponse
-    return {
+    response_class = NotesSummaryResponse if view == "summary" else NotesResponse
+
+    # ✅ Retourne TOUJOURS un modèle matching NotesResponse / NotesSummaryResponse
+    return response_class(**{
         "total": result["total"],
+        "total_estimated": result.get("total_estimated", False),
         "page": page,
         "limit": limit,
         "notes": result["notes"],
-    }
+        "next_cursor": result.get("next_cursor"),
+    })
+
+# ---------------- FACETTES ----------------
+@router.get("/facets", response_model=NoteFacetsOut)
+def note_facets(
+    search: str = Query("", description="Mot-clé"),
+    author: str = Query("", description="Nom auteur"),
+    equipe: str = Query("", description="Équipe (valeur exacte)"),
+    categorie: str = Query("", description="Catégorie (valeur exacte)"),
+    priorite: str = Query("", description="Priorité (valeur exacte)"),
+    db: Session = Depends(get_db),
+    current_user: Utilisateur = Depends(get_current_user),
+):
+    return note_facets_service(
+        db, current_user, search=search, author=author, equipe=equipe, categorie=categorie, priorite=priorite
+    )
+
+# ---------------- EXPORT ----------------
+@router.get("/export")
+def export_notes(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson ou csv"),
+    search: str = Query("", description="Mot-clé"),
+    author: str = Query("", description="Nom auteur"),
+    sort: str = Query("date_desc", description="date_asc ou date_desc"),
+    equipe: str = Query("", description="Équipe (valeur exacte)"),
+    categorie: str = Query("", description="Catégorie (valeur exacte)"),
+    priorite: str = Query("", description="Priorité (valeur exacte)"),
+    db: Session = Depends(get_db),
+    current_user: Utilisateur = Depends(get_current_user),
+):
+    return export_notes_service(
+        format, sort, db, current_user,
+        search=search, author=author, equipe=equipe, categorie=categorie, priorite=priorite,
+    )
+
+# ---------------- DOUBLONS (ADMIN) ----------------
+@router.get("/doublons", response_model=DoublonsOut)
+def duplicate_clusters(
+    seuil: Optional[float] = Query(None, ge=0.5, le=1.0, description="Similarité minimale (défaut : DUPLICATE_THRESHOLD)"),
+    db: Session = Depends(get_db),
+    current_user: Utilisateur = Depends(get_current_user),
+):
+    return duplicate_clusters_service(db, current_user, seuil)
+
+# ---------------- TENDANCES ----------------
+@router.get("/trending", response_model=List[NoteTrendingOut])
+def trending_notes(
+    limit: int = Query(20, ge=1, le=100),
+    equipe: str = Query("", description="Filtrer par équipe"),
+    db: Session = Depends(get_db),
+):
+    return trending_notes_service(db, limit=limit, equipe=equipe)
 
 # ---------------- DETAIL ----------------
 @router.get("/{note_id}", response_model=NoteDetailOut)
@@ -113,10 +209,31 @@ async def update_note(
 def delete_note(note_id: int, db: Session = Depends(get_db)):
     return delete_note_service(note_id, db)
 
+# ---------------- NOTES SIMILAIRES ----------------
+@router.get("/{note_id}/related", response_model=List[NoteRelatedOut])
+def related_notes(
+    note_id: int,
+    k: int = Query(10, ge=1, le=settings.RELATED_MAX_K),
+    db: Session = Depends(get_db),
+):
+    return related_notes_service(note_id, k, db)
+
 # ---------------- LIKE ----------------
 @router.post("/{note_id}/like")
-def like_note(note_id: int, db: Session = Depends(get_db)):
-    return like_note_service(note_id, db)
+def like_note(
+    note_id: int,
+    db: Session = Depends(get_db),
+    current_user: Utilisateur = Depends(get_current_user),
+):
+    return like_note_service(note_id, db, current_user)
+
+@router.delete("/{note_id}/like")
+def unlike_note(
+    note_id: int,
+    db: Session = Depends(get_db),
+    current_user: Utilisateur = Depends(get_current_user),
+):
+    return unlike_note_service(note_id, db, current_user)
 
 # ---------------- COMMENTAIRES ----------------
 @router.get("/{note_id}/commentaires", response_model=List[CommentaireOut])
@@ -127,6 +244,20 @@ def get_commentaires(note_id: int, db: Session = Depends(get_db)):
 def add_commentaire(note_id: int, commentaire: CommentaireCreate, db: Session = Depends(get_db)):
     return add_commentaire_service(note_id, commentaire, db)
 
+# ---------------- TÉLÉCHARGEMENT DE FICHIER ----------------
+@router.get("/fichiers/{file_id}")
+def download_file(
+    file_id: int,
+    request: Request,
+    v: Optional[str] = Query(None, description="SHA-256 du contenu : URL immuable, mise en cache un an"),
+    size: Optional[int] = Query(None, ge=1, description="Aperçu réduit d'une image (côté max en pixels)"),
+    db: Session = Depends(get_db),
+):
+    return download_file_service(
+        file_id, db, if_none_match=request.headers.get("if-none-match"), version=v,
+        size=size, accept=request.headers.get("accept"),
+    )
+
 # ---------------- SUPPRESSION DE FICHIER ----------------
 @router.delete("/fichiers/{file_id}", response_model=dict)
 def delete_file(file_id: int, db: Session = Depends(get_db)):
@@ -0,0 +1,21 @@
+# app/routers/stats.py
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from app.db import get_db
+from app.models.utilisateur import Utilisateur
+from app.schemas.schemas import StatsOverviewOut
+from app.services.stats import stats_overview_service
+from app.auth import get_current_user
+
+router = APIRouter()
+
+# 📊 Vue d'ensemble par équipe (admin)
+@router.get("/overview", response_model=StatsOverviewOut)
+def stats_overview(
+    jours: int = Query(30, ge=1, le=366, description="Fenêtre en jours (aujourd'hui inclus)"),
+    equipe: str = Query("", description="Limiter à une équipe"),
+    top: int = Query(5, ge=0, le=50, description="Nombre d'auteurs les plus actifs par équipe"),
+    db: Session = Depends(get_db),
+    current_user: Utilisateur = Depends(get_current_user),
+):
+    return stats_overview_service(db, current_user, jours=jours, equipe=equipe, top=top)
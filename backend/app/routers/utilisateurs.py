@@ -1,9 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, BackgroundTasks 
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File, BackgroundTasks 
 from fastapi.responses import FileResponse 
 import os 
 import shutil 
 from sqlalchemy.orm import Session, joinedload 
-from typing import List 
+from typing import List, Optional 
 from app.db import get_db 
 from app.models.utilisateur import Utilisateur 
 from app.schemas.schemas import UtilisateurCreate, UtilisateurOut, UtilisateurDetailOut
@@ -90,6 +90,12 @@ async def upload_avatar(
 @router.get("/{user_id}/avatar")
 async def get_avatar(
     user_id: int,
+    request: Request,
+    v: Optional[str] = Query(None, description="SHA-256 du contenu : URL immuable, mise en cache un an"),
+    size: Optional[int] = Query(None, ge=1, description="Vignette carrée (64, 128 ou 256 pixels)"),
     db: Session = Depends(get_db)
 ):
-    return await get_avatar_service(user_id, db)
+    return await get_avatar_service(
+        user_id, db, if_none_match=request.headers.get("if-none-match"), version=v,
+        size=size, accept=request.headers.get("accept"),
+    )
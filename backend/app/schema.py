@@ -0,0 +1,47 @@
+# app/schema.py
+# =====================================================
+# Mise à niveau d'une base existante au démarrage :
+# create_all crée les tables absentes mais n'ajoute pas
+# les colonnes apparues depuis sur une table existante.
+# Chaque colonne listée est ajoutée si elle manque
+# (ALTER TABLE ... ADD COLUMN, idempotent), avec ses index.
+# =====================================================
+
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateColumn
+
+from app.db import Base
+
+# 🔹 Colonnes ajoutées à des tables existantes ("table.colonne", ordre d'ajout)
+ADDED_COLUMNS = [
+    "notes.contenu_hash",  # empreinte du contenu normalisé (cache des résumés)
+    "fichiers_notes.taille",  # taille des pièces jointes (octets)
+    "fichiers_notes.sha256",  # contenu adressé (NULL : fichier antérieur)
+    "utilisateurs.avatar_chemin",  # clé de stockage de l'avatar (NULL : ancienne URL /uploads/…)
+]
+
+
+def _add_column_sql(connection, column) -> str:
+    spec = CreateColumn(column).compile(dialect=connection.dialect)
+    # Clé étrangère : déclarée au niveau de la table par create_all, en ligne ici
+    for fk in column.foreign_keys:
+        spec = f"{spec} REFERENCES {fk.column.table.name} ({fk.column.name})"
+    return f"ALTER TABLE {column.table.name} ADD COLUMN {spec}"
+
+
+def upgrade_schema(connection):
+    """Ajoute les colonnes (et index) manquants d'ADDED_COLUMNS ; sans effet sur une base à jour."""
+    inspector = inspect(connection)
+    for name in ADDED_COLUMNS:
+        table_name, column_name = name.split(".")
+        if not inspector.has_table(table_name):
+            continue  # table créée par create_all, déjà complète
+        present = {col["name"] for col in inspector.get_columns(table_name)}
+        if column_name in present:
+            continue
+        table = Base.metadata.tables[table_name]
+        connection.exec_driver_sql(_add_column_sql(connection, table.c[column_name]))
+        for index in table.indexes:
+            if column_name in index.columns:
+                index.create(connection, checkfirst=True)
+        inspector.clear_cache()
@@ -1,7 +1,7 @@
 from __future__ import annotations
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List, Dict
-from datetime import datetime
+from pydantic import BaseModel, EmailStr, computed_field
+from typing import Optional, List, Dict, Union
+from datetime import date, datetime
 
 # ======================================================
 # CONFIG GLOBALE — Compatible Pydantic v2+
@@ -46,6 +46,14 @@ class FichierNoteBase(BaseModel):
 class FichierNoteOut(FichierNoteBase):
     id: int
     note_id: int
+    taille: Optional[int] = None
+    sha256: Optional[str] = None
+
+    @computed_field
+    @property
+    def url(self) -> str:
+        """Téléchargement ; versionnée par le contenu → mise en cache immuable."""
+        return f"/notes/fichiers/{self.id}?v={self.sha256}" if self.sha256 else f"/notes/fichiers/{self.id}"
 
 
 # ======================================================
@@ -64,6 +72,17 @@ class NoteCreate(NoteBase):
     auteur_id: Optional[int] = None
 
 
+class NoteBulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    errors: Optional[List[str]] = None
+
+
+class NotesBulkResponse(BaseModel):
+    created: int
+    results: List[NoteBulkItemResult]
+
+
 class NoteOut(NoteBase):
     id: int
     likes: int
@@ -75,15 +94,122 @@ class NoteOut(NoteBase):
     eleves: Optional[List["EleveOut"]] = []  # 🔁 liens circulaires
 
 
+class SuggestionIn(BaseModel):
+    titre: Optional[str] = ""
+    contenu: str
+
+
+class SuggestionValueOut(BaseModel):
+    valeur: str
+    confiance: float  # probabilité a posteriori du Bayes naïf
+
+
+class SuggestionOut(BaseModel):
+    categorie: Optional[SuggestionValueOut] = None
+    priorite: Optional[SuggestionValueOut] = None
+
+
+class NoteRefOut(BaseModel):
+    id: int
+    titre: str
+    equipe: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+class NoteDoublonOut(NoteRefOut):
+    similarite: float  # Jaccard estimé (MinHash)
+
+
+class NoteCreateOut(NoteOut):
+    doublons_possibles: List[NoteDoublonOut] = []
+
+
+class DoublonsClusterOut(BaseModel):
+    taille: int
+    notes: List[NoteRefOut]
+
+
+class DoublonsOut(BaseModel):
+    seuil: float
+    clusters: List[DoublonsClusterOut]
+
+
 class NoteDetailOut(NoteOut):
     commentaires: List["CommentaireOut"] = []
+    resume_status: Optional[str] = None  # ready | pending | none (note trop courte)
+
+
+class NoteSummaryOut(BaseModel):
+    """Projection légère pour les listes (GET /notes?view=summary)."""
+    id: int
+    titre: str
+    extrait: Optional[str]
+    equipe: Optional[str] = None
+    categorie: Optional[str] = None
+    priorite: Optional[str] = None
+    likes: Optional[int] = 0
+    nb_vues: Optional[int] = 0
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    auteur_id: Optional[int] = None
+    auteur_nom: Optional[str] = None
+    nb_fichiers: int
+
+
+class NoteRelatedOut(BaseModel):
+    """Note similaire (GET /notes/{id}/related), triée par score cosinus."""
+    id: int
+    titre: str
+    equipe: Optional[str] = None
+    categorie: Optional[str] = None
+    priorite: Optional[str] = None
+    created_at: datetime
+    auteur_id: Optional[int] = None
+    score: float
+
+
+class NoteTrendingOut(BaseModel):
+    """Note tendance (GET /notes/trending) ; score décru à l'instant de la requête."""
+    id: int
+    titre: str
+    equipe: Optional[str] = None
+    categorie: Optional[str] = None
+    likes: Optional[int] = 0
+    nb_vues: Optional[int] = 0
+    created_at: datetime
+    auteur_id: Optional[int] = None
+    score: float
 
 
 class NotesResponse(BaseModel):
-    total: int
+    total: Optional[int] = None  # None si count=none (défaut en mode curseur)
+    total_estimated: bool = False
     page: int
     limit: int
     notes: List[NoteOut]
+    next_cursor: Optional[str] = None
+
+
+class NotesSummaryResponse(BaseModel):
+    total: Optional[int] = None
+    total_estimated: bool = False
+    page: int
+    limit: int
+    notes: List[NoteSummaryOut]
+    next_cursor: Optional[str] = None
+
+
+class FacetValueOut(BaseModel):
+    valeur: Optional[Union[int, str]] = None
+    libelle: Optional[str] = None
+    total: int
+
+
+class NoteFacetsOut(BaseModel):
+    equipe: List[FacetValueOut] = []
+    categorie: List[FacetValueOut] = []
+    priorite: List[FacetValueOut] = []
+    auteur: List[FacetValueOut] = []
 
 
 # ======================================================
@@ -163,6 +289,59 @@ class EleveHistoryOut(EleveHistoryBase):
     id: int
 
 
+# ======================================================
+# STATISTIQUES (TABLEAU DE BORD)
+# ======================================================
+class StatsAuteurOut(BaseModel):
+    auteur_id: int
+    nom: Optional[str] = None
+    notes: int
+    commentaires: int
+
+
+class StatsCompteursOut(BaseModel):
+    notes: int
+    commentaires: int
+    likes: int
+    vues: int
+    eleves_actifs: int             # total courant
+    eleves_actifs_variation: int   # variation sur la fenêtre
+
+
+class StatsEquipeOut(StatsCompteursOut):
+    equipe: Optional[str] = None
+    top_auteurs: List[StatsAuteurOut] = []
+
+
+class StatsOverviewOut(BaseModel):
+    """GET /stats/overview : activité par équipe sur les `jours` derniers jours."""
+    debut: date
+    fin: date
+    jours: int
+    equipes: List[StatsEquipeOut]
+    totaux: StatsCompteursOut
+
+
+# ======================================================
+# FIL D'ACTUALITÉ
+# ======================================================
+class FeedItemOut(BaseModel):
+    type: str                                # "note" | "commentaire"
+    note_id: int
+    commentaire_id: Optional[int] = None
+    titre: str                               # titre de la note
+    extrait: str                             # début de la note ou du commentaire
+    equipe: Optional[str] = None
+    auteur_id: Optional[int] = None
+    auteur_nom: Optional[str] = None
+    created_at: datetime
+
+
+class FeedOut(BaseModel):
+    items: List[FeedItemOut]
+    next_cursor: Optional[str] = None
+
+
 # ======================================================
 # EMAIL REQUEST
 # ======================================================
@@ -0,0 +1,144 @@
+# app/search.py
+# =====================================================
+# Recherche plein texte sur les notes.
+# - PostgreSQL : colonne tsvector générée + index GIN
+#   (configuration "french_unaccent" → insensible aux accents)
+# - SQLite     : table FTS5 "notes_fts" (contenu externe)
+#   maintenue par triggers
+# =====================================================
+
+import re
+from sqlalchemy import DDL, column, func, literal_column, table
+
+FTS_TABLE = "notes_fts"
+TS_CONFIG = "french_unaccent"
+
+# 🔹 Table virtuelle SQLite (hors metadata : create_all ne la connaît pas)
+notes_fts = table(FTS_TABLE, column("rowid"))
+
+# 🔹 Colonne PostgreSQL (hors modèle ORM : le type tsvector n'existe pas en SQLite)
+search_vector = literal_column("notes.search_vector")
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+# -------------------------------------------------------
+# 🧩 DDL par dialecte (idempotent)
+# -------------------------------------------------------
+_POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    f"""
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = '{TS_CONFIG}') THEN
+            CREATE TEXT SEARCH CONFIGURATION {TS_CONFIG} (COPY = french);
+            ALTER TEXT SEARCH CONFIGURATION {TS_CONFIG}
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, french_stem;
+        END IF;
+    END
+    $$
+    """,
+    f"""
+    ALTER TABLE notes ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('{TS_CONFIG}'::regconfig, coalesce(titre, '')), 'A') ||
+        setweight(to_tsvector('{TS_CONFIG}'::regconfig, coalesce(contenu, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_note_search_vector ON notes USING GIN (search_vector)",
+]
+
+_SQLITE_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        titre, contenu,
+        content='notes', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS notes_fts_ai AFTER INSERT ON notes BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, titre, contenu) VALUES (new.id, new.titre, new.contenu);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS notes_fts_ad AFTER DELETE ON notes BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, titre, contenu)
+        VALUES ('delete', old.id, old.titre, old.contenu);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS notes_fts_au AFTER UPDATE OF titre, contenu ON notes BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, titre, contenu)
+        VALUES ('delete', old.id, old.titre, old.contenu);
+        INSERT INTO {FTS_TABLE}(rowid, titre, contenu) VALUES (new.id, new.titre, new.contenu);
+    END
+    """,
+]
+
+
+def install_note_search(target=None, connection=None, **kw):
+    """
+    Crée l'index plein texte des notes pour le dialecte courant.
+    Utilisable comme listener "after_create" ou appelé au démarrage
+    (les instructions sont idempotentes).
+    """
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        for stmt in _POSTGRES_DDL:
+            connection.execute(DDL(stmt))
+    elif dialect == "sqlite":
+        fts_exists = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE name = ?", (FTS_TABLE,)
+        ).first()
+        for stmt in _SQLITE_DDL:
+            connection.execute(DDL(stmt))
+        if not fts_exists:
+            # Table existante → indexe les notes déjà présentes
+            connection.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def drop_note_search(target=None, connection=None, **kw):
+    """Supprime la table FTS5 avant un DROP de notes (évite un index orphelin)."""
+    if connection.dialect.name == "sqlite":
+        connection.execute(DDL(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+
+
+# -------------------------------------------------------
+# 🔍 Construction des requêtes
+# -------------------------------------------------------
+def fts5_match_expression(search: str) -> str:
+    """
+    Transforme la saisie utilisateur en requête FTS5 sûre :
+    chaque mot est cité (pas d'opérateurs injectés) et préfixé.
+    """
+    tokens = _TOKEN_RE.findall(search or "")
+    return " ".join(f'"{tok}"*' for tok in tokens)
+
+
+def apply_fulltext_search(query, search: str, dialect: str, note_id_column):
+    """
+    Applique le filtre plein texte à une requête sur les notes.
+    Retourne (query, rank) où rank est une expression à trier par
+    ordre croissant (meilleur résultat en premier), ou None si le
+    dialecte n'a pas de moteur plein texte (l'appelant se replie
+    alors sur ILIKE).
+    """
+    if dialect == "postgresql":
+        ts_query = func.websearch_to_tsquery(literal_column(f"'{TS_CONFIG}'::regconfig"), search)
+        query = query.filter(search_vector.op("@@")(ts_query))
+        rank = -func.ts_rank_cd(search_vector, ts_query)
+        return query, rank
+
+    if dialect == "sqlite":
+        match = fts5_match_expression(search)
+        if not match:
+            return None
+        query = query.join(notes_fts, notes_fts.c.rowid == note_id_column).filter(
+            literal_column(FTS_TABLE).op("MATCH")(match)
+        )
+        # bm25 : plus petit = plus pertinent ; le titre pèse 10x le contenu
+        rank = func.bm25(literal_column(FTS_TABLE), 10.0, 1.0)
+        return query, rank
+
+    return None
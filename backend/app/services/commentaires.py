@@ -5,6 +5,9 @@ from app.models.commentaire import Commentaire
 from app.models.note import Note
 from app.models.utilisateur import Utilisateur
 from app.schemas.schemas import CommentaireCreate, CommentaireOut
+from app.services.trending import record_trending
+from app.services.stats import record_stats
+from app.services.feed import fan_out_commentaire
 
 def add_commentaire_service(note_id: int, commentaire: CommentaireCreate, db: Session):
     # ✅ Vérifie si l'auteur existe AVANT la note (conformité aux tests)
@@ -25,6 +28,10 @@ def add_commentaire_service(note_id: int, commentaire: CommentaireCreate, db: Se
     )
 
     db.add(new_comment)
+    record_trending(db, [(note_id, "comment", 1)])
+    record_stats(db, [(note.equipe, commentaire.auteur_id, {"commentaires": 1})])
+    db.flush()
+    fan_out_commentaire(db, new_comment.id, note.equipe)
     db.commit()
     db.refresh(new_comment)
     return CommentaireOut.model_validate(new_comment)
@@ -0,0 +1,247 @@
+# app/services/doublons.py
+# =====================================================
+# Détection des quasi-doublons de notes : signature MinHash
+# (shingles de 3 mots sur titre + contenu) et index LSH par
+# bandes. Une note n'est comparée qu'aux notes partageant au
+# moins une bande (O(1) attendu), puis la similarité de
+# Jaccard est estimée sur les signatures.
+# Index en mémoire (par worker, rattrapé périodiquement sur
+# la base), persisté dans un instantané .npz.
+# =====================================================
+
+import os
+import re
+import threading
+import unicodedata
+import zlib
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app.models.note import Note
+
+NUM_PERM = 128
+BANDS = 16                  # 16 bandes x 8 lignes → seuil LSH ≈ 0.71
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+BUILD_BATCH = 2000
+CATCH_UP_OVERLAP = timedelta(minutes=1)  # modifications validées après leur horodatage
+
+_PRIME = np.uint64(4294967311)  # premier > 2^32
+_rng = np.random.RandomState(1234)  # graine fixe : signatures stables entre processus
+_A = _rng.randint(1, 2 ** 31, size=NUM_PERM).astype(np.uint64)
+_B = _rng.randint(0, 2 ** 32, size=NUM_PERM, dtype=np.int64).astype(np.uint64)
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+# -------------------------------------------------------
+# 🔹 Signatures
+# -------------------------------------------------------
+def _words(text):
+    text = unicodedata.normalize("NFKD", (text or "").lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _WORD_RE.findall(text)
+
+
+def minhash_signature(titre, contenu):
+    """Signature MinHash (NUM_PERM valeurs) ou None si la note n'a aucun mot."""
+    words = _words(titre) + _words(contenu)
+    if not words:
+        return None
+    size = min(SHINGLE_SIZE, len(words))
+    shingles = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    x = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+    # (a * x + b) mod p pour chaque permutation, puis minimum par permutation
+    hashes = (_A[:, None] * x[None, :] + _B[:, None]) % _PRIME
+    return hashes.min(axis=1)
+
+
+def jaccard_estimate(sig_a, sig_b) -> float:
+    return float(np.count_nonzero(sig_a == sig_b)) / NUM_PERM
+
+
+def _band_keys(signature):
+    return [signature[b * ROWS:(b + 1) * ROWS].tobytes() for b in range(BANDS)]
+
+
+# -------------------------------------------------------
+# 🧠 Index LSH
+# -------------------------------------------------------
+class DuplicateIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.ready = False
+            self.signatures = {}  # id de note → signature
+            self.buckets = [defaultdict(set) for _ in range(BANDS)]
+            self.indexed_until = None
+
+    # ---------------- Mises à jour ----------------
+    def _add(self, note_id, signature):
+        self.signatures[note_id] = signature
+        for band, key in zip(self.buckets, _band_keys(signature)):
+            band[key].add(note_id)
+
+    def _remove(self, note_id):
+        signature = self.signatures.pop(note_id, None)
+        if signature is None:
+            return
+        for band, key in zip(self.buckets, _band_keys(signature)):
+            bucket = band.get(key)
+            if bucket:
+                bucket.discard(note_id)
+                if not bucket:
+                    del band[key]
+
+    def upsert(self, note_id: int, titre, contenu):
+        with self._lock:
+            if not self.ready:
+                return  # le prochain build inclura la note
+            self._remove(note_id)
+            signature = minhash_signature(titre, contenu)
+            if signature is not None:
+                self._add(note_id, signature)
+
+    def remove(self, note_id: int):
+        with self._lock:
+            self._remove(note_id)
+
+    # ---------------- Requêtes ----------------
+    def similar(self, note_id: int, threshold: float):
+        """Notes indexées dont la similarité estimée avec note_id dépasse le seuil."""
+        with self._lock:
+            signature = self.signatures.get(note_id)
+            if signature is None:
+                return []
+            candidates = set()
+            for band, key in zip(self.buckets, _band_keys(signature)):
+                candidates |= band.get(key, set())
+            candidates.discard(note_id)
+            scored = [(other, jaccard_estimate(signature, self.signatures[other])) for other in candidates]
+        return sorted(((i, s) for i, s in scored if s >= threshold), key=lambda item: (-item[1], item[0]))
+
+    def clusters(self, threshold: float):
+        """
+        Groupes de quasi-doublons sur tout le corpus, en une passe sur
+        les buckets : chaque membre d'un bucket est comparé au premier
+        membre, les paires validées sont fusionnées (union-find).
+        """
+        parent = {}
+
+        def find(x):
+            while parent.get(x, x) != x:
+                parent[x] = parent.get(parent[x], parent[x])
+                x = parent[x]
+            return x
+
+        with self._lock:
+            for band in self.buckets:
+                for bucket in band.values():
+                    if len(bucket) < 2:
+                        continue
+                    first, *others = sorted(bucket)
+                    for other in others:
+                        root, other_root = find(first), find(other)
+                        if root != other_root and jaccard_estimate(
+                            self.signatures[first], self.signatures[other]
+                        ) >= threshold:
+                            parent.setdefault(root, root)
+                            parent[other_root] = root
+
+        groups = defaultdict(list)
+        for note_id in parent:
+            groups[find(note_id)].append(note_id)
+        return sorted((sorted(g) for g in groups.values() if len(g) > 1), key=lambda g: (-len(g), g[0]))
+
+    # ---------------- Construction / instantané ----------------
+    def build(self, bind):
+        with Session(bind=bind) as db:
+            indexed_until = _last_change(db)
+            rows = db.query(Note.id, Note.titre, Note.contenu).order_by(Note.id).yield_per(BUILD_BATCH)
+            signatures = [(note_id, minhash_signature(titre, contenu)) for note_id, titre, contenu in rows]
+        with self._lock:
+            self.reset()
+            for note_id, signature in signatures:
+                if signature is not None:
+                    self._add(note_id, signature)
+            self.indexed_until = indexed_until
+            self.ready = True
+
+    def save(self, path: str):
+        with self._lock:
+            if not path or not self.ready:
+                return
+            ids = np.fromiter(self.signatures.keys(), dtype=np.int64, count=len(self.signatures))
+            matrix = np.stack(list(self.signatures.values())) if ids.size else np.zeros((0, NUM_PERM), dtype=np.uint64)
+            indexed_until = self.indexed_until.isoformat() if self.indexed_until else ""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp.npz"
+        np.savez_compressed(tmp, ids=ids, signatures=matrix, indexed_until=np.asarray(indexed_until))
+        os.replace(tmp, path)
+
+    def load(self, path: str, bind) -> bool:
+        """Recharge un instantané puis rattrape la base (suppressions, créations, modifications)."""
+        if not path or not os.path.exists(path):
+            return False
+        with np.load(path) as snap:
+            ids = snap["ids"].tolist()
+            matrix = snap["signatures"]
+            indexed_until = str(snap["indexed_until"]) or None
+        with self._lock:
+            self.reset()
+            for note_id, signature in zip(ids, matrix):
+                self._add(note_id, signature)
+            self.indexed_until = datetime.fromisoformat(indexed_until) if indexed_until else None
+            self.ready = True
+        self.catch_up(bind)
+        return True
+
+    def catch_up(self, bind):
+        """
+        Rattrape la base (suppressions, créations, modifications depuis
+        indexed_until) : au rechargement puis périodiquement, l'index de
+        chaque worker ne voyant en direct que ses propres écritures.
+        """
+        with self._lock:
+            if not self.ready:
+                return
+            known, indexed_until = set(self.signatures), self.indexed_until
+
+        with Session(bind=bind) as db:
+            last_change = _last_change(db)
+            live = {note_id for (note_id,) in db.query(Note.id)}
+            for note_id in known - live:
+                self.remove(note_id)
+            last_id = max(known, default=0)
+            since = [Note.id > last_id]
+            missing = {note_id for note_id in live - known if note_id < last_id}
+            if missing:  # absentes de l'index sous le plus grand id
+                since.append(Note.id.in_(missing))
+            if indexed_until:
+                since.append(Note.updated_at > indexed_until - CATCH_UP_OVERLAP)
+            for note_id, titre, contenu in db.query(Note.id, Note.titre, Note.contenu).filter(or_(*since)):
+                self.upsert(note_id, titre, contenu)
+        with self._lock:
+            self.indexed_until = last_change
+
+    def load_or_build(self, path: str, bind):
+        try:
+            if self.load(path, bind):
+                return
+        except Exception as e:
+            print(f"⚠️ Instantané des doublons illisible, reconstruction : {e}")
+        self.build(bind)
+
+
+def _last_change(db: Session):
+    return db.query(func.max(func.coalesce(Note.updated_at, Note.created_at))).scalar()
+
+
+duplicate_index = DuplicateIndex()
@@ -5,13 +5,18 @@ from app.models.eleve import Eleve, EleveHistory
 from app.models.note import Note
 from app.models.utilisateur import Utilisateur
 from app.schemas.schemas import EleveOut, EleveCreate, EleveUpdate
+from app.services.stats import eleve_equipe, record_stats
 
 # ---------------- CREATE ----------------
 def create_eleve_service(eleve_in: EleveCreate, current_user: Utilisateur, db: Session):
     current_user_id = current_user.get("id") if isinstance(current_user, dict) else current_user.id
 
+    current_user_team = current_user.get("equipe") if isinstance(current_user, dict) else current_user.equipe
+
     eleve = Eleve(**eleve_in.dict(), created_by=current_user_id)
     db.add(eleve)
+    if eleve.actif is not False:
+        record_stats(db, [(current_user_team, None, {"eleves_actifs": 1})])
     db.commit()
     db.refresh(eleve)
     return EleveOut.model_validate(eleve)
@@ -55,6 +60,11 @@ def update_eleve_service(eleve_id: int, eleve_data: EleveUpdate, db: Session):
     eleve.updated_at = datetime.utcnow()
     eleve.updated_by = editor_id
 
+    if "actif" in changes:
+        delta = bool(changes["actif"]["new"]) - bool(changes["actif"]["old"])
+        if delta:
+            record_stats(db, [(eleve_equipe(db, eleve), None, {"eleves_actifs": delta})])
+
     history = EleveHistory(
         eleve_id=eleve.id,
         edited_by=editor_id,
@@ -134,6 +144,8 @@ def delete_eleve_service(eleve_id: int, current_user: Utilisateur, db: Session):
     if not eleve:
         raise HTTPException(status_code=404, detail="Élève non trouvé")
 
+    if eleve.actif:
+        record_stats(db, [(eleve_equipe(db, eleve), None, {"eleves_actifs": -1})])
     db.delete(eleve)
     db.commit()
     return {"detail": "Élève supprimé"}
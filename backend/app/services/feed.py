@@ -0,0 +1,210 @@
+# app/services/feed.py
+# =====================================================
+# Fil d'actualité : notes et commentaires récents de
+# l'équipe de l'utilisateur.
+# - fan-out à l'écriture : à chaque création, une ligne
+#   feed_items par membre de l'équipe (un seul
+#   INSERT ... SELECT dans la transaction de l'écriture)
+# - équipes de plus de FEED_FANOUT_MAX_MEMBERS membres :
+#   pas de fan-out, le fil est calculé à la lecture
+#   (notes + commentaires de l'équipe), comme pour un
+#   membre arrivé après coup dont le fil est encore vide
+# - lecture : keyset sur (user_id, created_at)
+# =====================================================
+
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import func, literal, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db import dialect_insert
+from app.models.commentaire import Commentaire
+from app.models.feed import FeedItem
+from app.models.note import Note
+from app.models.utilisateur import Utilisateur
+
+FEED_NOTE = "note"
+FEED_COMMENTAIRE = "commentaire"
+EXTRAIT_LENGTH = 200
+
+_COLUMNS = ["user_id", "type", "objet_id", "note_id", "created_at"]
+
+
+# -------------------------------------------------------
+# 🔹 Fan-out à l'écriture
+# -------------------------------------------------------
+def _small_teams(db: Session, equipes):
+    """Équipes (parmi celles données) assez petites pour le fan-out."""
+    equipes = {e for e in equipes if e}
+    if not equipes:
+        return []
+    sizes = (
+        db.query(Utilisateur.equipe, func.count())
+        .filter(Utilisateur.equipe.in_(equipes))
+        .group_by(Utilisateur.equipe)
+    )
+    return [equipe for equipe, n in sizes if n <= settings.FEED_FANOUT_MAX_MEMBERS]
+
+
+def _fan_out(db: Session, source):
+    insert = dialect_insert(db.get_bind())
+    db.execute(insert(FeedItem).from_select(_COLUMNS, source).on_conflict_do_nothing())
+
+
+def fan_out_notes(db: Session, note_ids, equipes):
+    """Distribue les notes créées aux membres de leur équipe (avant le commit de l'appelant)."""
+    teams = _small_teams(db, equipes)
+    if not note_ids or not teams:
+        return
+    _fan_out(db, (
+        select(Utilisateur.id, literal(FEED_NOTE), Note.id, Note.id, Note.created_at)
+        .join(Utilisateur, Utilisateur.equipe == Note.equipe)
+        .where(Note.id.in_(note_ids), Note.equipe.in_(teams))
+    ))
+
+
+def fan_out_commentaire(db: Session, commentaire_id: int, equipe):
+    teams = _small_teams(db, [equipe])
+    if not teams:
+        return
+    _fan_out(db, (
+        select(Utilisateur.id, literal(FEED_COMMENTAIRE), Commentaire.id, Commentaire.note_id, Commentaire.date)
+        .join(Note, Note.id == Commentaire.note_id)
+        .join(Utilisateur, Utilisateur.equipe == Note.equipe)
+        .where(Commentaire.id == commentaire_id, Note.equipe.in_(teams))
+    ))
+
+
+# -------------------------------------------------------
+# 🔹 Curseur (created_at, type, objet_id)
+# -------------------------------------------------------
+def _encode_cursor(item) -> str:
+    payload = {"c": item["created_at"].isoformat(), "t": item["type"], "i": item["objet_id"]}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at = datetime.fromisoformat(payload["c"])
+        kind, objet_id = payload["t"], int(payload["i"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Curseur invalide")
+    if kind not in (FEED_NOTE, FEED_COMMENTAIRE):
+        raise HTTPException(status_code=400, detail="Curseur invalide")
+    # Date relue depuis la source (même représentation que les colonnes),
+    # la valeur encodée ne sert que si l'objet a été supprimé
+    source = (
+        select(Note.created_at).where(Note.id == objet_id)
+        if kind == FEED_NOTE
+        else select(Commentaire.date).where(Commentaire.id == objet_id)
+    )
+    return func.coalesce(source.scalar_subquery(), created_at), kind, objet_id
+
+
+# -------------------------------------------------------
+# 🔹 Lecture
+# -------------------------------------------------------
+def _fanned_out_page(db: Session, user_id: int, cursor, limit: int):
+    query = db.query(FeedItem.type, FeedItem.objet_id, FeedItem.note_id, FeedItem.created_at).filter(
+        FeedItem.user_id == user_id
+    )
+    if cursor:
+        ref, kind, objet_id = cursor
+        query = query.filter(
+            tuple_(FeedItem.created_at, FeedItem.type, FeedItem.objet_id) < tuple_(ref, kind, objet_id)
+        )
+    rows = query.order_by(FeedItem.created_at.desc(), FeedItem.type.desc(), FeedItem.objet_id.desc()).limit(limit)
+    return [row._asdict() for row in rows]
+
+
+def _fan_out_on_read_page(db: Session, equipe: str, cursor, limit: int):
+    """Dernières notes et commentaires de l'équipe, fusionnés (ordre : date, type, id décroissants)."""
+    notes = db.query(
+        literal(FEED_NOTE).label("type"), Note.id.label("objet_id"), Note.id.label("note_id"), Note.created_at
+    ).filter(Note.equipe == equipe)
+    commentaires = (
+        db.query(
+            literal(FEED_COMMENTAIRE).label("type"), Commentaire.id.label("objet_id"),
+            Commentaire.note_id, Commentaire.date.label("created_at"),
+        )
+        .join(Note, Note.id == Commentaire.note_id)
+        .filter(Note.equipe == equipe)
+    )
+    if cursor:
+        # "note" > "commentaire" : à date égale, les notes passent avant
+        ref, kind, objet_id = cursor
+        if kind == FEED_NOTE:
+            notes = notes.filter(tuple_(Note.created_at, Note.id) < tuple_(ref, objet_id))
+            commentaires = commentaires.filter(Commentaire.date <= ref)
+        else:
+            notes = notes.filter(Note.created_at < ref)
+            commentaires = commentaires.filter(tuple_(Commentaire.date, Commentaire.id) < tuple_(ref, objet_id))
+    rows = [row._asdict() for row in notes.order_by(Note.created_at.desc(), Note.id.desc()).limit(limit)]
+    rows += [
+        row._asdict()
+        for row in commentaires.order_by(Commentaire.date.desc(), Commentaire.id.desc()).limit(limit)
+    ]
+    rows.sort(key=lambda r: (r["created_at"], r["type"], r["objet_id"]), reverse=True)
+    return rows[:limit]
+
+
+def _hydrate(db: Session, rows):
+    """Titre, extrait et auteur des seuls éléments de la page."""
+    note_ids = {r["note_id"] for r in rows}
+    comment_ids = {r["objet_id"] for r in rows if r["type"] == FEED_COMMENTAIRE}
+    notes = {
+        n.id: n
+        for n in db.query(Note.id, Note.titre, Note.contenu, Note.equipe, Note.auteur_id).filter(Note.id.in_(note_ids))
+    }
+    comments = {
+        c.id: c
+        for c in db.query(Commentaire.id, Commentaire.contenu, Commentaire.auteur_id).filter(Commentaire.id.in_(comment_ids))
+    }
+    auteurs = {n.auteur_id for n in notes.values()} | {c.auteur_id for c in comments.values()}
+    noms = dict(db.query(Utilisateur.id, Utilisateur.nom).filter(Utilisateur.id.in_(auteurs)))
+
+    items = []
+    for r in rows:
+        note = notes.get(r["note_id"])
+        source = note if r["type"] == FEED_NOTE else comments.get(r["objet_id"])
+        if note is None or source is None:
+            continue  # supprimé depuis le fan-out
+        items.append({
+            "type": r["type"],
+            "note_id": note.id,
+            "commentaire_id": r["objet_id"] if r["type"] == FEED_COMMENTAIRE else None,
+            "titre": note.titre,
+            "extrait": (source.contenu or "")[:EXTRAIT_LENGTH],
+            "equipe": note.equipe,
+            "auteur_id": source.auteur_id,
+            "auteur_nom": noms.get(source.auteur_id),
+            "created_at": r["created_at"],
+        })
+    return items
+
+
+def feed_service(db: Session, current_user, cursor: str = "", limit: int = 20):
+    if isinstance(current_user, dict):
+        user_id, equipe = current_user.get("id"), current_user.get("equipe")
+    else:
+        user_id, equipe = current_user.id, current_user.equipe
+    if not equipe:
+        return {"items": [], "next_cursor": None}
+
+    position = _decode_cursor(cursor) if cursor else None
+    fanned_out = _small_teams(db, [equipe]) and db.query(
+        db.query(FeedItem.id).filter(FeedItem.user_id == user_id).exists()
+    ).scalar()
+    if fanned_out:
+        rows = _fanned_out_page(db, user_id, position, limit + 1)
+    else:
+        rows = _fan_out_on_read_page(db, equipe, position, limit + 1)
+
+    next_cursor = _encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return {"items": _hydrate(db, rows[:limit]), "next_cursor": next_cursor}
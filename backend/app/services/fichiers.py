@@ -0,0 +1,209 @@
+# app/services/fichiers.py
+# =====================================================
+# Réception et stockage des pièces jointes.
+# - lecture en flux par blocs de taille fixe (mémoire
+#   constante), taille maximale vérifiée pendant la lecture
+# - stockage adressé par contenu : blobs/ab/cd/<sha256>
+#   (deux niveaux de répertoires → au plus 256 entrées par
+#   niveau), table fichiers_blobs avec compteur de références
+# - un contenu déjà stocké ne coûte qu'un hachage et une
+#   lecture d'index : aucune écriture
+# - téléchargement : ETag fort (SHA-256 du contenu), 304,
+#   Range → 206, cache immuable pour les URL versionnées
+# Disque local ou stockage objet S3 : voir services/stockage.py.
+# Fonctions bloquantes : les appeler hors de la boucle
+# d'événements (run_in_threadpool / route synchrone).
+# =====================================================
+
+import hashlib
+import posixpath
+from collections import Counter
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import FileResponse, RedirectResponse, Response
+from sqlalchemy import bindparam, case, func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db import dialect_insert
+from app.models.fichier import BlobFichier
+from app.services.stockage import get_storage
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1 Mio
+BLOB_SUBDIR = "blobs"
+CACHE_IMMUTABLE = "public, max-age=31536000, immutable"  # URL versionnée par le contenu (?v=<sha256>)
+CACHE_REVALIDATE = "no-cache"                             # revalidation systématique (304 si inchangé)
+
+blobs_table = BlobFichier.__table__
+
+
+def safe_filename(filename) -> str:
+    """Nom de fichier sans chemin (ni / ni \\)."""
+    name = (filename or "").replace("\\", "/").split("/")[-1]
+    return name or "fichier"
+
+
+def _too_large(nom):
+    return HTTPException(
+        status_code=413,
+        detail=f"Fichier trop volumineux : {nom} (maximum {settings.UPLOAD_MAX_BYTES} octets)",
+    )
+
+
+def _hash_upload(upload: UploadFile):
+    """Première passe : (taille, sha256) sans rien écrire ; 413 dès que la limite est dépassée."""
+    nom = safe_filename(upload.filename)
+    digest, taille = hashlib.sha256(), 0
+    upload.file.seek(0)
+    while chunk := upload.file.read(UPLOAD_CHUNK_SIZE):
+        taille += len(chunk)
+        if taille > settings.UPLOAD_MAX_BYTES:
+            raise _too_large(nom)
+        digest.update(chunk)
+    return taille, digest.hexdigest()
+
+
+def _write(storage, key: str, upload: UploadFile):
+    """Seconde passe : envoi en flux vers le stockage."""
+    upload.file.seek(0)
+    storage.save(key, upload.file, UPLOAD_CHUNK_SIZE)
+
+
+def store_upload(upload: UploadFile, prefix: str, filename: str = None, storage=None):
+    """Stocke le fichier reçu tel quel sous prefix (avatars) ; 413 au-delà de UPLOAD_MAX_BYTES."""
+    storage = storage or get_storage()
+    nom = safe_filename(upload.filename)
+    taille, sha256 = _hash_upload(upload)
+    key = posixpath.join(prefix, filename or nom)
+    _write(storage, key, upload)
+    return {"nom_fichier": nom, "chemin": key, "taille": taille, "sha256": sha256}
+
+
+# -------------------------------------------------------
+# 🔹 Stockage adressé par contenu
+# -------------------------------------------------------
+def blob_key(sha256: str) -> str:
+    return posixpath.join(BLOB_SUBDIR, sha256[:2], sha256[2:4], sha256)
+
+
+def store_blobs(db: Session, uploads, storage=None):
+    """
+    Stocke les fichiers reçus (adressés par SHA-256) et incrémente leurs
+    compteurs de références dans la transaction de l'appelant. Tous les
+    fichiers sont hachés avant toute écriture : un 413 n'écrit rien.
+    Retourne les colonnes des FichierNote à créer.
+    """
+    storage = storage or get_storage()
+    hashed = [(upload, *_hash_upload(upload)) for upload in uploads or []]
+    if not hashed:
+        return []
+
+    known = dict(
+        db.query(BlobFichier.sha256, BlobFichier.chemin).filter(
+            BlobFichier.sha256.in_({sha256 for _, _, sha256 in hashed})
+        )
+    )
+    fichiers, references, uploads_by_sha = [], Counter(), {}
+    for upload, taille, sha256 in hashed:
+        references[sha256] += 1
+        uploads_by_sha.setdefault(sha256, upload)
+        fichiers.append({
+            "nom_fichier": safe_filename(upload.filename),
+            "chemin": known.get(sha256) or blob_key(sha256),
+            "taille": taille,
+            "sha256": sha256,
+        })
+
+    # 🔢 Références comptées avant la vérification du fichier : la ligne
+    # est verrouillée jusqu'au commit, la collecte des orphelins
+    # (services/nettoyage.py) ne peut plus la supprimer entre-temps
+    insert = dialect_insert(db.get_bind())(BlobFichier)
+    blobs = list({f["sha256"]: f for f in fichiers}.values())
+    db.execute(
+        insert.on_conflict_do_update(
+            index_elements=[BlobFichier.sha256],
+            set_={
+                "nb_references": blobs_table.c.nb_references + insert.excluded.nb_references,
+                "chemin": insert.excluded.chemin,
+                "updated_at": func.now(),
+            },
+        ),
+        [
+            {"sha256": f["sha256"], "taille": f["taille"], "chemin": f["chemin"], "nb_references": references[f["sha256"]]}
+            for f in blobs
+        ],
+    )
+    for f in blobs:
+        if not storage.exists(f["chemin"]):
+            # 💾 Nouveau contenu (ou fichier disparu) : seconde passe, écriture
+            _write(storage, f["chemin"], uploads_by_sha[f["sha256"]])
+    return fichiers
+
+
+_release_stmt = (
+    blobs_table.update()
+    .where(blobs_table.c.sha256 == bindparam("b_sha256"))
+    .values(
+        nb_references=case(
+            (blobs_table.c.nb_references > bindparam("b_n"), blobs_table.c.nb_references - bindparam("b_n")),
+            else_=0,
+        ),
+        updated_at=func.now(),
+    )
+)
+
+
+def release_blobs(db: Session, sha256s):
+    """
+    Décrémente les compteurs (dans la transaction de l'appelant). Un
+    contenu à zéro référence n'est pas effacé ici : un envoi concurrent
+    peut être en train de le réutiliser ; il reste sur disque jusqu'à
+    sa collecte.
+    """
+    counts = Counter(s for s in sha256s if s)
+    if counts:
+        db.execute(_release_stmt, [{"b_sha256": sha256, "b_n": n} for sha256, n in sorted(counts.items())])
+
+
+# -------------------------------------------------------
+# 🔹 Téléchargement (ETag, 304, Range)
+# -------------------------------------------------------
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def download_response(
+    chemin: str, sha256: str = None, filename: str = None, if_none_match: str = None, version: str = None,
+    storage=None, headers: dict = None,
+):
+    """
+    Réponse de téléchargement d'un fichier stocké :
+    - ETag fort dérivé du SHA-256 du contenu (ETag de l'objet en S3
+      hors stockage adressé) ; If-None-Match → 304
+    - disque local : Range / If-Range → 206 (FileResponse), Accept-Ranges,
+      envoi sans copie (extension ASGI pathsend) si le serveur la propose
+    - S3 : redirection vers une URL présignée (le serveur S3 gère Range)
+    - cache immuable d'un an si l'URL porte la version du contenu (?v=<sha256>)
+    Bloquante (stat, hachage éventuel) : à appeler hors de la boucle d'événements.
+    """
+    storage = storage or get_storage()
+    if not chemin or not storage.exists(chemin):
+        raise HTTPException(status_code=404, detail="Fichier introuvable.")
+    sha256 = sha256 or storage.fingerprint(chemin)
+    etag = f'"{sha256}"'
+    headers = {
+        **(headers or {}),
+        "ETag": etag,
+        "Cache-Control": CACHE_IMMUTABLE if version == sha256 else CACHE_REVALIDATE,
+    }
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    local = storage.local_path(chemin)
+    if local is None:
+        # URL présignée temporaire : la redirection elle-même n'est pas mise en cache
+        headers["Cache-Control"] = CACHE_REVALIDATE
+        return RedirectResponse(storage.url(chemin, filename), status_code=307, headers=headers)
+    return FileResponse(local, headers=headers, filename=filename, content_disposition_type="inline")
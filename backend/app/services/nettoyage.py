@@ -0,0 +1,296 @@
+# app/services/nettoyage.py
+# =====================================================
+# Collecte des fichiers orphelins du stockage :
+# - contenus adressés (blobs/) sans référence depuis le
+#   délai de grâce : ligne fichiers_blobs et fichier supprimés
+#   ensemble (DELETE ... RETURNING, ligne verrouillée : un
+#   envoi concurrent du même contenu attend ou la conserve)
+# - fichiers blobs/ sans ligne : adoptés à zéro référence
+#   puis collectés comme ci-dessus
+# - compteurs nb_references recalés sur le nombre réel de
+#   lignes fichiers_notes avant la collecte
+# - anciennes pièces jointes (hors blobs/) qu'aucune ligne
+#   fichiers_notes ne désigne, avatars remplacés ou dont
+#   l'utilisateur a été supprimé, fichiers temporaires .part
+#   abandonnés
+# - vignettes / aperçus (<clé>~<taille>.<format>) dont
+#   l'original n'est plus référencé (recalculables)
+# Parcours en flux du stockage (os.scandir / listage S3),
+# références vérifiées par lots, débit d'E/S borné.
+# Un fichier plus récent que le délai de grâce n'est jamais
+# touché (envoi en cours, transaction non validée).
+# =====================================================
+
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+
+from sqlalchemy import delete, exists, func, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db import dialect_insert
+from app.models.fichier import BlobFichier, FichierNote
+from app.models.utilisateur import Utilisateur
+from app.services.fichiers import BLOB_SUBDIR
+from app.services.stockage import get_storage
+from app.services.utilisateurs import AVATAR_PREFIX, avatar_key
+from app.services.vignettes import FORMATS, VARIANT_SEPARATOR
+
+GC_BATCH = 500
+
+_AVATAR_RE = re.compile(r"^user_(\d+)_")
+_VARIANT_RE = re.compile(rf"{re.escape(VARIANT_SEPARATOR)}\d+\.(?:{'|'.join(FORMATS)})$")  # <clé>~<taille>.<format>
+
+
+class _Throttle:
+    """Au plus `rate` opérations par seconde (0 = sans limite)."""
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        if self._next > now:
+            time.sleep(self._next - now)
+        self._next = max(self._next, now) + self.interval
+
+
+def _batches(iterable, size: int):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+# -------------------------------------------------------
+# 🔹 Classement d'un lot de fichiers
+# -------------------------------------------------------
+def _is_current_avatar(key: str, current) -> bool:
+    """Avatar actuel de l'utilisateur (clé de stockage) ou l'une de ses vignettes."""
+    if not current:
+        return False
+    return key == current or key.startswith(current + VARIANT_SEPARATOR)
+
+
+def _orphans(db: Session, storage, files):
+    """Retourne (orphelins [(clé, taille)], blobs sans ligne [(sha256, clé, taille, mtime)])."""
+    orphans, unknown_blobs = [], []
+    blobs, variants, avatars, others = {}, {}, {}, {}
+    for key, taille, mtime in files:
+        name = key.rsplit("/", 1)[-1]
+        if name.startswith(".") and name.endswith(".part"):
+            orphans.append((key, taille))  # envoi interrompu
+        elif key.startswith(f"{BLOB_SUBDIR}/") and VARIANT_SEPARATOR in name:
+            variants[key] = (name.split(VARIANT_SEPARATOR, 1)[0], taille)
+        elif key.startswith(f"{BLOB_SUBDIR}/"):
+            blobs[name] = (key, taille, mtime)
+        elif key.startswith(f"{AVATAR_PREFIX}/"):
+            match = _AVATAR_RE.match(name)
+            if match:  # nom inconnu : conservé
+                avatars[key] = (int(match.group(1)), taille)
+        else:
+            # Aperçu d'une ancienne pièce jointe : suit le sort de son original
+            match = _VARIANT_RE.search(key)
+            others[key] = (key[:match.start()] if match else key, taille)
+
+    if blobs or variants:
+        shas = blobs.keys() | {sha256 for sha256, _ in variants.values()}
+        known = set(db.scalars(select(BlobFichier.sha256).where(BlobFichier.sha256.in_(shas))))
+        unknown_blobs = [(sha256, *blobs[sha256]) for sha256 in blobs.keys() - known]
+        # Aperçus sans contenu : supprimés directement (recalculables)
+        orphans += [(key, taille) for key, (sha256, taille) in variants.items() if sha256 not in known]
+
+    if avatars:
+        current = {
+            user_id: avatar_key(avatar_chemin, avatar_url)
+            for user_id, avatar_chemin, avatar_url in db.query(
+                Utilisateur.id, Utilisateur.avatar_chemin, Utilisateur.avatar_url
+            ).filter(Utilisateur.id.in_({user_id for user_id, _ in avatars.values()}))
+        }
+        orphans += [
+            (key, taille) for key, (user_id, taille) in avatars.items() if not _is_current_avatar(key, current.get(user_id))
+        ]
+
+    if others:
+        # Anciennes lignes : chemin local complet (uploads/…) ou clé
+        chemins = {source: {source, storage.local_path(source)} - {None} for source, _ in others.values()}
+        referenced = set(db.scalars(
+            select(FichierNote.chemin).where(FichierNote.chemin.in_(set().union(*chemins.values())))
+        ))
+        orphans += [(key, taille) for key, (source, taille) in others.items() if not chemins[source] & referenced]
+    return orphans, unknown_blobs
+
+
+# -------------------------------------------------------
+# 🔹 Compteurs de références désynchronisés
+# -------------------------------------------------------
+def _repair_reference_counts(bind, cutoff, throttle, report, dry_run, stop):
+    """
+    Recale nb_references sur le nombre réel de lignes fichiers_notes
+    (suppressions en cascade non décomptées, etc.). Seules les lignes
+    inchangées depuis le délai de grâce sont corrigées : un envoi ou un
+    retrait en cours remet updated_at à jour et garde son compteur.
+    """
+    actual = (
+        select(func.count()).select_from(FichierNote)
+        .where(FichierNote.sha256 == BlobFichier.sha256).scalar_subquery()
+    )
+    drifted = (BlobFichier.updated_at < cutoff) & (BlobFichier.nb_references != actual)
+    last = ""
+    while not stop.is_set():
+        with Session(bind=bind) as db:
+            batch = db.scalars(
+                select(BlobFichier.sha256).where(BlobFichier.sha256 > last)
+                .order_by(BlobFichier.sha256).limit(GC_BATCH)
+            ).all()
+            if not batch:
+                return
+            last = batch[-1]
+            throttle.wait()
+            if dry_run:
+                report["compteurs_corriges"] += db.scalar(
+                    select(func.count()).select_from(BlobFichier).where(BlobFichier.sha256.in_(batch), drifted)
+                )
+                continue
+            # Conditions réévaluées sous verrou, comme pour la collecte
+            result = db.execute(
+                update(BlobFichier).where(BlobFichier.sha256.in_(batch), drifted)
+                .values(nb_references=actual, updated_at=BlobFichier.updated_at)  # collectable dans la même passe
+                .execution_options(synchronize_session=False)
+            )
+            report["compteurs_corriges"] += result.rowcount
+            db.commit()
+
+
+# -------------------------------------------------------
+# 🔹 Contenus à zéro référence
+# -------------------------------------------------------
+def _collect_released_blobs(bind, storage, cutoff, throttle, report, dry_run, stop):
+    unreferenced = (
+        (BlobFichier.updated_at < cutoff)
+        & ~exists().where(FichierNote.sha256 == BlobFichier.sha256)  # compteur désynchronisé : conservé
+    )
+    if not dry_run:
+        # dry_run : compteurs non corrigés, seules les lignes fichiers_notes comptent
+        unreferenced &= BlobFichier.nb_references == 0
+    last = ""
+    while not stop.is_set():
+        with Session(bind=bind) as db:
+            batch = db.scalars(
+                select(BlobFichier.sha256).where(unreferenced, BlobFichier.sha256 > last)
+                .order_by(BlobFichier.sha256).limit(GC_BATCH)
+            ).all()
+            if not batch:
+                return
+            last = batch[-1]
+            throttle.wait()
+            if dry_run:
+                rows = db.execute(
+                    select(BlobFichier.chemin, BlobFichier.taille).where(BlobFichier.sha256.in_(batch))
+                ).all()
+            else:
+                # Conditions réévaluées sous verrou : un envoi concurrent garde sa ligne
+                rows = db.execute(
+                    delete(BlobFichier).where(BlobFichier.sha256.in_(batch), unreferenced)
+                    .returning(BlobFichier.chemin, BlobFichier.taille)
+                ).all()
+            for chemin, taille in rows:
+                if not dry_run:
+                    throttle.wait()
+                    storage.delete(chemin)  # avant le commit : la ligne reste verrouillée
+                report["supprimes"] += 1
+                report["octets"] += taille or 0
+            db.commit()
+
+
+# -------------------------------------------------------
+# 🔹 Collecte
+# -------------------------------------------------------
+def collect_orphans(bind, storage=None, grace_seconds: float = None, rate: float = None, dry_run: bool = False, stop=None):
+    """
+    Supprime les fichiers orphelins plus anciens que le délai de grâce.
+    Retourne {"examines", "supprimes", "octets", "compteurs_corriges"}
+    (octets récupérés ; dry_run : ce qui serait fait, sans rien modifier).
+    """
+    storage = storage or get_storage()
+    grace_seconds = settings.UPLOAD_GC_GRACE_SECONDS if grace_seconds is None else grace_seconds
+    throttle = _Throttle(settings.UPLOAD_GC_MAX_OPS if rate is None else rate)
+    stop = stop or threading.Event()
+    started = time.time()
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=grace_seconds)
+    report = {"examines": 0, "supprimes": 0, "octets": 0, "compteurs_corriges": 0}
+
+    old_files = (f for f in storage.iter_files() if f[2] < started - grace_seconds)
+    for batch in _batches(old_files, GC_BATCH):
+        if stop.is_set():
+            return report
+        report["examines"] += len(batch)
+        throttle.wait()
+        with Session(bind=bind) as db:
+            orphans, unknown_blobs = _orphans(db, storage, batch)
+            if unknown_blobs and dry_run:
+                orphans += [(key, taille) for _, key, taille, _ in unknown_blobs]
+            elif unknown_blobs:
+                # Adoptés à zéro référence (date du fichier) : supprimés
+                # plus bas sous verrou, comme tout contenu libéré
+                insert = dialect_insert(db.get_bind())(BlobFichier)
+                db.execute(insert.on_conflict_do_nothing(), [
+                    {
+                        "sha256": sha256, "chemin": key, "taille": taille, "nb_references": 0,
+                        "updated_at": datetime.fromtimestamp(mtime, timezone.utc),
+                    }
+                    for sha256, key, taille, mtime in unknown_blobs
+                ])
+                db.commit()
+        for key, taille in orphans:
+            if not dry_run:
+                throttle.wait()
+                storage.delete(key)
+            report["supprimes"] += 1
+            report["octets"] += taille
+
+    _repair_reference_counts(bind, cutoff, throttle, report, dry_run, stop)
+    _collect_released_blobs(bind, storage, cutoff, throttle, report, dry_run, stop)
+    return report
+
+
+# -------------------------------------------------------
+# 🔹 Collecte périodique (thread de fond)
+# -------------------------------------------------------
+class OrphanCollector:
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, bind, interval: float):
+        if interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(bind, interval), name="upload-gc", daemon=True)
+        self._thread.start()
+
+    def _run(self, bind, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                report = collect_orphans(bind, stop=self._stop)
+            except Exception as e:
+                print(f"⚠️ Collecte des fichiers orphelins impossible, nouvel essai au prochain cycle : {e}")
+                continue
+            if report["supprimes"]:
+                print(f"🧹 Fichiers orphelins : {report['supprimes']} supprimés, {report['octets']} octets récupérés")
+            if report["compteurs_corriges"]:
+                print(f"🔢 Compteurs de références corrigés : {report['compteurs_corriges']}")
+
+    def stop(self):
+        """Interrompt la collecte en cours (entre deux lots) et arrête le thread."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+
+orphan_collector = OrphanCollector()
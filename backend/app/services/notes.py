@@ -1,26 +1,71 @@
 from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import case, delete, exists, func, insert, literal, select, text, tuple_, union_all, update
 from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
-import os, shutil
+from datetime import datetime
+import os, json, base64, csv, io
 from app.models.note import Note
 from app.models.commentaire import Commentaire
 from app.models.utilisateur import Utilisateur
 from app.models.fichier import FichierNote
-from app.schemas.schemas import CommentaireCreate, CommentaireOut, NotesResponse
-from app.services.some_ai_module import generate_summary
-
-UPLOAD_DIR = "uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+from app.models.like import NoteLike
+from app.db import dialect_insert
+from app.schemas.schemas import CommentaireCreate, CommentaireOut, NotesResponse, NoteCreate
+from pydantic import ValidationError
+from app.services.resumes import enqueue_summary, summary_status, content_hash, cached_summary, RESUME_PENDING
+from app.services.vues import view_counter
+from app.services.related import related_index
+from app.services.doublons import duplicate_index
+from app.services.trending import record_trending
+from app.services.stats import _as_date, record_note_history, record_stats
+from app.services.feed import fan_out_commentaire, fan_out_notes
+from app.services.fichiers import download_response, release_blobs, store_blobs
+from app.services.stockage import get_storage
+from app.services.vignettes import APERCU, enqueue_variants, is_image, variant_for
+from app.search import apply_fulltext_search
+from app.cache import TTLCache
+from app.config import settings
+
+# 🪶 Longueur de l'extrait renvoyé par la vue résumé
+SUMMARY_EXCERPT_LENGTH = 200
+
+# 📤 Taille des lots de l'export (lignes lues par aller-retour du curseur serveur)
+EXPORT_BATCH_SIZE = 1000
+
+# 🧮 Totaux exacts et facettes par signature de filtre (par worker, TTL entre workers)
+_count_cache = TTLCache(ttl=settings.NOTES_COUNT_CACHE_TTL)
+_facets_cache = TTLCache(ttl=settings.NOTES_FACETS_CACHE_TTL)
+
+
+def invalidate_notes_cache():
+    """À appeler après toute création / modification / suppression de notes."""
+    _count_cache.clear()
+    _facets_cache.clear()
+
+
+def _enqueue_previews(stockes):
+    """🖼️ Aperçus des images jointes calculés en arrière-plan (services/vignettes.py)."""
+    for fichier in stockes:
+        if is_image(fichier["nom_fichier"]):
+            enqueue_variants(fichier["chemin"], APERCU)
 
 # ---------------- CREATE ----------------
 def create_note_service(
     titre, contenu, auteur_id, equipe, priorite, categorie, fichiers, db: Session, current_user: Utilisateur
 ):
     final_auteur_id = auteur_id or current_user.id
+    digest = content_hash(contenu)
+    # 📎 Fichiers hachés en flux avant toute écriture (413 → rien n'est créé),
+    # stockés par contenu : un fichier déjà connu n'est pas réécrit
+    stockes = store_blobs(db, fichiers)
 
     note = Note(
         titre=titre,
         contenu=contenu,
+        contenu_hash=digest,
+        resume_ia=cached_summary(digest),  # contenu déjà résumé → pas de recalcul
         equipe=equipe or current_user.equipe,
         auteur_id=final_auteur_id,
         priorite=priorite,
@@ -28,66 +73,496 @@ def create_note_service(
     )
 
     db.add(note)
+    record_stats(db, [(note.equipe, final_auteur_id, {"notes": 1})])
+    db.flush()
+    fan_out_notes(db, [note.id], [note.equipe])
+    for fichier in stockes:
+        db.add(FichierNote(**fichier, note_id=note.id))
     db.commit()
     db.refresh(note)
+    _enqueue_previews(stockes)
+
+    # 🧠 Résumé calculé en arrière-plan (services/resumes.py)
+    if not note.resume_ia:
+        enqueue_summary(db.get_bind(), note.id, note.contenu)
+    related_index.upsert(note.id, note.titre, note.contenu)
+    # 👯 Quasi-doublons (MinHash/LSH), renvoyés avec la note créée
+    note.doublons_possibles = _find_duplicates(note, db)
+    invalidate_notes_cache()
+    return note
 
-    if fichiers:
-        for f in fichiers:
-            filename = f.filename.replace("\\", "/").split("/")[-1]
-            file_path = os.path.join(UPLOAD_DIR, filename)
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(f.file, buffer)
+def _find_duplicates(note: Note, db: Session):
+    if not duplicate_index.ready:
+        duplicate_index.build(db.get_bind())
+    duplicate_index.upsert(note.id, note.titre, note.contenu)
+    scores = dict(duplicate_index.similar(note.id, settings.DUPLICATE_THRESHOLD))
+    if not scores:
+        return []
+    rows = db.query(Note.id, Note.titre, Note.equipe, Note.created_at).filter(Note.id.in_(scores)).all()
+    doublons = [{**row._asdict(), "similarite": scores[row.id]} for row in rows]
+    return sorted(doublons, key=lambda d: (-d["similarite"], d["id"]))
+
+# ---------------- CREATE (LOT) ----------------
+def bulk_create_notes_service(items: list, db: Session, current_user):
+    """
+    Crée un lot de notes en une seule transaction : chaque élément est validé
+    avec NoteCreate, les éléments valides sont insérés par un unique
+    INSERT ... RETURNING (executemany). Retourne un résultat par élément
+    (id créé ou erreurs), dans l'ordre de la requête.
+    """
+    if len(items) > settings.NOTES_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Lot trop volumineux (maximum {settings.NOTES_BULK_MAX_ITEMS} notes)",
+        )
 
-            new_file = FichierNote(nom_fichier=filename, chemin=file_path, note_id=note.id)
-            db.add(new_file)
+    current_user_id = current_user.get("id") if isinstance(current_user, dict) else current_user.id
+    current_user_team = current_user.get("equipe") if isinstance(current_user, dict) else current_user.equipe
 
+    results = [{"index": i, "id": None, "errors": None} for i in range(len(items))]
+    valid = []
+    for i, item in enumerate(items):
+        try:
+            note_in = NoteCreate.model_validate(item)
+        except ValidationError as e:
+            results[i]["errors"] = [
+                f"{'.'.join(str(part) for part in err['loc']) or 'note'}: {err['msg']}" for err in e.errors()
+            ]
+            continue
+        valid.append((i, note_in))
+
+    # 👤 Auteurs inconnus → erreur par élément plutôt qu'échec du lot
+    auteur_ids = {note_in.auteur_id for _, note_in in valid if note_in.auteur_id}
+    known = {uid for (uid,) in db.query(Utilisateur.id).filter(Utilisateur.id.in_(auteur_ids))} if auteur_ids else set()
+
+    rows, positions = [], []
+    for i, note_in in valid:
+        if note_in.auteur_id and note_in.auteur_id not in known:
+            results[i]["errors"] = [f"auteur_id: Auteur {note_in.auteur_id} non trouvé"]
+            continue
+        rows.append({
+            "titre": note_in.titre,
+            "contenu": note_in.contenu,
+            "contenu_hash": content_hash(note_in.contenu),
+            "equipe": note_in.equipe or current_user_team,
+            "auteur_id": note_in.auteur_id or current_user_id,
+            "priorite": note_in.priorite,
+            "categorie": note_in.categorie,
+            "resume_ia": note_in.resume_ia,
+        })
+        positions.append(i)
+
+    if rows:
+        stmt = insert(Note).returning(Note.id, sort_by_parameter_order=True)
+        ids = db.execute(stmt, rows).scalars().all()
+        record_stats(db, [(row["equipe"], row["auteur_id"], {"notes": 1}) for row in rows])
+        fan_out_notes(db, ids, {row["equipe"] for row in rows})
         db.commit()
-        db.refresh(note)
+        for i, note_id, row in zip(positions, ids, rows):
+            results[i]["id"] = note_id
+            if not row["resume_ia"]:
+                enqueue_summary(db.get_bind(), note_id, row["contenu"])
+            related_index.upsert(note_id, row["titre"], row["contenu"])
+            duplicate_index.upsert(note_id, row["titre"], row["contenu"])
+        invalidate_notes_cache()
 
-    return note
+    return {"created": len(rows), "results": results}
 
 # ---------------- LIST ----------------
-def list_notes_service(search, author, sort, page, limit, db: Session, current_user: Utilisateur):
+def _encode_cursor(note: Note, sort: str) -> str:
+    """Curseur opaque : position (created_at, id) de la dernière note servie."""
+    payload = {"c": note.created_at.isoformat() if note.created_at else None, "i": note.id, "s": sort}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(payload, dict):
+            raise ValueError("curseur non objet")
+        created_at = datetime.fromisoformat(payload["c"]) if payload.get("c") else None
+        note_id = int(payload["i"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Curseur invalide")
+    if payload.get("s") != sort:
+        raise HTTPException(status_code=400, detail="Curseur incompatible avec le tri demandé")
+    return created_at, note_id
+
+
+def _apply_keyset(query, cursor: str, sort: str):
+    """
+    Filtre "après le curseur" sur (created_at, id), servi par l'index
+    composite. La date de référence est relue en SQL depuis la note du
+    curseur (même représentation que la colonne) ; la valeur encodée ne
+    sert que si cette note a été supprimée entre-temps.
+    """
+    created_at, note_id = _decode_cursor(cursor, sort)
+    ref_created_at = func.coalesce(
+        select(Note.created_at).where(Note.id == note_id).scalar_subquery(),
+        created_at,
+    )
+    position = tuple_(Note.created_at, Note.id)
+    reference = tuple_(ref_created_at, note_id)
+    return query.filter(position > reference if sort == "date_asc" else position < reference)
+
+
+def _estimate_count(query, db: Session):
+    """
+    Estimation du total via les statistiques du planificateur PostgreSQL :
+    pg_class.reltuples pour une vue non filtrée, sinon l'estimation de
+    lignes d'EXPLAIN. None si le dialecte ne fournit pas d'estimation.
+    """
+    bind = db.get_bind()
+    if bind.dialect.name != "postgresql":
+        return None
+
+    statement = query.order_by(None).statement
+    if statement.whereclause is None:
+        reltuples = db.execute(text("SELECT reltuples FROM pg_class WHERE oid = 'notes'::regclass")).scalar()
+        if reltuples is not None and reltuples >= 0:  # -1 = table jamais analysée
+            return int(reltuples)
+
+    compiled = statement.compile(dialect=bind.dialect)
+    plan = db.connection().exec_driver_sql("EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params).scalar()
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _count_notes(query, count: str, signature, db: Session):
+    """Retourne (total, estimé ?) selon le mode exact | estimate | none."""
+    if count == "none":
+        return None, False
+
+    if count == "estimate":
+        estimate = _estimate_count(query, db)
+        if estimate is not None:
+            return estimate, True
+
+    total = _count_cache.get(signature)
+    if total is None:
+        total = query.order_by(None).count()
+        _count_cache.set(signature, total)
+    return total, False
+
+
+def _filtered_notes_query(db: Session, current_user, search="", author="", equipe="", categorie="", priorite=""):
+    """
+    Requête de base commune à la liste, aux facettes et à l'export :
+    périmètre de l'utilisateur + filtres. Retourne (query, rank, signature)
+    où rank est l'expression de pertinence (ou None) et signature identifie
+    le filtre pour les caches.
+    """
     # ✅ En mode test -> ne filtre pas par utilisateur
     if os.getenv("TESTING") == "1":
+        scope = None
         query = db.query(Note)
     else:
         # En prod -> comportement normal filtré par utilisateur
+        scope = current_user.id
         query = db.query(Note).filter(Note.auteur_id == current_user.id)
 
-    # 🔍 Recherche
+    # 🔍 Recherche plein texte (repli ILIKE si le moteur n'est pas disponible)
+    rank = None
     if search:
-        query = query.filter(
-            Note.titre.ilike(f"%{search}%") |
-            Note.contenu.ilike(f"%{search}%")
-        )
+        fulltext = apply_fulltext_search(query, search, db.get_bind().dialect.name, Note.id)
+        if fulltext is not None:
+            query, rank = fulltext
+        else:
+            query = query.filter(
+                Note.titre.ilike(f"%{search}%") |
+                Note.contenu.ilike(f"%{search}%")
+            )
 
     # 👤 Filtre auteur
     if author:
         query = query.join(Note.auteur).filter(Utilisateur.nom.ilike(f"%{author}%"))
 
-    # 🕓 Tri
-    query = query.order_by(
-        Note.created_at.asc() if sort == "date_asc" else Note.created_at.desc()
+    # 🏷️ Filtres exacts (valeurs issues des facettes)
+    if equipe:
+        query = query.filter(Note.equipe == equipe)
+    if categorie:
+        query = query.filter(Note.categorie == categorie)
+    if priorite:
+        query = query.filter(Note.priorite == priorite)
+
+    signature = (scope, search, author, equipe, categorie, priorite)
+    return query, rank, signature
+
+
+def _summary_columns():
+    """Colonnes de la vue résumé (liste) ; le nombre de fichiers vient d'une sous-requête corrélée indexée."""
+    nb_fichiers = (
+        select(func.count(FichierNote.id))
+        .where(FichierNote.note_id == Note.id)
+        .correlate(Note)
+        .scalar_subquery()
+    )
+    return [
+        Note.id,
+        Note.titre,
+        func.substr(Note.contenu, 1, SUMMARY_EXCERPT_LENGTH).label("extrait"),
+        Note.equipe,
+        Note.categorie,
+        Note.priorite,
+        Note.likes,
+        Note.nb_vues,
+        Note.created_at,
+        Note.updated_at,
+        Note.auteur_id,
+        Utilisateur.nom.label("auteur_nom"),
+        nb_fichiers.label("nb_fichiers"),
+    ]
+
+
+def list_notes_service(
+    search, author, sort, page, limit, db: Session, current_user: Utilisateur,
+    cursor=None, count=None, view="full", equipe="", categorie="", priorite="",
+):
+    """
+    Liste paginée des notes.
+    - Mode page (défaut) : OFFSET + total exact (paginateur Angular)
+    - Mode curseur (cursor fourni, "" pour la première page) : keyset sur
+      (created_at, id), coût O(limit) quelle que soit la profondeur,
+      sans COUNT ; renvoie next_cursor (None en fin de liste)
+    - count : exact (mis en cache par filtre) | estimate (statistiques du
+      planificateur, hors recherche textuelle) | none
+    - view : full (NoteOut) | summary (NoteSummaryOut, colonnes de liste)
+    """
+    use_cursor = cursor is not None
+    if count is None:
+        count = "none" if use_cursor else "exact"
+    if count == "estimate" and search:
+        count = "exact"  # estimation peu fiable sur un filtre plein texte
+    if use_cursor and sort == "relevance":
+        raise HTTPException(status_code=400, detail="Le tri par pertinence n'est pas disponible en mode curseur")
+
+    query, rank, signature = _filtered_notes_query(
+        db, current_user, search=search, author=author, equipe=equipe, categorie=categorie, priorite=priorite
     )
 
-    total = query.count()
+    # 🕓 Tri (id départage les notes créées à la même seconde)
+    if sort == "relevance" and rank is not None:
+        query = query.order_by(rank, Note.created_at.desc(), Note.id.desc())
+    elif sort == "date_asc":
+        query = query.order_by(Note.created_at.asc(), Note.id.asc())
+    else:
+        query = query.order_by(Note.created_at.desc(), Note.id.desc())
 
-    notes = (
-        query.options(joinedload(Note.auteur), joinedload(Note.fichiers))
-        .offset((page - 1) * limit)
-        .limit(limit)
-        .all()
-    )
+    total, estimated = _count_notes(query, count, signature, db)
+
+    if use_cursor and cursor:
+        query = _apply_keyset(query, cursor, "date_asc" if sort == "date_asc" else "date_desc")
+
+    # 🪶 Vue résumé : projection de colonnes, sans hydratation ORM ni jointure sur les fichiers
+    if view == "summary":
+        if not author:
+            query = query.outerjoin(Note.auteur)
+        query = query.with_entities(*_summary_columns())
+    else:
+        query = query.options(joinedload(Note.auteur), joinedload(Note.fichiers))
+
+    # ⏩ Mode curseur
+    if use_cursor:
+        rows = query.limit(limit + 1).all()
+        notes = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = _encode_cursor(notes[-1], "date_asc" if sort == "date_asc" else "date_desc")
+        return {
+            "total": total,
+            "total_estimated": estimated,
+            "page": page,
+            "limit": limit,
+            "notes": notes,
+            "next_cursor": next_cursor,
+        }
+
+    notes = query.offset((page - 1) * limit).limit(limit).all()
 
     return {
         "total": total,
+        "total_estimated": estimated,
         "page": page,
         "limit": limit,
         "notes": notes
     }
 
 
+# ---------------- FACETTES ----------------
+FACETS = ("equipe", "categorie", "priorite", "auteur")
+
+
+def _facet_rows_grouping_sets(db: Session, base):
+    """PostgreSQL : toutes les facettes en un seul GROUP BY GROUPING SETS."""
+    stmt = select(
+        base.c.equipe,
+        base.c.categorie,
+        base.c.priorite,
+        base.c.auteur_id,
+        base.c.auteur_nom,
+        func.count().label("total"),
+        func.grouping(base.c.equipe).label("g_equipe"),
+        func.grouping(base.c.categorie).label("g_categorie"),
+        func.grouping(base.c.priorite).label("g_priorite"),
+    ).group_by(
+        func.grouping_sets(
+            tuple_(base.c.equipe),
+            tuple_(base.c.categorie),
+            tuple_(base.c.priorite),
+            tuple_(base.c.auteur_id, base.c.auteur_nom),
+        )
+    )
+    for row in db.execute(stmt):
+        if row.g_equipe == 0:
+            yield "equipe", row.equipe, row.equipe, row.total
+        elif row.g_categorie == 0:
+            yield "categorie", row.categorie, row.categorie, row.total
+        elif row.g_priorite == 0:
+            yield "priorite", row.priorite, row.priorite, row.total
+        else:
+            yield "auteur", row.auteur_id, row.auteur_nom, row.total
+
+
+def _facet_rows_union_all(db: Session, base):
+    """Repli (SQLite…) : un GROUP BY par facette réunis par UNION ALL, en une requête."""
+    parts = [
+        select(literal(name).label("facet"), col.label("valeur"), col.label("libelle"), func.count().label("total")).group_by(col)
+        for name, col in (("equipe", base.c.equipe), ("categorie", base.c.categorie), ("priorite", base.c.priorite))
+    ]
+    parts.append(
+        select(
+            literal("auteur").label("facet"),
+            base.c.auteur_id.label("valeur"),
+            func.max(base.c.auteur_nom).label("libelle"),
+            func.count().label("total"),
+        ).group_by(base.c.auteur_id)
+    )
+    for row in db.execute(union_all(*parts)):
+        yield row.facet, row.valeur, row.libelle, row.total
+
+
+def note_facets_service(db: Session, current_user, search="", author="", equipe="", categorie="", priorite=""):
+    """
+    Comptes par équipe, catégorie, priorité et auteur pour un filtre donné,
+    calculés en une requête groupée et mis en cache quelques secondes
+    (clé = filtre + périmètre de l'utilisateur).
+    """
+    query, _, signature = _filtered_notes_query(
+        db, current_user, search=search, author=author, equipe=equipe, categorie=categorie, priorite=priorite
+    )
+    cached = _facets_cache.get(signature)
+    if cached is not None:
+        return cached
+
+    if not author:
+        query = query.outerjoin(Note.auteur)
+    base = query.with_entities(
+        Note.equipe, Note.categorie, Note.priorite, Note.auteur_id, Utilisateur.nom.label("auteur_nom")
+    ).cte("notes_filtrees")
+
+    if db.get_bind().dialect.name == "postgresql":
+        rows = _facet_rows_grouping_sets(db, base)
+    else:
+        rows = _facet_rows_union_all(db, base)
+
+    facets = {name: [] for name in FACETS}
+    for facet, valeur, libelle, total in rows:
+        facets[facet].append({"valeur": valeur, "libelle": libelle, "total": total})
+    for values in facets.values():
+        values.sort(key=lambda v: (-v["total"], str(v["libelle"] or "")))
+
+    _facets_cache.set(signature, facets)
+    return facets
+
+
+# ---------------- EXPORT ----------------
+EXPORT_COLUMNS = [
+    "id", "titre", "contenu", "equipe", "categorie", "priorite", "likes", "nb_vues",
+    "created_at", "updated_at", "auteur_id", "auteur_nom", "nb_fichiers",
+]
+
+
+def _iter_export_rows(bind, current_user, sort, filters):
+    """
+    Parcourt les notes filtrées via un curseur côté serveur (yield_per) :
+    la mémoire reste constante quel que soit le volume. Les noms d'auteurs
+    et nombres de fichiers sont chargés par lot (IN sur les ids du lot).
+    Utilise sa propre session : la réponse est envoyée après la fin de la
+    requête HTTP.
+    """
+    with Session(bind=bind) as db:
+        query, _, _ = _filtered_notes_query(db, current_user, **filters)
+        query = query.order_by(
+            *((Note.created_at.asc(), Note.id.asc()) if sort == "date_asc" else (Note.created_at.desc(), Note.id.desc()))
+        )
+        stmt = query.with_entities(
+            Note.id, Note.titre, Note.contenu, Note.equipe, Note.categorie, Note.priorite,
+            Note.likes, Note.nb_vues, Note.created_at, Note.updated_at, Note.auteur_id,
+        ).statement
+
+        auteurs = {}
+        result = db.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for batch in result.partitions():
+            note_ids = [row.id for row in batch]
+            nb_fichiers = dict(
+                db.query(FichierNote.note_id, func.count(FichierNote.id))
+                .filter(FichierNote.note_id.in_(note_ids))
+                .group_by(FichierNote.note_id)
+                .all()
+            )
+            inconnus = {row.auteur_id for row in batch} - auteurs.keys()
+            if inconnus:
+                auteurs.update(
+                    db.query(Utilisateur.id, Utilisateur.nom).filter(Utilisateur.id.in_(inconnus)).all()
+                )
+            for row in batch:
+                yield {
+                    **row._asdict(),
+                    "auteur_nom": auteurs.get(row.auteur_id),
+                    "nb_fichiers": nb_fichiers.get(row.id, 0),
+                }
+
+
+def _ndjson_chunks(rows):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(row, default=str, ensure_ascii=False))
+        if len(lines) >= EXPORT_BATCH_SIZE:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def _csv_chunks(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for i, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if i % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def export_notes_service(fmt: str, sort: str, db: Session, current_user, **filters):
+    """Export en flux (NDJSON ou CSV) des notes correspondant aux filtres de la liste."""
+    rows = _iter_export_rows(db.get_bind(), current_user, sort, filters)
+    if fmt == "csv":
+        return StreamingResponse(
+            _csv_chunks(rows),
+            media_type="text/csv; charset=utf-8",
+            headers={"Content-Disposition": 'attachment; filename="notes.csv"'},
+        )
+    return StreamingResponse(
+        _ndjson_chunks(rows),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="notes.ndjson"'},
+    )
+
+
 # ---------------- DETAIL ----------------
 def get_note_detail_service(note_id: int, db: Session):
     note = (
@@ -99,17 +574,13 @@ def get_note_detail_service(note_id: int, db: Session):
     if not note:
         raise HTTPException(status_code=404, detail="Note non trouvée")
 
-    if not note.resume_ia and note.contenu and len(note.contenu) > 100:
-        try:
-            note.resume_ia = generate_summary(note.contenu)
-            db.commit()
-            db.refresh(note)
-        except Exception:
-            db.rollback()
+    # 🧠 Lecture seule : le résumé manquant est mis en file, jamais calculé ici
+    note.resume_status = summary_status(note)
+    if note.resume_status == RESUME_PENDING:
+        enqueue_summary(db.get_bind(), note.id, note.contenu)
 
-    note.nb_vues = (note.nb_vues or 0) + 1
-    db.commit()
-    db.refresh(note)
+    # 👁️ Vue comptée en mémoire, reportée en base par lots (services/vues.py)
+    view_counter.record(db.get_bind(), note.id)
     return note
 
 # ---------------- UPDATE ----------------
@@ -118,21 +589,38 @@ async def update_note_service(note_id, titre, contenu, equipe, categorie, priori
     if not note:
         raise HTTPException(status_code=404, detail="Note non trouvée")
 
+    # 📎 Hachage / envoi en flux hors de la boucle d'événements
+    stockes = await run_in_threadpool(store_blobs, db, fichiers)
+
+    # 🔹 Changement de contenu détecté par empreinte (sans relire l'ancien texte)
+    digest = content_hash(contenu)
+    contenu_modifie = digest != note.contenu_hash
+    texte_modifie = contenu_modifie or note.titre != titre
     note.titre = titre
     note.contenu = contenu
+    if contenu_modifie:
+        note.contenu_hash = digest
+        note.resume_ia = cached_summary(digest)  # sinon recalculé en arrière-plan
+    if equipe and equipe != note.equipe:
+        # 📊 La note et son activité changent d'équipe dans les statistiques
+        record_note_history(db, note, note.equipe, -1)
+        record_note_history(db, note, equipe, 1)
     note.equipe = equipe or note.equipe
     note.categorie = categorie or note.categorie
     note.priorite = priorite or note.priorite
 
-    for f in fichiers:
-        file_location = f"uploads/{f.filename}"
-        with open(file_location, "wb") as buffer:
-            buffer.write(await f.read())
-        new_file = FichierNote(nom_fichier=f.filename, chemin=file_location, note_id=note.id)
-        db.add(new_file)
+    for fichier in stockes:
+        db.add(FichierNote(**fichier, note_id=note.id))
 
     db.commit()
     db.refresh(note)
+    _enqueue_previews(stockes)
+    if contenu_modifie and not note.resume_ia:
+        enqueue_summary(db.get_bind(), note.id, note.contenu)
+    if texte_modifie:
+        related_index.upsert(note.id, note.titre, note.contenu)
+        duplicate_index.upsert(note.id, note.titre, note.contenu)
+    invalidate_notes_cache()
     return note
 
 # ---------------- DELETE ----------------
@@ -140,19 +628,142 @@ def delete_note_service(note_id: int, db: Session):
     note = db.query(Note).filter(Note.id == note_id).first()
     if not note:
         raise HTTPException(status_code=404, detail="Note non trouvée")
+    record_note_history(db, note, note.equipe, -1)
+    release_blobs(db, [sha256 for (sha256,) in db.query(FichierNote.sha256).filter(FichierNote.note_id == note_id)])
     db.delete(note)
     db.commit()
+    related_index.remove(note_id)
+    duplicate_index.remove(note_id)
+    invalidate_notes_cache()
     return None
 
+# ---------------- DOUBLONS (ADMIN) ----------------
+def duplicate_clusters_service(db: Session, current_user, seuil: Optional[float] = None):
+    """Groupes de quasi-doublons sur tout le corpus (une passe sur l'index LSH)."""
+    user_type = current_user.get("type") if isinstance(current_user, dict) else current_user.type
+    if (user_type or "").lower() != "admin":
+        raise HTTPException(status_code=403, detail="Action réservée aux administrateurs.")
+
+    seuil = seuil or settings.DUPLICATE_THRESHOLD
+    if not duplicate_index.ready:
+        duplicate_index.build(db.get_bind())
+    clusters = duplicate_index.clusters(seuil)
+
+    ids = [note_id for cluster in clusters for note_id in cluster]
+    rows = {}
+    if ids:
+        query = db.query(Note.id, Note.titre, Note.equipe, Note.created_at).filter(Note.id.in_(ids))
+        rows = {row.id: row._asdict() for row in query}
+    return {
+        "seuil": seuil,
+        "clusters": [
+            {"taille": len(notes), "notes": notes}
+            for notes in ([rows[i] for i in cluster if i in rows] for cluster in clusters)
+            if len(notes) > 1
+        ],
+    }
+
+# ---------------- NOTES SIMILAIRES ----------------
+def related_notes_service(note_id: int, k: int, db: Session):
+    """
+    Notes les plus proches (cosinus TF-IDF sur titre + contenu),
+    servies par l'index en mémoire (services/related.py).
+    """
+    if not db.query(exists().where(Note.id == note_id)).scalar():
+        raise HTTPException(status_code=404, detail="Note non trouvée")
+
+    if not related_index.ready:
+        related_index.build(db.get_bind())
+
+    scores = dict(related_index.related(note_id, k))
+    if not scores:
+        return []
+    rows = (
+        db.query(Note.id, Note.titre, Note.equipe, Note.categorie, Note.priorite, Note.created_at, Note.auteur_id)
+        .filter(Note.id.in_(scores))
+        .all()
+    )
+    # Ordre de l'index (score décroissant) ; notes supprimées entre-temps ignorées
+    related = [{**row._asdict(), "score": scores[row.id]} for row in rows]
+    return sorted(related, key=lambda r: -r["score"])
+
 # ---------------- LIKE ----------------
-def like_note_service(note_id: int, db: Session):
-    note = db.query(Note).filter(Note.id == note_id).first()
-    if not note:
+def _current_likes(note_id: int, db: Session):
+    row = db.execute(select(Note.likes).where(Note.id == note_id)).first()
+    if row is None:
+        db.rollback()
         raise HTTPException(status_code=404, detail="Note non trouvée")
-    note.likes = (note.likes or 0) + 1
+    return row.likes
+
+
+def like_note_service(note_id: int, db: Session, current_user):
+    """
+    Like idempotent : la ligne note_likes (clé note_id, user_id) est insérée
+    si absente, et le compteur n'est incrémenté que dans ce cas, par un
+    UPDATE ... RETURNING atomique (pas de lecture-modification en Python).
+    """
+    user_id = current_user.get("id") if isinstance(current_user, dict) else current_user.id
+    insert = dialect_insert(db.get_bind())
+
+    inserted = db.execute(
+        insert(NoteLike)
+        .from_select(
+            ["note_id", "user_id"],
+            select(literal(note_id), literal(user_id)).where(exists().where(Note.id == note_id)),
+        )
+        .on_conflict_do_nothing()
+        .returning(NoteLike.created_at)
+    ).first()
+
+    if inserted:
+        likes = db.execute(
+            update(Note)
+            .where(Note.id == note_id)
+            .values(likes=func.coalesce(Note.likes, 0) + 1)
+            .returning(Note.likes)
+        ).scalar()
+        # pondéré à la date enregistrée du like : un retrait ultérieur l'annule exactement
+        record_trending(db, [(note_id, "like", 1)], at=inserted.created_at)
+        record_stats(
+            db, [(db.query(Note.equipe).filter(Note.id == note_id).scalar(), None, {"likes": 1})],
+            jour=_as_date(inserted.created_at),
+        )
+    else:
+        likes = _current_likes(note_id, db)
+
     db.commit()
-    db.refresh(note)
-    return {"likes": note.likes}
+    return {"likes": likes or 0, "liked": True}
+
+
+def unlike_note_service(note_id: int, db: Session, current_user):
+    """Retrait idempotent du like de l'utilisateur courant."""
+    user_id = current_user.get("id") if isinstance(current_user, dict) else current_user.id
+
+    deleted = db.execute(
+        delete(NoteLike).where(NoteLike.note_id == note_id, NoteLike.user_id == user_id)
+        .returning(NoteLike.created_at)
+    ).first()
+
+    if deleted:
+        liked_at = deleted.created_at
+        likes = db.execute(
+            update(Note)
+            .where(Note.id == note_id)
+            .values(likes=case((Note.likes > 0, Note.likes - 1), else_=0))
+            .returning(Note.likes)
+        ).scalar()
+        # retire exactement le poids ajouté par le like (pondéré à sa date)
+        record_trending(db, [(note_id, "like", -1)], at=liked_at)
+        # retiré du jour du like (comme rebuild_stats, qui compte les likes par created_at)
+        record_stats(
+            db, [(db.query(Note.equipe).filter(Note.id == note_id).scalar(), None, {"likes": -1})],
+            jour=_as_date(liked_at),
+        )
+    else:
+        likes = _current_likes(note_id, db)
+
+    db.commit()
+    return {"likes": likes or 0, "liked": False}
 
 # ---------------- COMMENTAIRES ----------------
 def get_commentaires_service(note_id: int, db: Session):
@@ -177,18 +788,49 @@ def add_commentaire_service(note_id: int, commentaire: CommentaireCreate, db: Se
         note_id=note_id
     )
     db.add(new_comment)
+    record_trending(db, [(note_id, "comment", 1)])
+    record_stats(db, [(note.equipe, commentaire.auteur_id, {"commentaires": 1})])
+    db.flush()
+    fan_out_commentaire(db, new_comment.id, note.equipe)
     db.commit()
     db.refresh(new_comment)
     return CommentaireOut.model_validate(new_comment)
 
+# ---------------- TÉLÉCHARGEMENT DE FICHIER ----------------
+def download_file_service(
+    file_id: int, db: Session, if_none_match: str = None, version: str = None, size: int = None, accept: str = None
+):
+    fichier = db.query(FichierNote).filter(FichierNote.id == file_id).first()
+    if not fichier:
+        raise HTTPException(status_code=404, detail="Fichier non trouvé")
+    if not size:
+        return download_response(
+            fichier.chemin, fichier.sha256, filename=fichier.nom_fichier, if_none_match=if_none_match, version=version
+        )
+
+    # 🖼️ Aperçu réduit (généré à la première demande s'il manque)
+    chemin, size, ext = variant_for(fichier.chemin, APERCU, size, accept)
+    suffix = f"~{size}.{ext}"  # ETag / version propres à chaque variante du contenu
+    return download_response(
+        chemin,
+        fichier.sha256 + suffix if fichier.sha256 else None,
+        filename=f"{os.path.splitext(fichier.nom_fichier)[0]}-{size}.{ext}",
+        if_none_match=if_none_match,
+        version=version + suffix if version else None,
+        headers={"Vary": "Accept"},
+    )
+
 # ---------------- SUPPRESSION DE FICHIER ----------------
 def delete_file_service(file_id: int, db: Session):
     fichier = db.query(FichierNote).filter(FichierNote.id == file_id).first()
     if not fichier:
         raise HTTPException(status_code=404, detail="Fichier non trouvé")
 
-    if os.path.exists(fichier.chemin):
-        os.remove(fichier.chemin)
+    if fichier.sha256:
+        # 🔢 Contenu partagé : seule la référence est retirée
+        release_blobs(db, [fichier.sha256])
+    else:
+        get_storage().delete(fichier.chemin)
 
     db.delete(fichier)
     db.commit()
@@ -0,0 +1,291 @@
+# app/services/related.py
+# =====================================================
+# Notes similaires : index TF-IDF en mémoire (SciPy sparse)
+# sur titre + contenu, avec hachage des termes (dimension
+# fixe, pas de vocabulaire à maintenir).
+# - construit au démarrage ou rechargé depuis un instantané
+# - mis à jour à chaque création / modification / suppression
+#   du worker, et rattrapé périodiquement sur la base
+#   (écritures des autres workers)
+# - requête : cosinus vectorisé (W @ q) puis top-k argpartition
+# =====================================================
+
+import os
+import re
+import threading
+import zlib
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+import numpy as np
+import scipy.sparse as sp
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app.models.note import Note
+from app.services.some_ai_module import FRENCH_STOPWORDS
+
+N_FEATURES = 2 ** 18
+TITLE_WEIGHT = 2            # le titre compte double
+IDF_REFRESH_RATIO = 0.1     # IDF recalculé quand le corpus a varié de 10 %
+COMPACT_RATIO = 0.25        # lignes supprimées tolérées avant compactage
+BUILD_BATCH = 2000
+CATCH_UP_OVERLAP = timedelta(minutes=1)  # modifications validées après leur horodatage
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+# -------------------------------------------------------
+# 🔹 Vectorisation
+# -------------------------------------------------------
+@lru_cache(maxsize=200_000)
+def _feature(term: str) -> int:
+    # crc32 : stable d'un processus à l'autre (instantané réutilisable)
+    return zlib.crc32(term.encode("utf-8")) % N_FEATURES
+
+
+def note_features(titre, contenu):
+    """Retourne (indices, tf sous-linéaire) du texte de la note."""
+    counts = {}
+    for text, weight in ((titre, TITLE_WEIGHT), (contenu, 1)):
+        for word in _WORD_RE.findall((text or "").lower()):
+            if len(word) > 1 and word not in FRENCH_STOPWORDS:
+                f = _feature(word)
+                counts[f] = counts.get(f, 0) + weight
+    indices = np.fromiter(counts.keys(), dtype=np.int32, count=len(counts))
+    values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    order = np.argsort(indices)
+    return indices[order], (1.0 + np.log(values[order])).astype(np.float32)
+
+
+def _rows_to_csr(rows):
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(idx) for idx, _ in rows])
+    indices = np.concatenate([idx for idx, _ in rows]) if rows else np.zeros(0, dtype=np.int32)
+    data = np.concatenate([val for _, val in rows]) if rows else np.zeros(0, dtype=np.float32)
+    return sp.csr_matrix((data, indices, indptr), shape=(len(rows), N_FEATURES), dtype=np.float32)
+
+
+def _normalize_rows(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sp.diags(1.0 / norms).astype(np.float32) @ matrix
+
+
+# -------------------------------------------------------
+# 🧠 Index
+# -------------------------------------------------------
+class RelatedNotesIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.ready = False
+            self.ids = []                 # ligne → id de note
+            self.row_of = {}              # id de note → ligne vivante
+            self.alive = np.zeros(0, dtype=bool)
+            self.df = np.zeros(N_FEATURES, dtype=np.int32)
+            self.n_docs = 0
+            self._tf = _rows_to_csr([])   # tf sous-linéaire des lignes matérialisées
+            self._weighted = self._tf     # tf-idf normalisé (cosinus = produit scalaire)
+            self._pending = []            # lignes ajoutées, pas encore matérialisées
+            self._idf = np.ones(N_FEATURES, dtype=np.float32)
+            self._idf_docs = 0
+            self.indexed_until = None     # horodatage du dernier instantané / build
+
+    # ---------------- Mises à jour incrémentales ----------------
+    def upsert(self, note_id: int, titre, contenu):
+        with self._lock:
+            if not self.ready:
+                return  # le prochain build inclura la note
+            self._remove(note_id)
+            indices, values = note_features(titre, contenu)
+            self.row_of[note_id] = len(self.ids)
+            self.ids.append(note_id)
+            self._pending.append((indices, values))
+            self.alive = np.append(self.alive, True)
+            self.df[indices] += 1
+            self.n_docs += 1
+
+    def remove(self, note_id: int):
+        with self._lock:
+            if self.ready:
+                self._remove(note_id)
+
+    def _remove(self, note_id: int):
+        row = self.row_of.pop(note_id, None)
+        if row is None:
+            return
+        materialized = self._tf.shape[0]
+        if row < materialized:
+            indices = self._tf.indices[self._tf.indptr[row]:self._tf.indptr[row + 1]]
+        else:
+            indices = self._pending[row - materialized][0]
+        self.df[indices] -= 1
+        self.alive[row] = False
+        self.n_docs -= 1
+
+    # ---------------- Matérialisation ----------------
+    def _compute_idf(self):
+        self._idf = (np.log((1.0 + self.n_docs) / (1.0 + self.df)) + 1.0).astype(np.float32)
+        self._idf_docs = self.n_docs
+
+    def _materialize(self):
+        if self.alive.size and (~self.alive).sum() > COMPACT_RATIO * self.alive.size:
+            self._compact()
+        if not self._pending:
+            return
+        new_tf = _rows_to_csr(self._pending)
+        self._pending = []
+        self._tf = sp.vstack([self._tf, new_tf], format="csr")
+        drift = abs(self.n_docs - self._idf_docs) / max(self._idf_docs, 1)
+        if drift > IDF_REFRESH_RATIO:
+            # 🔄 IDF périmé → repondération complète (vectorisée, O(nnz))
+            self._compute_idf()
+            self._weighted = _normalize_rows(self._tf @ sp.diags(self._idf))
+        else:
+            new_weighted = _normalize_rows(new_tf @ sp.diags(self._idf))
+            self._weighted = sp.vstack([self._weighted, new_weighted], format="csr")
+
+    def _compact(self):
+        """Retire les lignes supprimées / remplacées."""
+        materialized = self._tf.shape[0]
+        keep = np.flatnonzero(self.alive[:materialized])
+        pending = [row for i, row in enumerate(self._pending) if self.alive[materialized + i]]
+        pending_ids = [self.ids[materialized + i] for i in range(len(self._pending)) if self.alive[materialized + i]]
+        self._tf = self._tf[keep]
+        self._weighted = self._weighted[keep]
+        self.ids = [self.ids[i] for i in keep] + pending_ids
+        self._pending = pending
+        self.alive = np.ones(len(self.ids), dtype=bool)
+        self.row_of = {note_id: row for row, note_id in enumerate(self.ids)}
+
+    # ---------------- Requête ----------------
+    def related(self, note_id: int, k: int = 10):
+        """Retourne [(id, score)] des k notes les plus proches (cosinus TF-IDF)."""
+        with self._lock:
+            self._materialize()
+            row = self.row_of.get(note_id)
+            if row is None:
+                return []
+            weighted, ids, alive = self._weighted, self.ids, self.alive.copy()
+
+        # Vecteur requête dense → un seul produit matrice-vecteur CSR
+        # (le produit creux x creux est ~10x plus lent)
+        query = np.zeros(N_FEATURES, dtype=np.float32)
+        start, end = weighted.indptr[row], weighted.indptr[row + 1]
+        query[weighted.indices[start:end]] = weighted.data[start:end]
+        scores = weighted @ query
+        scores[~alive] = 0.0
+        scores[row] = 0.0
+        k = min(k, int((scores > 0).sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(ids[i], float(scores[i])) for i in top]
+
+    # ---------------- Construction / instantané ----------------
+    def build(self, bind):
+        """Indexe toutes les notes (parcours par lots, sans charger les objets ORM)."""
+        rows, ids = [], []
+        with Session(bind=bind) as db:
+            indexed_until = db.query(func.max(func.coalesce(Note.updated_at, Note.created_at))).scalar()
+            query = db.query(Note.id, Note.titre, Note.contenu).order_by(Note.id).yield_per(BUILD_BATCH)
+            for note_id, titre, contenu in query:
+                ids.append(note_id)
+                rows.append(note_features(titre, contenu))
+        with self._lock:
+            self.reset()
+            self._load_rows(ids, _rows_to_csr(rows))
+            self.indexed_until = indexed_until
+            self.ready = True
+
+    def _load_rows(self, ids, tf):
+        self.ids = list(ids)
+        self.row_of = {note_id: row for row, note_id in enumerate(self.ids)}
+        self.alive = np.ones(len(self.ids), dtype=bool)
+        self._tf = tf
+        self.df = np.bincount(tf.indices, minlength=N_FEATURES).astype(np.int32)
+        self.n_docs = len(self.ids)
+        self._compute_idf()
+        self._weighted = _normalize_rows(tf @ sp.diags(self._idf))
+
+    def save(self, path: str):
+        with self._lock:
+            if not path or not self.ready:
+                return
+            self._materialize()
+            self._compact()
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            tmp = f"{path}.tmp.npz"
+            np.savez_compressed(
+                tmp,
+                ids=np.asarray(self.ids, dtype=np.int64),
+                data=self._tf.data, indices=self._tf.indices, indptr=self._tf.indptr,
+                indexed_until=np.asarray(self.indexed_until.isoformat() if self.indexed_until else ""),
+            )
+            os.replace(tmp, path)
+
+    def load(self, path: str, bind) -> bool:
+        """
+        Recharge un instantané puis rattrape la base (voir catch_up).
+        """
+        if not path or not os.path.exists(path):
+            return False
+        with np.load(path) as snap:
+            ids = snap["ids"].tolist()
+            tf = sp.csr_matrix((snap["data"], snap["indices"], snap["indptr"]), shape=(len(ids), N_FEATURES))
+            indexed_until = str(snap["indexed_until"]) or None
+        with self._lock:
+            self.reset()
+            self._load_rows(ids, tf)
+            self.indexed_until = datetime.fromisoformat(indexed_until) if indexed_until else None
+            self.ready = True
+        self.catch_up(bind)
+        return True
+
+    def catch_up(self, bind):
+        """
+        Rattrape la base : notes supprimées, absentes de l'index et
+        modifiées depuis indexed_until. Appelé au rechargement d'un
+        instantané puis périodiquement : chaque worker a son propre
+        index, mis à jour en direct par ses seules écritures.
+        """
+        with self._lock:
+            if not self.ready:
+                return
+            known, indexed_until = set(self.row_of), self.indexed_until
+
+        with Session(bind=bind) as db:
+            last_change = db.query(func.max(func.coalesce(Note.updated_at, Note.created_at))).scalar()
+            live = {note_id for (note_id,) in db.query(Note.id)}
+            for note_id in known - live:
+                self.remove(note_id)
+            # Ids croissants : les nouvelles notes sont après le plus grand id connu ;
+            # en deçà, celles absentes de l'index (transaction validée plus tard)
+            last_id = max(known, default=0)
+            since = [Note.id > last_id]
+            missing = {note_id for note_id in live - known if note_id < last_id}
+            if missing:
+                since.append(Note.id.in_(missing))
+            if indexed_until:
+                since.append(Note.updated_at > indexed_until - CATCH_UP_OVERLAP)
+            changed = db.query(Note.id, Note.titre, Note.contenu).filter(or_(*since))
+            for note_id, titre, contenu in changed.yield_per(BUILD_BATCH):
+                self.upsert(note_id, titre, contenu)
+        with self._lock:
+            self.indexed_until = last_change
+
+    def load_or_build(self, path: str, bind):
+        try:
+            if self.load(path, bind):
+                return
+        except Exception as e:
+            print(f"⚠️ Instantané des notes similaires illisible, reconstruction : {e}")
+        self.build(bind)
+
+
+related_index = RelatedNotesIndex()
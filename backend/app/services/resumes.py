@@ -0,0 +1,185 @@
+# app/services/resumes.py
+# =====================================================
+# Génération des résumés (resume_ia) hors du chemin des
+# requêtes : les créations / modifications de notes
+# mettent la note en file, un pool de workers calcule
+# le résumé et l'écrit en base. Les lectures ne font
+# que lire resume_ia.
+#
+# Les résumés sont mis en cache par empreinte du contenu
+# normalisé (LRU mémoire + table note_summaries) : un
+# contenu identique n'est jamais résumé deux fois.
+# =====================================================
+
+import hashlib
+import re
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.cache import TTLCache
+from app.config import settings
+from app.db import dialect_insert
+from app.models.note import Note
+from app.models.resume import NoteSummary
+from app.services.some_ai_module import SUMMARY_ALGO_VERSION, generate_summaries
+
+# Seuil en dessous duquel une note n'a pas besoin de résumé
+SUMMARY_MIN_LENGTH = 100
+
+RESUME_READY = "ready"
+RESUME_PENDING = "pending"
+RESUME_NONE = "none"
+
+
+def needs_summary(contenu) -> bool:
+    return bool(contenu) and len(contenu) > SUMMARY_MIN_LENGTH
+
+
+def summary_status(note) -> str:
+    """ready : résumé disponible ; pending : en file / à calculer ; none : note trop courte."""
+    if note.resume_ia:
+        return RESUME_READY
+    return RESUME_PENDING if needs_summary(note.contenu) else RESUME_NONE
+
+
+# -------------------------------------------------------
+# 🔹 Cache des résumés par empreinte de contenu
+# -------------------------------------------------------
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Un résumé par empreinte ne change pas : seule la taille borne le cache
+_summary_cache = TTLCache(ttl=float("inf"), max_entries=settings.SUMMARY_CACHE_SIZE)
+
+
+def content_hash(contenu) -> str:
+    """SHA-256 du contenu normalisé (Unicode NFC, espaces réduits)."""
+    normalized = _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFC", contenu or "")).strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def cached_summary(digest: str):
+    """Résumé déjà connu en mémoire pour cette empreinte (sans accès base)."""
+    return _summary_cache.get((digest, SUMMARY_ALGO_VERSION))
+
+
+def get_or_create_summaries(db: Session, contenus, summarize=None):
+    """
+    Retourne [(empreinte, résumé)] dans l'ordre des contenus.
+    Ordre de recherche : LRU mémoire → table note_summaries (une requête IN)
+    → calcul par lot (generate_summaries, ou `summarize` fourni par
+    l'appelant) des seuls contenus inconnus.
+    """
+    digests = [content_hash(c) for c in contenus]
+    found = {}
+    for d in set(digests):
+        summary = cached_summary(d)
+        if summary is not None:
+            found[d] = summary
+
+    missing = set(digests) - found.keys()
+    if missing:
+        rows = db.query(NoteSummary.content_hash, NoteSummary.summary).filter(
+            NoteSummary.algo_version == SUMMARY_ALGO_VERSION,
+            NoteSummary.content_hash.in_(missing),
+        )
+        for d, summary in rows:
+            found[d] = summary
+            _summary_cache.set((d, SUMMARY_ALGO_VERSION), summary)
+
+    # 🧠 Contenus jamais résumés (dédupliqués dans le lot)
+    to_compute = {}
+    for d, contenu in zip(digests, contenus):
+        if d not in found:
+            to_compute.setdefault(d, contenu)
+    if to_compute:
+        summaries = (summarize or generate_summaries)(list(to_compute.values()))
+        values = [
+            {"content_hash": d, "algo_version": SUMMARY_ALGO_VERSION, "summary": summary}
+            for d, summary in zip(to_compute, summaries)
+        ]
+        stmt = dialect_insert(db.get_bind())(NoteSummary).on_conflict_do_nothing()
+        db.execute(stmt, values)
+        db.commit()
+        for row in values:
+            found[row["content_hash"]] = row["summary"]
+            _summary_cache.set((row["content_hash"], SUMMARY_ALGO_VERSION), row["summary"])
+
+    return [(d, found[d]) for d in digests]
+
+
+def clear_summary_cache():
+    _summary_cache.clear()
+
+
+def _summarize_note(bind, note_id: int):
+    with Session(bind=bind) as db:
+        contenu = db.query(Note.contenu).filter(Note.id == note_id).scalar()
+        if not needs_summary(contenu):
+            return
+        [(digest, resume)] = get_or_create_summaries(db, [contenu])
+        # N'écrit que si le contenu n'a pas changé entre-temps
+        db.execute(
+            update(Note)
+            .where(Note.id == note_id, Note.contenu == contenu)
+            .values(resume_ia=resume, contenu_hash=digest)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+
+class SummaryWorkerPool:
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor = None
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def enqueue(self, bind, note_id: int):
+        """Met la note en file (sans doublon si elle y est déjà)."""
+        with self._lock:
+            if note_id in self._in_flight:
+                return self._in_flight[note_id]
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="resume-ia")
+            future = self._executor.submit(self._run, bind, note_id)
+            self._in_flight[note_id] = future
+            return future
+
+    def _run(self, bind, note_id: int):
+        try:
+            _summarize_note(bind, note_id)
+        except Exception as e:
+            print(f"⚠️ Résumé de la note {note_id} impossible : {e}")
+        finally:
+            with self._lock:
+                self._in_flight.pop(note_id, None)
+
+    def is_queued(self, note_id: int) -> bool:
+        with self._lock:
+            return note_id in self._in_flight
+
+    def drain(self):
+        """Attend la fin des résumés en cours."""
+        with self._lock:
+            futures = list(self._in_flight.values())
+        for future in futures:
+            future.result()
+
+    def shutdown(self):
+        """Arrêt de l'application : termine la file puis libère les workers."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=True)
+
+
+summary_pool = SummaryWorkerPool(max_workers=settings.SUMMARY_WORKERS)
+
+
+def enqueue_summary(bind, note_id: int, contenu):
+    if needs_summary(contenu):
+        summary_pool.enqueue(bind, note_id)
@@ -1,16 +1,179 @@
 # some_ai_module.py
+# =====================================================
+# Résumé automatique extractif (hors ligne) :
+# TextRank sur le graphe des phrases, similarité cosinus
+# TF-IDF calculée avec NumPy, mots vides français ignorés.
+# generate_summaries() traite les notes par lots (matrices
+# empilées) pour amortir le coût de la vectorisation.
+# =====================================================
+
+import re
 from textwrap import shorten
 
+import numpy as np
+
+SUMMARY_ALGO_VERSION = 2    # à incrémenter si l'algorithme change (invalide le cache)
+SUMMARY_PREFIX = "Résumé automatique : "
+SUMMARY_MAX_CHARS = 300     # longueur visée du résumé
+SUMMARY_MAX_SENTENCES = 3
+MAX_SENTENCES = 200         # phrases analysées au plus par note
+DAMPING = 0.85
+MAX_ITERATIONS = 50
+TOLERANCE = 1e-6
+BATCH_BUDGET = 4_000_000    # cellules (notes x phrases x termes) par lot
+
+FRENCH_STOPWORDS = frozenset("""
+a à afin ai aie aient aies ait alors as au aucun aucune aupres auquel aura aurai auraient aurais aurait
+auras aurez auriez aurions aurons auront aussi autre autres aux auxquelles auxquels avaient avais avait
+avant avec avez aviez avions avoir avons ayant ayez ayons bon c ça car ce ceci cela celle celles celui
+cependant certain certaine certaines certains ces cet cette ceux chacun chacune chaque chez ci comme
+comment d dans de depuis des desquelles desquels dessous dessus deux donc dont du duquel durant elle
+elles en encore entre es est et étaient étais était étant été êtes étiez étions être eu eue eues eûmes
+eurent eus eut eux fait faire fois font furent fus fut il ils j je jusqu jusque l la là laquelle le
+lequel les lesquelles lesquels leur leurs lorsque lui m ma mais me même mêmes mes moi moins mon n ne
+ni non nos notre nous on ont or ou où par parce pas peu peut plus pour pourquoi puis qu quand que quel
+quelle quelles quels qui quoi s sa sans se sera serai seraient serais serait seras serez seriez serions
+serons seront ses si sien soi soient sois soit sommes son sont sous soyez soyons suis sur t ta te tes
+toi ton tous tout toute toutes très tu un une vers voici voilà vos votre vous y
+""".split())
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?…])\s+|\n+")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+# -------------------------------------------------------
+# 🔹 Découpage
+# -------------------------------------------------------
+def _split_sentences(text: str):
+    sentences = [s.strip() for s in _SENTENCE_RE.split(text)]
+    return [s for s in sentences if s][:MAX_SENTENCES]
+
+
+def _terms(sentence: str):
+    return [w for w in _WORD_RE.findall(sentence.lower()) if len(w) > 1 and w not in FRENCH_STOPWORDS]
+
+
+def _format(sentences):
+    return SUMMARY_PREFIX + shorten(" ".join(sentences), width=SUMMARY_MAX_CHARS, placeholder="...")
+
+
+# -------------------------------------------------------
+# 🔹 TextRank vectorisé (un lot de notes de tailles voisines)
+# -------------------------------------------------------
+def _rank_batch(docs):
+    """
+    docs : liste de (nb_phrases, ids_phrase, ids_terme) pour un lot.
+    Retourne une matrice (notes x phrases) de scores TextRank.
+    """
+    n_docs = len(docs)
+    n_sent = max(d[0] for d in docs)
+
+    # 🔹 Vocabulaire local au lot → matrice dense (notes, phrases, termes)
+    uniques, local_terms = np.unique(np.concatenate([d[2] for d in docs]), return_inverse=True)
+    doc_ids = np.repeat(np.arange(n_docs), [len(d[2]) for d in docs])
+    sent_ids = np.concatenate([d[1] for d in docs])
+    flat = (doc_ids * n_sent + sent_ids) * len(uniques) + local_terms
+    counts = np.bincount(flat, minlength=n_docs * n_sent * len(uniques))
+    counts = counts.reshape(n_docs, n_sent, len(uniques)).astype(np.float32)
+
+    # 🔹 TF-IDF (chaque phrase est un document de la note)
+    sizes = np.array([d[0] for d in docs], dtype=np.float32)[:, None]
+    df = (counts > 0).sum(axis=1)
+    idf = np.log((1.0 + sizes) / (1.0 + df)) + 1.0
+    weights = counts * idf[:, None, :]
+    norms = np.linalg.norm(weights, axis=2, keepdims=True)
+    weights /= np.where(norms == 0, 1.0, norms)
+
+    # 🔹 Graphe des phrases : similarité cosinus, sans boucles
+    sim = weights @ weights.transpose(0, 2, 1)
+    diag = np.arange(n_sent)
+    sim[:, diag, diag] = 0.0
+    valid = np.arange(n_sent)[None, :] < sizes  # masque du bourrage
+    sim *= valid[:, :, None] & valid[:, None, :]
+
+    # 🔹 PageRank (itération de la puissance, toutes les notes à la fois)
+    out_weight = sim.sum(axis=2, keepdims=True)
+    transition = np.where(out_weight > 0, sim / np.where(out_weight == 0, 1.0, out_weight), 0.0)
+    teleport = valid / sizes
+    scores = teleport.copy()
+    for _ in range(MAX_ITERATIONS):
+        updated = (1 - DAMPING) * teleport + DAMPING * np.einsum("bij,bi->bj", transition, scores)
+        converged = np.abs(updated - scores).max() < TOLERANCE
+        scores = updated
+        if converged:
+            break
+    return np.where(valid, scores, -np.inf)
+
+
+def _select(sentences, scores):
+    """Meilleures phrases jusqu'à la longueur visée, remises dans l'ordre du texte."""
+    chosen, length = [], 0
+    # Arrondi : les égalités ne dépendent pas du bourrage du lot
+    ranked = np.round(scores[:len(sentences)], 6)
+    for idx in np.argsort(-ranked, kind="stable"):
+        chosen.append(idx)
+        length += len(sentences[idx])
+        if length >= SUMMARY_MAX_CHARS or len(chosen) >= SUMMARY_MAX_SENTENCES:
+            break
+    return [sentences[i] for i in sorted(chosen)]
+
+
+# -------------------------------------------------------
+# 🧠 API
+# -------------------------------------------------------
+def generate_summaries(texts):
+    """
+    Résume une liste de textes (même ordre en sortie).
+    Les notes sont triées par nombre de phrases puis regroupées
+    en lots bornés par BATCH_BUDGET : chaque lot est vectorisé
+    et classé en une seule série d'opérations NumPy.
+    """
+    results = [""] * len(texts)
+    vocab = {}
+    pending = []
+
+    for i, text in enumerate(texts):
+        if not text:
+            continue
+        sentences = _split_sentences(text)
+        if len(sentences) <= 1 or len(text) <= SUMMARY_MAX_CHARS:
+            results[i] = _format(sentences or [text])
+            continue
+        sent_ids, term_ids = [], []
+        for s, sentence in enumerate(sentences):
+            for term in _terms(sentence):
+                sent_ids.append(s)
+                term_ids.append(vocab.setdefault(term, len(vocab)))
+        if not term_ids:
+            results[i] = _format(sentences)
+            continue
+        pending.append((i, sentences, (len(sentences), np.array(sent_ids), np.array(term_ids))))
+
+    pending.sort(key=lambda p: len(p[1]))
+    start = 0
+    while start < len(pending):
+        # Taille du lot : la plus grande qui tient dans le budget
+        # (nombre d'occurrences = majorant du vocabulaire du lot)
+        end, n_terms = start + 1, len(pending[start][2][2])
+        while end < len(pending):
+            n_terms += len(pending[end][2][2])
+            if (end + 1 - start) * len(pending[end][1]) * n_terms > BATCH_BUDGET:
+                break
+            end += 1
+        batch = pending[start:end]
+        scores = _rank_batch([p[2] for p in batch])
+        for row, (i, sentences, _) in zip(scores, batch):
+            results[i] = _format(_select(sentences, row))
+        start = end
+
+    return results
+
+
 def generate_summary(contenu: str) -> str:
     """
-    Génère un résumé automatique du texte.
-    Pour l'instant : version simplifiée sans IA (tronque le texte proprement)
+    Génère un résumé automatique extractif du texte
+    (les phrases les plus centrales selon TextRank).
     """
     if not contenu:
         return ""
-
-    # Si tu veux faire un résumé plus "intelligent", tu pourras ici
-    # utiliser un vrai modèle (HuggingFace, OpenAI, etc.)
-    resume = shorten(contenu, width=200, placeholder="...")
-
-    return f"Résumé automatique : {resume}"
\ No newline at end of file
+    return generate_summaries([contenu])[0]
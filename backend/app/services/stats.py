@@ -0,0 +1,245 @@
+# app/services/stats.py
+# =====================================================
+# Statistiques des équipes (tableau de bord admin).
+# Tables de cumul journalier mises à jour à chaque écriture
+# (UPSERT compteur = compteur + n dans la transaction de
+# l'écriture) : GET /stats/overview lit quelques centaines
+# de lignes pré-agrégées au lieu de parcourir notes,
+# commentaires et élèves.
+# rebuild_stats() recalcule les cumuls depuis les tables
+# sources (initialisation, réconciliation périodique).
+# =====================================================
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+
+from fastapi import HTTPException
+from sqlalchemy import Date, cast, func
+from sqlalchemy.orm import Session
+
+from app.db import dialect_insert
+from app.models.commentaire import Commentaire
+from app.models.eleve import Eleve
+from app.models.like import NoteLike
+from app.models.note import Note
+from app.models.stats import StatsAuteurJour, StatsEquipeJour
+from app.models.utilisateur import Utilisateur
+
+EQUIPE_COUNTERS = ("notes", "commentaires", "likes", "vues", "eleves_actifs")
+AUTEUR_COUNTERS = ("notes", "commentaires")
+
+
+def _today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+
+def _day(db: Session, column):
+    # CAST(... AS DATE) n'existe pas sur SQLite
+    if db.get_bind().dialect.name == "sqlite":
+        return func.date(column)
+    return cast(column, Date)
+
+
+# -------------------------------------------------------
+# 🔹 Mises à jour incrémentales
+# -------------------------------------------------------
+def _upsert(bind, model, keys, counters):
+    insert = dialect_insert(bind)(model)
+    table = model.__table__
+    return insert.on_conflict_do_update(
+        index_elements=[table.c[key] for key in keys],
+        set_={name: table.c[name] + insert.excluded[name] for name in counters},
+    )
+
+
+def record_stats(conn, events, jour: date = None):
+    """
+    Ajoute des événements aux cumuls du jour (par défaut aujourd'hui, UTC).
+    events : [(equipe, auteur_id ou None, {compteur: n})] ; n peut être
+    négatif (suppression). Écrit dans la transaction de l'appelant
+    (Session ou Connection), une ligne par équipe / auteur.
+    """
+    jour = jour or _today()
+    equipes, auteurs = {}, {}
+    for equipe, auteur_id, counts in events:
+        row = equipes.setdefault(equipe or "", dict.fromkeys(EQUIPE_COUNTERS, 0))
+        for name, n in counts.items():
+            row[name] += n
+        if auteur_id and any(counts.get(name) for name in AUTEUR_COUNTERS):
+            auteur = auteurs.setdefault((equipe or "", auteur_id), dict.fromkeys(AUTEUR_COUNTERS, 0))
+            for name in AUTEUR_COUNTERS:
+                auteur[name] += counts.get(name, 0)
+
+    bind = conn.get_bind() if isinstance(conn, Session) else conn
+    if equipes:
+        conn.execute(
+            _upsert(bind, StatsEquipeJour, ("jour", "equipe"), EQUIPE_COUNTERS),
+            [{"jour": jour, "equipe": equipe, **counts} for equipe, counts in sorted(equipes.items())],
+        )
+    if auteurs:
+        conn.execute(
+            _upsert(bind, StatsAuteurJour, ("jour", "equipe", "auteur_id"), AUTEUR_COUNTERS),
+            [
+                {"jour": jour, "equipe": equipe, "auteur_id": auteur_id, **counts}
+                for (equipe, auteur_id), counts in sorted(auteurs.items())
+            ],
+        )
+
+
+def record_note_history(db: Session, note: Note, equipe, sign: int):
+    """
+    Reporte (sign=+1) ou retire (sign=-1) la note, ses commentaires et
+    ses likes des cumuls de l'équipe, aux jours où ils ont eu lieu :
+    suppression d'une note, changement d'équipe.
+    """
+    record_stats(db, [(equipe, note.auteur_id, {"notes": sign})], jour=_as_date(note.created_at) or _today())
+    day = _day(db, Commentaire.date)
+    for jour, auteur_id, n in (
+        db.query(day, Commentaire.auteur_id, func.count())
+        .filter(Commentaire.note_id == note.id)
+        .group_by(day, Commentaire.auteur_id)
+    ):
+        record_stats(db, [(equipe, auteur_id, {"commentaires": sign * n})], jour=_as_date(jour))
+    day = _day(db, NoteLike.created_at)
+    for jour, n in db.query(day, func.count()).filter(NoteLike.note_id == note.id).group_by(day):
+        record_stats(db, [(equipe, None, {"likes": sign * n})], jour=_as_date(jour))
+
+
+def eleve_equipe(db: Session, eleve: Eleve):
+    """Un élève compte pour l'équipe de l'utilisateur qui l'a créé."""
+    return db.query(Utilisateur.equipe).filter(Utilisateur.id == eleve.created_by).scalar()
+
+
+# -------------------------------------------------------
+# 🔄 Recalcul complet
+# -------------------------------------------------------
+def rebuild_stats(bind):
+    """
+    Recalcule les cumuls depuis notes, commentaires, likes et élèves.
+    Les vues ne sont pas historisées par jour : les compteurs de vues
+    existants sont conservés. Retourne le nombre de lignes écrites.
+    """
+    equipes = defaultdict(lambda: dict.fromkeys(EQUIPE_COUNTERS, 0))
+    auteurs = defaultdict(lambda: dict.fromkeys(AUTEUR_COUNTERS, 0))
+
+    with Session(bind=bind) as db:
+        day = _day(db, Note.created_at)
+        for jour, equipe, auteur_id, n in (
+            db.query(day, Note.equipe, Note.auteur_id, func.count()).group_by(day, Note.equipe, Note.auteur_id)
+        ):
+            equipes[(_as_date(jour), equipe or "")]["notes"] += n
+            if auteur_id:
+                auteurs[(_as_date(jour), equipe or "", auteur_id)]["notes"] += n
+
+        day = _day(db, Commentaire.date)
+        for jour, equipe, auteur_id, n in (
+            db.query(day, Note.equipe, Commentaire.auteur_id, func.count())
+            .join(Note, Note.id == Commentaire.note_id)
+            .group_by(day, Note.equipe, Commentaire.auteur_id)
+        ):
+            equipes[(_as_date(jour), equipe or "")]["commentaires"] += n
+            if auteur_id:
+                auteurs[(_as_date(jour), equipe or "", auteur_id)]["commentaires"] += n
+
+        day = _day(db, NoteLike.created_at)
+        for jour, equipe, n in (
+            db.query(day, Note.equipe, func.count())
+            .join(Note, Note.id == NoteLike.note_id)
+            .group_by(day, Note.equipe)
+        ):
+            equipes[(_as_date(jour), equipe or "")]["likes"] += n
+
+        day = _day(db, Eleve.created_at)
+        for jour, equipe, n in (
+            db.query(day, Utilisateur.equipe, func.count())
+            .join(Utilisateur, Utilisateur.id == Eleve.created_by)
+            .filter(Eleve.actif.is_(True))
+            .group_by(day, Utilisateur.equipe)
+        ):
+            equipes[(_as_date(jour), equipe or "")]["eleves_actifs"] += n
+
+        for jour, equipe, vues in db.query(StatsEquipeJour.jour, StatsEquipeJour.equipe, StatsEquipeJour.vues).filter(
+            StatsEquipeJour.vues != 0
+        ):
+            equipes[(jour, equipe)]["vues"] += vues
+
+        db.query(StatsAuteurJour).delete(synchronize_session=False)
+        db.query(StatsEquipeJour).delete(synchronize_session=False)
+        rows = [{"jour": j, "equipe": e, **c} for (j, e), c in equipes.items() if j is not None]
+        author_rows = [{"jour": j, "equipe": e, "auteur_id": a, **c} for (j, e, a), c in auteurs.items() if j is not None]
+        if rows:
+            db.execute(StatsEquipeJour.__table__.insert(), rows)
+        if author_rows:
+            db.execute(StatsAuteurJour.__table__.insert(), author_rows)
+        db.commit()
+    return len(rows) + len(author_rows)
+
+
+# -------------------------------------------------------
+# 📊 Lecture (tableau de bord)
+# -------------------------------------------------------
+def stats_overview_service(db: Session, current_user, jours: int = 30, equipe: str = "", top: int = 5):
+    user_type = current_user.get("type") if isinstance(current_user, dict) else current_user.type
+    if (user_type or "").lower() != "admin":
+        raise HTTPException(status_code=403, detail="Action réservée aux administrateurs.")
+
+    fin = _today()
+    debut = fin - timedelta(days=jours - 1)
+    S, A = StatsEquipeJour, StatsAuteurJour
+
+    window = db.query(
+        S.equipe,
+        func.sum(S.notes), func.sum(S.commentaires), func.sum(S.likes), func.sum(S.vues), func.sum(S.eleves_actifs),
+    ).filter(S.jour >= debut)
+    # Élèves actifs : total courant = somme des variations depuis toujours
+    actifs = db.query(S.equipe, func.sum(S.eleves_actifs)).filter(S.eleves_actifs != 0)
+    authors = db.query(A.equipe, A.auteur_id, func.sum(A.notes), func.sum(A.commentaires)).filter(A.jour >= debut)
+    if equipe:
+        window, actifs, authors = window.filter(S.equipe == equipe), actifs.filter(S.equipe == equipe), authors.filter(A.equipe == equipe)
+
+    stats = {}
+
+    def entry(name):
+        return stats.setdefault(name, {
+            "equipe": name or None, "notes": 0, "commentaires": 0, "likes": 0, "vues": 0,
+            "eleves_actifs": 0, "eleves_actifs_variation": 0, "top_auteurs": [],
+        })
+
+    for name, notes, commentaires, likes, vues, variation in window.group_by(S.equipe):
+        entry(name).update(
+            notes=notes or 0, commentaires=commentaires or 0, likes=likes or 0, vues=vues or 0,
+            eleves_actifs_variation=variation or 0,
+        )
+    for name, total in actifs.group_by(S.equipe):
+        entry(name)["eleves_actifs"] = total or 0
+
+    ranked = defaultdict(list)
+    for name, auteur_id, notes, commentaires in authors.group_by(A.equipe, A.auteur_id):
+        if notes or commentaires:
+            ranked[name].append({"auteur_id": auteur_id, "notes": notes or 0, "commentaires": commentaires or 0})
+    tops = {
+        name: sorted(rows, key=lambda r: (-r["notes"], -r["commentaires"], r["auteur_id"]))[:top]
+        for name, rows in ranked.items()
+    }
+    noms = dict(
+        db.query(Utilisateur.id, Utilisateur.nom).filter(
+            Utilisateur.id.in_({r["auteur_id"] for rows in tops.values() for r in rows})
+        )
+    )
+    for name, rows in tops.items():
+        entry(name)["top_auteurs"] = [{**r, "nom": noms.get(r["auteur_id"])} for r in rows]
+
+    equipes = sorted(stats.values(), key=lambda e: (-e["notes"], e["equipe"] or ""))
+    totaux = {
+        name: sum(e[name] for e in equipes)
+        for name in ("notes", "commentaires", "likes", "vues", "eleves_actifs", "eleves_actifs_variation")
+    }
+    return {"debut": debut, "fin": fin, "jours": jours, "equipes": equipes, "totaux": totaux}
@@ -0,0 +1,233 @@
+# app/services/stockage.py
+# =====================================================
+# Stockage des fichiers (pièces jointes, avatars) derrière
+# une interface commune, choisie par STORAGE_BACKEND :
+# - "local" : disque, sous UPLOAD_DIR (écriture via un
+#   fichier temporaire renommé, jamais de fichier tronqué)
+# - "s3"    : stockage objet compatible S3 (AWS, MinIO…),
+#   envoi multipart en flux avec parties transférées en
+#   parallèle, téléchargement par URL présignée
+# Les fichiers sont désignés par une clé relative
+# ("blobs/ab/cd/<sha256>", "avatars/<nom>").
+# Fonctions bloquantes : les appeler hors de la boucle
+# d'événements (run_in_threadpool / route synchrone).
+# =====================================================
+
+import hashlib
+import os
+import threading
+import uuid
+from functools import lru_cache
+from urllib.parse import quote
+
+from app.config import settings
+
+COPY_CHUNK_SIZE = 1024 * 1024  # 1 Mio
+
+
+@lru_cache(maxsize=4096)
+def _file_sha256(chemin: str, mtime_ns: int, taille: int) -> str:
+    digest = hashlib.sha256()
+    with open(chemin, "rb") as f:
+        while chunk := f.read(COPY_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# -------------------------------------------------------
+# 💾 Disque local
+# -------------------------------------------------------
+class LocalStorage:
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        # Anciennes lignes : chemin local complet (uploads/…, chemin absolu)
+        if os.path.isabs(key) or key.startswith(os.path.join(os.path.normpath(self.root), "")):
+            return key
+        return os.path.join(self.root, key)
+
+    def local_path(self, key: str):
+        """Chemin sur disque (envoi direct par FileResponse)."""
+        return self.path(key)
+
+    def exists(self, key: str) -> bool:
+        return bool(key) and os.path.isfile(self.path(key))
+
+    def save(self, key: str, source, chunk_size: int = COPY_CHUNK_SIZE):
+        """Copie source (fichier ouvert) par blocs, via un fichier temporaire renommé à la fin."""
+        chemin = self.path(key)
+        directory = os.path.dirname(chemin)
+        os.makedirs(directory, exist_ok=True)
+        tmp = os.path.join(directory, f".{uuid.uuid4().hex}.part")
+        try:
+            with open(tmp, "wb") as out:
+                while chunk := source.read(chunk_size):
+                    out.write(chunk)
+            os.replace(tmp, chemin)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def open(self, key: str):
+        """Lecture en flux (fichier ouvert en binaire)."""
+        return open(self.path(key), "rb")
+
+    def delete(self, key: str):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def iter_files(self):
+        """
+        Parcours en flux (os.scandir, pile de répertoires) : (clé, taille,
+        mtime) sans lister un répertoire entier en mémoire.
+        """
+        stack = [""]
+        while stack:
+            prefix = stack.pop()
+            try:
+                entries = os.scandir(os.path.join(self.root, prefix))
+            except FileNotFoundError:
+                continue
+            with entries:
+                for entry in entries:
+                    key = f"{prefix}/{entry.name}" if prefix else entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(key)
+                    elif entry.is_file(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        yield key, st.st_size, st.st_mtime
+
+    def fingerprint(self, key: str) -> str:
+        """SHA-256 du contenu, calculé une fois par version du fichier (mtime, taille)."""
+        chemin = self.path(key)
+        st = os.stat(chemin)
+        return _file_sha256(chemin, st.st_mtime_ns, st.st_size)
+
+    def url(self, key: str, filename: str = None):
+        return None  # servi directement par l'API
+
+
+# -------------------------------------------------------
+# ☁️ Stockage objet compatible S3
+# -------------------------------------------------------
+class S3Storage:
+    def __init__(
+        self, bucket: str, prefix: str = "", endpoint_url: str = None, region: str = None,
+        access_key_id: str = None, secret_access_key: str = None,
+        part_size: int = 8 * 1024 * 1024, max_concurrency: int = 4, url_expires: int = 300,
+    ):
+        try:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+            from botocore.exceptions import ClientError
+        except ImportError:
+            raise RuntimeError("STORAGE_BACKEND=s3 nécessite boto3 (pip install boto3)")
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.url_expires = url_expires
+        self._client_error = ClientError
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url or None,
+            region_name=region or None,
+            aws_access_key_id=access_key_id or None,
+            aws_secret_access_key=secret_access_key or None,
+        )
+        # Multipart au-delà d'une partie, parties envoyées en parallèle ;
+        # mémoire bornée à max_concurrency parties
+        self.transfer = TransferConfig(
+            multipart_threshold=part_size,
+            multipart_chunksize=part_size,
+            max_concurrency=max_concurrency,
+            use_threads=max_concurrency > 1,
+        )
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def local_path(self, key: str):
+        return None
+
+    def _head(self, key: str):
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except self._client_error as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def exists(self, key: str) -> bool:
+        return bool(key) and self._head(key) is not None
+
+    def save(self, key: str, source, chunk_size: int = COPY_CHUNK_SIZE):
+        """Envoi en flux (lectures d'une partie à la fois) ; l'objet n'apparaît qu'une fois complet."""
+        self.client.upload_fileobj(source, self.bucket, self._key(key), Config=self.transfer)
+
+    def open(self, key: str):
+        """Lecture en flux du corps de l'objet."""
+        return self.client.get_object(Bucket=self.bucket, Key=self._key(key))["Body"]
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def iter_files(self):
+        """Parcours paginé du bucket (1000 objets par requête) : (clé, taille, mtime)."""
+        prefix = f"{self.prefix}/" if self.prefix else ""
+        for page in self.client.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                yield obj["Key"][len(prefix):], obj["Size"], obj["LastModified"].timestamp()
+
+    def fingerprint(self, key: str) -> str:
+        """ETag de l'objet (fixé par le serveur à l'écriture : aucune relecture du contenu)."""
+        head = self._head(key)
+        if head is None:
+            raise FileNotFoundError(key)
+        return head["ETag"].strip('"')
+
+    def url(self, key: str, filename: str = None):
+        """URL présignée de lecture (Range géré par le serveur S3)."""
+        params = {"Bucket": self.bucket, "Key": self._key(key)}
+        if filename:
+            params["ResponseContentDisposition"] = f"inline; filename*=utf-8''{quote(filename)}"
+        return self.client.generate_presigned_url("get_object", Params=params, ExpiresIn=self.url_expires)
+
+
+# -------------------------------------------------------
+# 🔹 Stockage configuré
+# -------------------------------------------------------
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_storage():
+    """Stockage choisi par la configuration (un client par configuration, partagé entre threads)."""
+    config = (
+        settings.STORAGE_BACKEND, settings.UPLOAD_DIR, settings.S3_BUCKET, settings.S3_PREFIX,
+        settings.S3_ENDPOINT_URL, settings.S3_REGION,
+    )
+    with _backends_lock:
+        storage = _backends.get(config)
+        if storage is None:
+            if settings.STORAGE_BACKEND == "s3":
+                storage = S3Storage(
+                    settings.S3_BUCKET,
+                    prefix=settings.S3_PREFIX,
+                    endpoint_url=settings.S3_ENDPOINT_URL,
+                    region=settings.S3_REGION,
+                    access_key_id=settings.S3_ACCESS_KEY_ID,
+                    secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+                    part_size=settings.S3_PART_SIZE,
+                    max_concurrency=settings.S3_MAX_CONCURRENCY,
+                    url_expires=settings.S3_URL_EXPIRES,
+                )
+            elif settings.STORAGE_BACKEND == "local":
+                storage = LocalStorage(settings.UPLOAD_DIR)
+            else:
+                raise RuntimeError(f"STORAGE_BACKEND inconnu : {settings.STORAGE_BACKEND!r} (local ou s3)")
+            _backends[config] = storage
+        return storage
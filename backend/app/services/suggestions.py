@@ -0,0 +1,209 @@
+# app/services/suggestions.py
+# =====================================================
+# Suggestion de catégorie / priorité pour une note :
+# Bayes naïf multinomial (NumPy seulement) sur des n-grammes
+# de mots hachés (unigrammes + bigrammes du titre et du
+# contenu). Entraîné hors ligne à partir des notes existantes
+# (python -m app.tools.train_suggestions), inférence vectorisée
+# par lots.
+# =====================================================
+
+import os
+import re
+import threading
+import unicodedata
+import zlib
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+import numpy as np
+from fastapi import HTTPException
+
+from app.config import settings
+
+N_FEATURES = 2 ** 16
+ALPHA = 0.5                 # lissage de Laplace
+TARGETS = ("categorie", "priorite")
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+# -------------------------------------------------------
+# 🔹 Caractéristiques
+# -------------------------------------------------------
+# Table de désaccentuation (Latin étendu) : str.translate au lieu d'un test par caractère
+_ACCENTS = {
+    code: "".join(c for c in unicodedata.normalize("NFKD", chr(code)) if not unicodedata.combining(c))
+    for code in range(0xC0, 0x250)
+    if unicodedata.normalize("NFKD", chr(code)) != chr(code)
+}
+
+
+def _words(text):
+    return _WORD_RE.findall((text or "").lower().translate(_ACCENTS))
+
+
+@lru_cache(maxsize=200_000)
+def _word_hash(word: str) -> int:
+    return zlib.crc32(word.encode("utf-8"))
+
+
+def _features(titre, contenu):
+    """Unigrammes + bigrammes hachés ; le hachage des bigrammes est combiné en NumPy."""
+    words = _words(titre) + _words(contenu)
+    h = np.fromiter(map(_word_hash, words), dtype=np.int64, count=len(words))
+    bigrams = h[:-1] * 1_000_003 + h[1:] + 1
+    return np.concatenate([h, bigrams]) % N_FEATURES
+
+
+def _hashed_batch(texts):
+    """
+    Lot de (titre, contenu) → triplet (ligne, caractéristique, compte)
+    trié par ligne, base de l'entraînement et de l'inférence vectorisés.
+    """
+    feats = [_features(titre, contenu) for titre, contenu in texts]
+    rows = np.repeat(np.arange(len(feats), dtype=np.int64), [len(f) for f in feats])
+    feats = np.concatenate(feats) if feats else np.zeros(0, dtype=np.int64)
+    # Regroupe les occurrences identiques (ligne, caractéristique)
+    keys, counts = np.unique(rows * N_FEATURES + feats, return_counts=True)
+    return keys // N_FEATURES, keys % N_FEATURES, counts.astype(np.float32)
+
+
+def canonical_labels(values):
+    """
+    Normalise des libellés saisis librement : même clé sans casse /
+    accents / espaces superflus → orthographe la plus fréquente.
+    """
+    spellings = defaultdict(Counter)
+    for value in values:
+        if value and value.strip():
+            spellings[label_key(value)][value.strip()] += 1
+    return {key: counter.most_common(1)[0][0] for key, counter in spellings.items()}
+
+
+def label_key(value):
+    return " ".join(_words(value))
+
+
+# -------------------------------------------------------
+# 🧠 Modèle
+# -------------------------------------------------------
+class NaiveBayesModel:
+    def __init__(self, labels, log_prior, log_likelihood):
+        self.labels = list(labels)
+        self.log_prior = log_prior            # (classes,)
+        self.log_likelihood = log_likelihood  # (classes, N_FEATURES)
+        # Copie contiguë par caractéristique : lecture de lignes plutôt que de colonnes
+        self._likelihood_by_feature = np.ascontiguousarray(log_likelihood.T)
+
+    @classmethod
+    def train(cls, texts, labels):
+        classes = sorted(set(labels))
+        index = {label: i for i, label in enumerate(classes)}
+        y = np.asarray([index[label] for label in labels], dtype=np.int64)
+
+        rows, feats, counts = _hashed_batch(texts)
+        # Comptes (classe, caractéristique) en un seul bincount
+        flat = y[rows] * N_FEATURES + feats
+        feature_counts = np.bincount(flat, weights=counts, minlength=len(classes) * N_FEATURES)
+        feature_counts = feature_counts.reshape(len(classes), N_FEATURES) + ALPHA
+
+        log_likelihood = np.log(feature_counts) - np.log(feature_counts.sum(axis=1, keepdims=True))
+        log_prior = np.log(np.bincount(y, minlength=len(classes)) / len(y))
+        return cls(classes, log_prior.astype(np.float32), log_likelihood.astype(np.float32))
+
+    def predict_proba(self, texts):
+        """Probabilités (textes x classes), calculées pour tout le lot à la fois."""
+        rows, feats, counts = _hashed_batch(texts)
+        scores = np.tile(self.log_prior, (len(texts), 1))
+        if rows.size:
+            contrib = self._likelihood_by_feature[feats] * counts[:, None]  # (occurrences, classes)
+            starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+            scores[rows[starts]] += np.add.reduceat(contrib, starts, axis=0)
+        scores -= scores.max(axis=1, keepdims=True)
+        proba = np.exp(scores)
+        return proba / proba.sum(axis=1, keepdims=True)
+
+
+def train_models(texts, targets):
+    """targets : {cible: [libellé ou None par texte]} → {cible: modèle}"""
+    models = {}
+    for target, values in targets.items():
+        canon = canonical_labels(values)
+        examples = [(text, canon[label_key(v)]) for text, v in zip(texts, values) if v and v.strip()]
+        if len({label for _, label in examples}) >= 2:
+            models[target] = NaiveBayesModel.train([t for t, _ in examples], [label for _, label in examples])
+    return models
+
+
+# -------------------------------------------------------
+# 💾 Persistance (rechargée si le fichier change)
+# -------------------------------------------------------
+def save_models(models, path: str):
+    arrays = {}
+    for target, model in models.items():
+        arrays[f"{target}__labels"] = np.asarray(model.labels, dtype=str)
+        arrays[f"{target}__log_prior"] = model.log_prior
+        arrays[f"{target}__log_likelihood"] = model.log_likelihood
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp.npz"
+    np.savez_compressed(tmp, **arrays)
+    os.replace(tmp, path)
+
+
+def load_models(path: str):
+    models = {}
+    with np.load(path) as data:
+        for target in TARGETS:
+            if f"{target}__labels" in data:
+                models[target] = NaiveBayesModel(
+                    data[f"{target}__labels"].tolist(),
+                    data[f"{target}__log_prior"],
+                    data[f"{target}__log_likelihood"],
+                )
+    return models
+
+
+_loaded = {"version": None, "models": None}
+_load_lock = threading.Lock()
+
+
+def _current_models():
+    path = settings.SUGGEST_MODEL_PATH
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        raise HTTPException(
+            status_code=503,
+            detail="Modèle de suggestion non entraîné (python -m app.tools.train_suggestions)",
+        )
+    with _load_lock:
+        if _loaded["version"] != (path, mtime):
+            _loaded["models"], _loaded["version"] = load_models(path), (path, mtime)
+        return _loaded["models"]
+
+
+# -------------------------------------------------------
+# 🔹 Service
+# -------------------------------------------------------
+def suggest_service(items):
+    """Suggère catégorie et priorité pour chaque {titre, contenu} du lot."""
+    if len(items) > settings.SUGGEST_MAX_BATCH:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Lot trop volumineux (maximum {settings.SUGGEST_MAX_BATCH} textes)",
+        )
+    models = _current_models()
+    texts = [(item.titre, item.contenu) for item in items]
+    results = [{} for _ in texts]
+    for target in TARGETS:
+        model = models.get(target)
+        if model is None or not texts:
+            for result in results:
+                result[target] = None
+            continue
+        proba = model.predict_proba(texts)
+        best = proba.argmax(axis=1)
+        for result, i, p in zip(results, best, proba):
+            result[target] = {"valeur": model.labels[i], "confiance": round(float(p[i]), 4)}
+    return results
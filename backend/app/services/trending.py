@@ -0,0 +1,184 @@
+# app/services/trending.py
+# =====================================================
+# Notes tendance : score combinant likes, vues et
+# commentaires, avec décroissance exponentielle.
+#
+# Décroissance « avant » (forward decay) : un événement au
+# temps t ajoute  poids x 2^((t - époque) / demi-vie)  au score
+# stocké (UPSERT atomique score = score + incrément). Le score
+# décru à l'instant T vaut  stocké x 2^(-(T - époque) / demi-vie) :
+# le facteur est le même pour toutes les notes, donc
+# ORDER BY score DESC (indexé) donne le classement courant
+# sans jamais réagréger notes / commentaires.
+#
+# L'époque est stockée en base (table trending_epoque) et
+# avancée toutes les REBASE_HALF_LIVES demi-vies (au
+# démarrage puis périodiquement) en ramenant les scores
+# dessus : 2^((t - époque) / demi-vie) reste borné.
+# =====================================================
+
+import threading
+from datetime import datetime, timezone
+
+from sqlalchemy import case, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db import dialect_insert
+from app.models.note import Note
+from app.models.trending import NoteTrending, TrendingEpoch
+
+WEIGHTS = {"view": 1.0, "like": 3.0, "comment": 5.0}
+REBASE_HALF_LIVES = 16  # écart max (en demi-vies) entre l'époque et maintenant avant rebasage
+INITIAL_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)  # époque des scores antérieurs à trending_epoque
+
+trending_table = NoteTrending.__table__
+epoch_table = TrendingEpoch.__table__
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _half_lives(epoch: datetime, at: datetime) -> float:
+    return (at - epoch).total_seconds() / 3600 / settings.TRENDING_HALF_LIFE_HOURS
+
+
+def decay_factor(epoch: datetime, at: datetime = None) -> float:
+    """2^((t - époque) / demi-vie) : poids d'un événement au temps t."""
+    return 2.0 ** _half_lives(epoch, at or _now())
+
+
+def current_epoch(conn, lock: str = None) -> datetime:
+    """
+    Époque des scores stockés (ligne créée au premier appel).
+    lock="share" : lue sous verrou partagé, le rebasage attend la fin
+    de la transaction ; lock="update" : verrou exclusif (rebasage).
+    """
+    query = select(epoch_table.c.epoque).where(epoch_table.c.id == 1)
+    if lock:
+        query = query.with_for_update(read=lock == "share")
+    epoch = conn.execute(query).scalar()
+    if epoch is None:
+        insert = dialect_insert(conn.get_bind() if isinstance(conn, Session) else conn)(TrendingEpoch)
+        conn.execute(insert.on_conflict_do_nothing(), {"id": 1, "epoque": INITIAL_EPOCH})
+        epoch = conn.execute(query).scalar()
+    # SQLite ne conserve pas le fuseau
+    return epoch if epoch.tzinfo else epoch.replace(tzinfo=timezone.utc)
+
+
+def _upsert(bind):
+    insert = dialect_insert(bind)(NoteTrending)
+    return insert.on_conflict_do_update(
+        index_elements=[NoteTrending.note_id],
+        set_={
+            # un retrait (unlike) ne fait jamais passer le score sous zéro
+            "score": case(
+                (trending_table.c.score + insert.excluded.score > 0, trending_table.c.score + insert.excluded.score),
+                else_=0.0,
+            ),
+            "updated_at": insert.excluded.updated_at,
+        },
+    )
+
+
+def trending_increments(events, epoch: datetime, at: datetime = None):
+    """events : [(note_id, type, nombre)] → lignes d'UPSERT (une par note)."""
+    at = at or _now()
+    if at.tzinfo is None:
+        at = at.replace(tzinfo=timezone.utc)  # date relue de SQLite (UTC, sans fuseau)
+    factor = decay_factor(epoch, at)
+    scores = {}
+    for note_id, kind, n in events:
+        scores[note_id] = scores.get(note_id, 0.0) + WEIGHTS[kind] * n * factor
+    return [{"note_id": note_id, "score": score, "updated_at": at} for note_id, score in sorted(scores.items())]
+
+
+def record_trending(conn, events, at: datetime = None):
+    """
+    Ajoute des événements au score de tendance dans la transaction de
+    l'appelant (Session ou Connection) ; executemany d'UPSERT atomiques.
+    """
+    if not events:
+        return
+    rows = trending_increments(events, current_epoch(conn, lock="share"), at)
+    if rows:
+        conn.execute(_upsert(conn.get_bind() if isinstance(conn, Session) else conn), rows)
+
+
+def trending_notes_service(db: Session, limit: int = 20, equipe: str = ""):
+    """Notes les mieux classées (lecture de l'index sur score, jointure sur les seules notes retournées)."""
+    query = (
+        db.query(
+            Note.id, Note.titre, Note.equipe, Note.categorie, Note.likes, Note.nb_vues,
+            Note.created_at, Note.auteur_id, NoteTrending.score,
+        )
+        .join(NoteTrending, NoteTrending.note_id == Note.id)
+        .filter(NoteTrending.score > 0)
+    )
+    if equipe:
+        query = query.filter(Note.equipe == equipe)
+    rows = query.order_by(NoteTrending.score.desc(), Note.id.desc()).limit(limit).all()
+
+    now_factor = decay_factor(current_epoch(db))
+    return [{**row._asdict(), "score": round(row.score / now_factor, 4)} for row in rows]
+
+
+def rebase_trending_scores(bind, at: datetime = None) -> bool:
+    """
+    Avance l'époque à `at` si elle a plus de REBASE_HALF_LIVES demi-vies,
+    scores stockés ramenés sur la nouvelle époque (même transaction, ligne
+    de l'époque verrouillée). Retourne True si l'époque a été avancée.
+    """
+    at = at or _now()
+    with Session(bind=bind) as db:
+        epoch = current_epoch(db, lock="update")
+        half_lives = _half_lives(epoch, at)
+        if half_lives < REBASE_HALF_LIVES:
+            db.commit()
+            return False
+        db.execute(trending_table.update().values(
+            score=trending_table.c.score * 2.0 ** -half_lives,
+            updated_at=trending_table.c.updated_at,  # date du dernier événement conservée
+        ))
+        db.execute(epoch_table.update().where(epoch_table.c.id == 1).values(epoque=at))
+        db.commit()
+    return True
+
+
+# -------------------------------------------------------
+# 🔹 Rebasage périodique (thread de fond)
+# -------------------------------------------------------
+class TrendingRebaser:
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, bind):
+        """Rebase au démarrage, puis vérifie plusieurs fois par période de rebasage."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._rebase(bind)
+        interval = REBASE_HALF_LIVES * settings.TRENDING_HALF_LIFE_HOURS * 3600 / 4
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(bind, interval), name="trending-rebase", daemon=True)
+        self._thread.start()
+
+    def _rebase(self, bind):
+        try:
+            rebase_trending_scores(bind)
+        except Exception as e:
+            print(f"⚠️ Rebasage des scores de tendance impossible, nouvel essai au prochain cycle : {e}")
+
+    def _run(self, bind, interval: float):
+        while not self._stop.wait(interval):
+            self._rebase(bind)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+
+trending_rebaser = TrendingRebaser()
@@ -1,20 +1,35 @@
 from sqlalchemy.orm import Session, joinedload
 from fastapi import HTTPException, UploadFile, BackgroundTasks, status
-from fastapi.responses import FileResponse
+from fastapi.concurrency import run_in_threadpool
+from app.models.fichier import FichierNote
+from app.models.note import Note
 from app.models.utilisateur import Utilisateur
 from app.schemas.schemas import UtilisateurOut, UtilisateurDetailOut
 from app.emails import send_activation_email, send_registration_email
 from app.config import settings
+from app.services.fichiers import download_response, release_blobs, safe_filename, store_upload
+from app.services.vignettes import AVATAR, delete_variants, enqueue_variants, variant_for
 from passlib.context import CryptContext
 from jose import jwt
 from datetime import datetime, timedelta, timezone
-import os, shutil
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-# Répertoire pour les avatars
-AVATAR_DIR = "uploads/avatars"
-os.makedirs(AVATAR_DIR, exist_ok=True)
+# Préfixe des avatars dans le stockage (services/stockage.py)
+AVATAR_PREFIX = "avatars"
+
+
+def avatar_key(avatar_chemin, avatar_url):
+    """
+    Clé de stockage de l'avatar envoyé : colonne avatar_chemin, sinon
+    (anciennes lignes) partie de l'URL publique après /uploads/.
+    None pour un avatar externe ou absent.
+    """
+    if avatar_chemin:
+        return avatar_chemin
+    if avatar_url and "/uploads/" in avatar_url:
+        return avatar_url.split("/uploads/", 1)[1]
+    return None
 
 
 # ======================================================
@@ -201,6 +216,10 @@ def delete_user_service(user_id: int, db: Session, current_user):
     if not user:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé.")
 
+    # 🔢 Pièces jointes de ses notes supprimées en cascade : références retirées
+    release_blobs(db, [
+        sha256 for (sha256,) in db.query(FichierNote.sha256).join(Note, FichierNote.note_id == Note.id).filter(Note.auteur_id == user_id)
+    ])
     db.delete(user)
     db.commit()
     return {"message": "Utilisateur supprimé avec succès."}
@@ -214,13 +233,16 @@ async def upload_avatar_service(user_id: int, file: UploadFile, db: Session):
     if not user:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé.")
 
-    filename = f"user_{user_id}_{file.filename}"
-    file_path = os.path.join(AVATAR_DIR, filename)
-
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    filename = f"user_{user_id}_{safe_filename(file.filename)}"
+    # Envoi en flux (taille bornée) hors de la boucle d'événements
+    stocke = await run_in_threadpool(store_upload, file, AVATAR_PREFIX, filename)
+    # 🖼️ Vignettes 64 / 128 / 256 recalculées en arrière-plan
+    await run_in_threadpool(delete_variants, stocke["chemin"], AVATAR)
+    enqueue_variants(stocke["chemin"], AVATAR)
 
-    user.avatar_url = f"http://127.0.0.1:8000/uploads/avatars/{filename}"
+    # URL de l'API (disque local ou redirection S3), versionnée par le contenu
+    user.avatar_chemin = stocke["chemin"]
+    user.avatar_url = f"/utilisateurs/{user_id}/avatar?v={stocke['sha256']}"
     db.commit()
     db.refresh(user)
 
@@ -230,13 +252,20 @@ async def upload_avatar_service(user_id: int, file: UploadFile, db: Session):
 # ======================================================
 # 🔸 GET AVATAR
 # ======================================================
-async def get_avatar_service(user_id: int, db: Session):
+async def get_avatar_service(
+    user_id: int, db: Session, if_none_match: str = None, version: str = None, size: int = None, accept: str = None
+):
     user = db.query(Utilisateur).filter(Utilisateur.id == user_id).first()
-    if not user or not user.avatar_url:
+    key = avatar_key(user.avatar_chemin, user.avatar_url) if user else None
+    if not key:
         raise HTTPException(status_code=404, detail="Avatar non trouvé.")
 
-    file_path = user.avatar_url.replace("http://127.0.0.1:8000/", "")
-    if not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail="Fichier introuvable.")
-
-    return FileResponse(file_path)
+    headers = None
+    if size:
+        # Vignette (générée à la première demande si elle manque)
+        key, _, _ = await run_in_threadpool(variant_for, key, AVATAR, size, accept)
+        headers = {"Vary": "Accept"}
+    # ETag / 304 / Range ; hachage éventuel hors de la boucle d'événements
+    return await run_in_threadpool(
+        download_response, key, if_none_match=if_none_match, version=version, headers=headers
+    )
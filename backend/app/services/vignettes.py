@@ -0,0 +1,200 @@
+# app/services/vignettes.py
+# =====================================================
+# Variantes réduites des images (avatars, pièces jointes) :
+# - avatars : carrés 64 / 128 / 256 px (recadrage centré)
+# - aperçus de pièces jointes : 320 / 640 / 1280 px (côté
+#   le plus long, proportions conservées, jamais agrandies)
+# - WebP si le client l'accepte, JPEG sinon
+# Calcul (Pillow) dans un pool de processus : générées après
+# l'envoi, ou à la première demande si absentes, puis
+# stockées à côté de l'original (<clé>~<taille>.<format>).
+# =====================================================
+
+import io
+import mimetypes
+import multiprocessing
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import closing
+
+from fastapi import HTTPException
+from PIL import Image, ImageOps
+
+from app.config import settings
+from app.services.stockage import COPY_CHUNK_SIZE, get_storage
+
+AVATAR = "avatar"
+APERCU = "apercu"
+SIZES = {
+    AVATAR: (64, 128, 256),
+    APERCU: (320, 640, 1280),
+}
+FORMATS = {"webp": "WEBP", "jpg": "JPEG"}  # extension → format Pillow
+VARIANT_SEPARATOR = "~"
+
+
+def variant_key(key: str, size: int, ext: str) -> str:
+    return f"{key}{VARIANT_SEPARATOR}{size}.{ext}"
+
+
+def is_image(filename) -> bool:
+    return (mimetypes.guess_type(filename or "")[0] or "").startswith("image/")
+
+
+def pick_size(kind: str, requested: int) -> int:
+    """Plus petite variante couvrant la taille demandée (la plus grande sinon)."""
+    return next((size for size in SIZES[kind] if size >= requested), SIZES[kind][-1])
+
+
+def pick_format(accept) -> str:
+    return "webp" if "image/webp" in (accept or "") else "jpg"
+
+
+# -------------------------------------------------------
+# 🔹 Calcul (processus de travail)
+# -------------------------------------------------------
+def render_variants(source, kind: str, ext: str):
+    """
+    Image source (chemin du fichier ou fichier ouvert, lue par le worker)
+    → {taille: octets encodés}. ValueError si ce n'est pas une image
+    lisible ou si elle dépasse THUMBNAIL_MAX_PIXELS (mémoire bornée).
+    """
+    try:
+        with Image.open(source) as img:
+            if img.width * img.height > settings.THUMBNAIL_MAX_PIXELS:
+                raise ValueError(f"image trop grande : {img.width}x{img.height} pixels")
+            # JPEG : décodage directement à l'échelle réduite la plus proche
+            img.draft("RGB", (SIZES[kind][-1], SIZES[kind][-1]))
+            img = ImageOps.exif_transpose(img)
+            alpha = ext == "webp" and (img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info)
+            img = img.convert("RGBA" if alpha else "RGB")
+    except (OSError, SyntaxError, Image.DecompressionBombError) as e:
+        raise ValueError(f"image illisible : {e}")
+
+    variants = {}
+    # Du plus grand au plus petit : chaque réduction part de la précédente
+    for size in sorted(SIZES[kind], reverse=True):
+        if kind == AVATAR:
+            img = ImageOps.fit(img, (size, size), Image.LANCZOS)
+        else:
+            img = img.copy()
+            img.thumbnail((size, size), Image.LANCZOS)
+        out = io.BytesIO()
+        img.save(out, format=FORMATS[ext], quality=settings.THUMBNAIL_QUALITY)
+        variants[size] = out.getvalue()
+    return variants
+
+
+def _init_worker(max_pixels: int):
+    # Garde-fou de Pillow abaissé dans les workers (images décompressées en mémoire)
+    Image.MAX_IMAGE_PIXELS = max_pixels
+
+
+# -------------------------------------------------------
+# 🧠 Pool de génération
+# -------------------------------------------------------
+class VariantPool:
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._processes = None
+        self._threads = None
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def generate(self, key: str, kind: str, ext: str):
+        """Met en file la génération des variantes de key (sans doublon) ; retourne le future."""
+        with self._lock:
+            job = (key, kind, ext)
+            if job in self._in_flight:
+                return self._in_flight[job]
+            if self._threads is None:
+                # spawn : ne pas forker l'API (threads de fond, pool de connexions ouvert)
+                self._processes = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker, initargs=(settings.THUMBNAIL_MAX_PIXELS,),
+                )
+                # E/S de stockage dans des threads, calcul dans les processus
+                self._threads = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="vignettes")
+            future = self._threads.submit(self._run, get_storage(), self._processes, job)
+            self._in_flight[job] = future
+            return future
+
+    def _run(self, storage, processes, job):
+        key, kind, ext = job
+        try:
+            if all(storage.exists(variant_key(key, size, ext)) for size in SIZES[kind]):
+                return  # contenu déjà traité (pièce jointe partagée, demandes simultanées)
+            local = storage.local_path(key)
+            if local:
+                # Le worker lit le fichier lui-même : aucune copie de l'original en mémoire ici
+                variants = processes.submit(render_variants, local, kind, ext).result()
+            else:
+                # S3 : copie en flux dans un fichier temporaire lu par le worker
+                with tempfile.NamedTemporaryFile(prefix="vignette-") as tmp:
+                    with closing(storage.open(key)) as source:
+                        shutil.copyfileobj(source, tmp, COPY_CHUNK_SIZE)
+                    tmp.flush()
+                    variants = processes.submit(render_variants, tmp.name, kind, ext).result()
+            for size, encoded in variants.items():
+                storage.save(variant_key(key, size, ext), io.BytesIO(encoded))
+        finally:
+            with self._lock:
+                self._in_flight.pop(job, None)
+
+    def drain(self):
+        """Attend la fin des générations en cours."""
+        with self._lock:
+            futures = list(self._in_flight.values())
+        for future in futures:
+            future.exception()
+
+    def shutdown(self):
+        with self._lock:
+            threads, processes = self._threads, self._processes
+            self._threads = self._processes = None
+        if threads:
+            threads.shutdown(wait=True)
+            processes.shutdown(wait=True)
+
+
+variant_pool = VariantPool(max_workers=settings.THUMBNAIL_WORKERS)
+
+
+def _log_failure(key):
+    def callback(future):
+        if future.exception():
+            print(f"⚠️ Variantes de {key} impossibles : {future.exception()}")
+    return callback
+
+
+def enqueue_variants(key: str, kind: str):
+    """Après un envoi : variantes WebP calculées en arrière-plan."""
+    variant_pool.generate(key, kind, "webp").add_done_callback(_log_failure(key))
+
+
+def delete_variants(key: str, kind: str):
+    """L'original a changé sous la même clé (avatar remplacé) : variantes périmées."""
+    storage = get_storage()
+    for ext in FORMATS:
+        for size in SIZES[kind]:
+            storage.delete(variant_key(key, size, ext))
+
+
+def variant_for(key: str, kind: str, size: int, accept=None):
+    """
+    Clé et type de la variante demandée, générée à la première
+    demande si besoin. Bloquante : hors de la boucle d'événements.
+    """
+    size, ext = pick_size(kind, size), pick_format(accept)
+    target = variant_key(key, size, ext)
+    storage = get_storage()
+    if not storage.exists(target):
+        if not storage.exists(key):
+            raise HTTPException(status_code=404, detail="Fichier introuvable.")
+        try:
+            variant_pool.generate(key, kind, ext).result()
+        except ValueError:
+            raise HTTPException(status_code=415, detail="Aperçu indisponible : le fichier n'est pas une image.")
+    return target, size, ext
@@ -0,0 +1,101 @@
+# app/services/vues.py
+# =====================================================
+# Compteur de vues en écriture différée (write-behind).
+# Les lectures de notes accumulent les vues en mémoire
+# (par worker) ; un thread les reporte périodiquement
+# en base par lots :
+#   UPDATE notes SET nb_vues = nb_vues + :n WHERE id = :id
+# et alimentent le score de tendance et les statistiques
+# d'équipe dans la même transaction.
+# =====================================================
+
+import threading
+from collections import Counter, defaultdict
+
+from sqlalchemy import bindparam, func, select
+
+from app.models.note import Note
+from app.services.trending import record_trending
+from app.services.stats import record_stats
+
+notes_table = Note.__table__
+
+_increment_stmt = (
+    notes_table.update()
+    .where(notes_table.c.id == bindparam("b_id"))
+    .values(nb_vues=func.coalesce(notes_table.c.nb_vues, 0) + bindparam("b_n"))
+)
+
+
+class ViewCounterBuffer:
+    def __init__(self):
+        # engine → Counter(note_id → vues en attente)
+        self._pending = defaultdict(Counter)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # -------------------------------------------------------
+    # 🔹 Accumulation
+    # -------------------------------------------------------
+    def record(self, bind, note_id: int, n: int = 1):
+        with self._lock:
+            self._pending[bind][note_id] += n
+
+    def pending(self, note_id: int) -> int:
+        with self._lock:
+            return sum(counts.get(note_id, 0) for counts in self._pending.values())
+
+    # -------------------------------------------------------
+    # 🔹 Report en base
+    # -------------------------------------------------------
+    def flush(self) -> int:
+        """Reporte toutes les vues en attente ; retourne le nombre de vues écrites."""
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(Counter)
+
+        written = 0
+        for bind, counts in pending.items():
+            # Ordre des ids stable → pas d'interblocage entre workers
+            rows = [{"b_id": note_id, "b_n": n} for note_id, n in sorted(counts.items())]
+            try:
+                with bind.begin() as conn:
+                    conn.execute(_increment_stmt, rows)
+                    # notes supprimées entre la lecture et le report : ignorées
+                    equipes = dict(conn.execute(
+                        select(notes_table.c.id, notes_table.c.equipe).where(notes_table.c.id.in_(counts))
+                    ).all())
+                    record_trending(conn, [(note_id, "view", n) for note_id, n in counts.items() if note_id in equipes])
+                    record_stats(conn, [(equipes[note_id], None, {"vues": n}) for note_id, n in counts.items() if note_id in equipes])
+            except Exception as e:
+                print(f"⚠️ Report des vues impossible, nouvel essai au prochain cycle : {e}")
+                with self._lock:
+                    self._pending[bind].update(counts)
+                continue
+            written += sum(counts.values())
+        return written
+
+    # -------------------------------------------------------
+    # 🔹 Thread de report périodique
+    # -------------------------------------------------------
+    def start(self, interval: float):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="view-counter-flush", daemon=True)
+        self._thread.start()
+
+    def _run(self, interval: float):
+        while not self._stop.wait(interval):
+            self.flush()
+
+    def stop(self):
+        """Arrête le thread et reporte les vues restantes (arrêt de l'application)."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+
+view_counter = ViewCounterBuffer()
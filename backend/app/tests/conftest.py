@@ -18,12 +18,18 @@ from app import emails
 from app.models.utilisateur import Utilisateur
 from app.auth import hash_password, get_current_user as auth_dep
 from app.config import settings
+from app.services.notes import invalidate_notes_cache
+from app.services.resumes import clear_summary_cache
+from app.services.related import related_index
+from app.services.doublons import duplicate_index
 
 
 # ==========================================================
 # ✅ MODE TEST
 # ==========================================================
 os.environ["TESTING"] = "1"
+settings.RELATED_INDEX_PATH = ""  # pas d'instantané des index en test
+settings.DUPLICATE_INDEX_PATH = ""
 
 
 # ==========================================================
@@ -195,6 +201,10 @@ def reset_db():
     Base.metadata.create_all(bind=engine)
 
     current_test_user.clear()
+    invalidate_notes_cache()
+    clear_summary_cache()
+    related_index.reset()
+    duplicate_index.reset()
 
     yield
 
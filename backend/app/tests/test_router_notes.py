@@ -3,6 +3,7 @@ import pytest
 from fastapi.testclient import TestClient
 from app.main import app
 from app.tests.conftest import TestingSessionLocal, debug_dump_db, current_test_user
+from app.config import settings
 
 client = TestClient(app)
 
@@ -116,3 +117,625 @@ def test_get_note_not_found(client):
     r = client.get("/notes/999")
     assert r.status_code == 404
 
+
+
+# -----------------------------------------------------------------
+# ✅ TEST RECHERCHE PLEIN TEXTE
+# -----------------------------------------------------------------
+def test_search_notes_fulltext_accents(client, create_test_user):
+    client.post("/notes/", json={"titre": "Réunion d'équipe", "contenu": "Préparer le budget", "auteur_id": create_test_user["id"]})
+    client.post("/notes/", json={"titre": "Autre", "contenu": "Rien à voir", "auteur_id": create_test_user["id"]})
+
+    r = client.get("/notes/", params={"search": "reunion"})
+    assert r.status_code == 200
+    assert r.json()["total"] == 1
+    assert r.json()["notes"][0]["titre"] == "Réunion d'équipe"
+
+    # 🔤 préfixe + mots multiples
+    r = client.get("/notes/", params={"search": "prépa budg"})
+    assert r.json()["total"] == 1
+
+
+def test_search_notes_relevance_sort(client, create_test_user):
+    uid = create_test_user["id"]
+    client.post("/notes/", json={"titre": "Divers", "contenu": "on parle un peu de serveur ici", "auteur_id": uid})
+    client.post("/notes/", json={"titre": "Serveur", "contenu": "migration du serveur de fichiers", "auteur_id": uid})
+
+    r = client.get("/notes/", params={"search": "serveur", "sort": "relevance"})
+    titres = [n["titre"] for n in r.json()["notes"]]
+    assert titres == ["Serveur", "Divers"]
+
+
+def test_search_notes_index_follows_update_and_delete(client, create_test_user):
+    uid = create_test_user["id"]
+    note_id = client.post("/notes/", json={"titre": "Ancien", "contenu": "texte initial", "auteur_id": uid}).json()["id"]
+
+    client.put(f"/notes/{note_id}", data={"titre": "Nouveau", "contenu": "texte révisé"})
+    assert client.get("/notes/", params={"search": "initial"}).json()["total"] == 0
+    assert client.get("/notes/", params={"search": "revise"}).json()["total"] == 1
+
+    client.delete(f"/notes/{note_id}")
+    assert client.get("/notes/", params={"search": "revise"}).json()["total"] == 0
+
+
+def test_search_notes_ignores_fts_syntax(client, create_test_user):
+    client.post("/notes/", json={"titre": "Plan", "contenu": "OR NEAR", "auteur_id": create_test_user["id"]})
+    r = client.get("/notes/", params={"search": '"plan" OR ('})
+    assert r.status_code == 200
+    assert r.json()["total"] == 1
+
+
+# -----------------------------------------------------------------
+# ✅ TEST PAGINATION PAR CURSEUR
+# -----------------------------------------------------------------
+def _pages_par_curseur(client, **params):
+    ids, cursor = [], ""
+    while cursor is not None:
+        r = client.get("/notes/", params={**params, "cursor": cursor, "limit": 2})
+        assert r.status_code == 200
+        body = r.json()
+        assert body["total"] is None
+        ids += [n["id"] for n in body["notes"]]
+        cursor = body["next_cursor"]
+    return ids
+
+
+def test_list_notes_cursor_desc_and_asc(client, create_test_user):
+    # Notes créées dans la même seconde → l'id départage
+    created = [
+        client.post("/notes/", json={"titre": f"N{i}", "contenu": "c", "auteur_id": create_test_user["id"]}).json()["id"]
+        for i in range(5)
+    ]
+
+    assert _pages_par_curseur(client) == sorted(created, reverse=True)
+    assert _pages_par_curseur(client, sort="date_asc") == sorted(created)
+
+
+def test_list_notes_cursor_stable_with_concurrent_insert(client, create_test_user):
+    uid = create_test_user["id"]
+    for i in range(4):
+        client.post("/notes/", json={"titre": f"N{i}", "contenu": "c", "auteur_id": uid})
+
+    first = client.get("/notes/", params={"cursor": "", "limit": 2}).json()
+    client.post("/notes/", json={"titre": "Nouvelle", "contenu": "c", "auteur_id": uid})
+    second = client.get("/notes/", params={"cursor": first["next_cursor"], "limit": 2}).json()
+
+    first_ids = {n["id"] for n in first["notes"]}
+    assert not first_ids & {n["id"] for n in second["notes"]}
+    assert "Nouvelle" not in [n["titre"] for n in second["notes"]]
+
+
+def test_list_notes_invalid_cursor(client, create_test_user):
+    r = client.get("/notes/", params={"cursor": "pas-un-curseur"})
+    assert r.status_code == 400
+    # base64 valide, JSON qui n'est pas un objet ("abc", [1])
+    for cursor in ("ImFiYyI", "WzFd"):
+        r = client.get("/notes/", params={"cursor": cursor})
+        assert r.status_code == 400 and r.json()["detail"] == "Curseur invalide"
+
+
+# -----------------------------------------------------------------
+# ✅ TEST MODES DE COMPTAGE
+# -----------------------------------------------------------------
+def test_list_notes_count_none(client, create_test_user):
+    client.post("/notes/", json={"titre": "A", "contenu": "B", "auteur_id": create_test_user["id"]})
+    r = client.get("/notes/", params={"count": "none"})
+    assert r.status_code == 200
+    assert r.json()["total"] is None
+    assert len(r.json()["notes"]) == 1
+
+
+def test_list_notes_count_exact_cached_and_invalidated(client, create_test_user):
+    from app.models.note import Note
+
+    uid = create_test_user["id"]
+    client.post("/notes/", json={"titre": "A", "contenu": "B", "auteur_id": uid})
+    assert client.get("/notes/").json()["total"] == 1
+
+    # Écriture hors service → le total en cache est conservé
+    db = TestingSessionLocal()
+    db.add(Note(titre="Hors API", contenu="x", auteur_id=uid))
+    db.commit()
+    db.close()
+    assert client.get("/notes/").json()["total"] == 1
+
+    # Création via l'API → cache invalidé
+    client.post("/notes/", json={"titre": "C", "contenu": "D", "auteur_id": uid})
+    assert client.get("/notes/").json()["total"] == 3
+
+
+def test_list_notes_count_estimate_falls_back_to_exact_on_sqlite(client, create_test_user):
+    client.post("/notes/", json={"titre": "A", "contenu": "B", "auteur_id": create_test_user["id"]})
+    body = client.get("/notes/", params={"count": "estimate"}).json()
+    assert body["total"] == 1
+    assert body["total_estimated"] is False
+
+
+def test_list_notes_count_invalid(client):
+    assert client.get("/notes/", params={"count": "parfois"}).status_code == 422
+
+
+# -----------------------------------------------------------------
+# ✅ TEST VUE RÉSUMÉ
+# -----------------------------------------------------------------
+def test_list_notes_summary_view(client, create_test_user, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    files = [("fichiers", ("a.txt", b"a", "text/plain")), ("fichiers", ("b.txt", b"b", "text/plain"))]
+    client.post("/notes/", data={"titre": "Avec fichiers", "contenu": "x" * 500}, files=files)
+    client.post("/notes/", json={"titre": "Sans fichier", "contenu": "court", "auteur_id": create_test_user["id"]})
+
+    r = client.get("/notes/", params={"view": "summary", "sort": "date_asc"})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["total"] == 2
+
+    first, second = body["notes"]
+    assert set(first) == {
+        "id", "titre", "extrait", "equipe", "categorie", "priorite", "likes", "nb_vues",
+        "created_at", "updated_at", "auteur_id", "auteur_nom", "nb_fichiers",
+    }
+    assert first["nb_fichiers"] == 2 and len(first["extrait"]) == 200
+    assert second["nb_fichiers"] == 0
+    assert second["auteur_nom"] == create_test_user["nom"]
+
+
+def test_list_notes_summary_view_with_author_filter_and_cursor(client, create_test_user):
+    for i in range(3):
+        client.post("/notes/", json={"titre": f"N{i}", "contenu": "c", "auteur_id": create_test_user["id"]})
+
+    r = client.get("/notes/", params={"view": "summary", "author": create_test_user["nom"], "cursor": "", "limit": 2})
+    body = r.json()
+    assert [n["titre"] for n in body["notes"]] == ["N2", "N1"]
+
+    r = client.get("/notes/", params={"view": "summary", "author": create_test_user["nom"], "cursor": body["next_cursor"], "limit": 2})
+    assert [n["titre"] for n in r.json()["notes"]] == ["N0"]
+    assert r.json()["next_cursor"] is None
+
+
+def test_list_notes_full_view_unchanged(client, create_test_user):
+    client.post("/notes/", json={"titre": "A", "contenu": "B", "auteur_id": create_test_user["id"]})
+    note = client.get("/notes/").json()["notes"][0]
+    assert note["contenu"] == "B"
+    assert "extrait" not in note
+
+
+# -----------------------------------------------------------------
+# ✅ TEST FACETTES
+# -----------------------------------------------------------------
+def _facette(body, nom):
+    return {v["valeur"]: v["total"] for v in body[nom]}
+
+
+def test_note_facets(client, create_test_user):
+    uid = create_test_user["id"]
+    for titre, equipe, categorie, priorite in [
+        ("Budget 2025", "Dev", "finance", "haute"),
+        ("Budget QA", "QA", "finance", "basse"),
+        ("Sprint", "Dev", None, "haute"),
+    ]:
+        client.post("/notes/", json={"titre": titre, "contenu": "c", "auteur_id": uid,
+                                     "equipe": equipe, "categorie": categorie, "priorite": priorite})
+
+    body = client.get("/notes/facets").json()
+    assert _facette(body, "equipe") == {"Dev": 2, "QA": 1}
+    assert _facette(body, "categorie") == {"finance": 2, None: 1}
+    assert _facette(body, "priorite") == {"haute": 2, "basse": 1}
+    assert body["auteur"] == [{"valeur": uid, "libelle": create_test_user["nom"], "total": 3}]
+
+    # 🔍 facettes de la recherche courante + filtre exact
+    body = client.get("/notes/facets", params={"search": "budget", "equipe": "Dev"}).json()
+    assert _facette(body, "priorite") == {"haute": 1}
+
+
+def test_note_facets_cache_invalidated_on_create(client, create_test_user):
+    uid = create_test_user["id"]
+    client.post("/notes/", json={"titre": "A", "contenu": "c", "auteur_id": uid, "equipe": "Dev"})
+    assert _facette(client.get("/notes/facets").json(), "equipe") == {"Dev": 1}
+
+    client.post("/notes/", json={"titre": "B", "contenu": "c", "auteur_id": uid, "equipe": "Dev"})
+    assert _facette(client.get("/notes/facets").json(), "equipe") == {"Dev": 2}
+
+
+def test_list_notes_filter_by_facet_values(client, create_test_user):
+    uid = create_test_user["id"]
+    client.post("/notes/", json={"titre": "A", "contenu": "c", "auteur_id": uid, "equipe": "Dev", "priorite": "haute"})
+    client.post("/notes/", json={"titre": "B", "contenu": "c", "auteur_id": uid, "equipe": "QA", "priorite": "haute"})
+
+    r = client.get("/notes/", params={"equipe": "QA", "priorite": "haute"})
+    assert [n["titre"] for n in r.json()["notes"]] == ["B"]
+
+
+# -----------------------------------------------------------------
+# ✅ TEST EXPORT EN FLUX
+# -----------------------------------------------------------------
+def test_export_notes_ndjson(client, create_test_user, tmp_path, monkeypatch):
+    import json
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr("app.services.notes.EXPORT_BATCH_SIZE", 2)
+
+    files = [("fichiers", ("a.txt", b"a", "text/plain"))]
+    client.post("/notes/", data={"titre": "Avec fichier", "contenu": "x"}, files=files)
+    for i in range(4):
+        client.post("/notes/", json={"titre": f"N{i}", "contenu": "c", "auteur_id": create_test_user["id"]})
+
+    r = client.get("/notes/export", params={"format": "ndjson", "sort": "date_asc"})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert [row["titre"] for row in rows] == ["Avec fichier", "N0", "N1", "N2", "N3"]
+    assert rows[0]["nb_fichiers"] == 1 and rows[1]["nb_fichiers"] == 0
+    assert rows[1]["auteur_nom"] == create_test_user["nom"]
+
+
+def test_export_notes_csv_with_filters(client, create_test_user):
+    import csv, io
+    uid = create_test_user["id"]
+    client.post("/notes/", json={"titre": "Budget", "contenu": "ligne 1\nligne 2", "auteur_id": uid, "equipe": "Dev"})
+    client.post("/notes/", json={"titre": "Autre", "contenu": "c", "auteur_id": uid, "equipe": "QA"})
+
+    r = client.get("/notes/export", params={"format": "csv", "equipe": "Dev"})
+    assert r.status_code == 200
+    assert "attachment" in r.headers["content-disposition"]
+
+    rows = list(csv.DictReader(io.StringIO(r.text)))
+    assert len(rows) == 1
+    assert rows[0]["titre"] == "Budget"
+    assert rows[0]["contenu"] == "ligne 1\nligne 2"
+
+
+# -----------------------------------------------------------------
+# ✅ TEST CRÉATION EN LOT
+# -----------------------------------------------------------------
+def test_bulk_create_notes(client, create_test_user):
+    uid = create_test_user["id"]
+    payload = [
+        {"titre": "Lot 1", "contenu": "a", "auteur_id": uid, "equipe": "QA"},
+        {"contenu": "sans titre"},
+        {"titre": "Lot 2", "contenu": "b"},
+        {"titre": "Lot 3", "contenu": "c", "auteur_id": 424242},
+    ]
+    r = client.post("/notes/bulk", json=payload)
+    assert r.status_code == 200
+    body = r.json()
+    assert body["created"] == 2
+
+    results = body["results"]
+    assert [res["index"] for res in results] == [0, 1, 2, 3]
+    assert results[0]["id"] and results[2]["id"] and results[0]["id"] != results[2]["id"]
+    assert results[1]["id"] is None and "titre" in results[1]["errors"][0]
+    assert results[3]["id"] is None and "auteur_id" in results[3]["errors"][0]
+
+    created = client.get(f"/notes/{results[2]['id']}").json()
+    assert created["titre"] == "Lot 2"
+    assert created["auteur"]["id"] == uid
+    assert created["likes"] == 0
+
+    # 🔍 les notes du lot sont indexées et comptées
+    assert client.get("/notes/", params={"search": "lot"}).json()["total"] == 2
+
+
+def test_bulk_create_notes_too_large(client, create_test_user, monkeypatch):
+    from app.config import settings
+    monkeypatch.setattr(settings, "NOTES_BULK_MAX_ITEMS", 2)
+    r = client.post("/notes/bulk", json=[{"titre": "t", "contenu": "c"}] * 3)
+    assert r.status_code == 413
+
+
+# -----------------------------------------------------------------
+# ✅ TEST LIKES IDEMPOTENTS
+# -----------------------------------------------------------------
+def test_like_note_is_idempotent_per_user(client, create_test_user):
+    note_id = client.post("/notes/", json={"titre": "L", "contenu": "c", "auteur_id": create_test_user["id"]}).json()["id"]
+
+    assert client.post(f"/notes/{note_id}/like").json() == {"likes": 1, "liked": True}
+    assert client.post(f"/notes/{note_id}/like").json() == {"likes": 1, "liked": True}
+
+    assert client.delete(f"/notes/{note_id}/like").json() == {"likes": 0, "liked": False}
+    assert client.delete(f"/notes/{note_id}/like").json() == {"likes": 0, "liked": False}
+
+
+def test_like_note_not_found(client, create_test_user):
+    assert client.post("/notes/9999/like").status_code == 404
+    assert client.delete("/notes/9999/like").status_code == 404
+
+
+# -----------------------------------------------------------------
+# ✅ TEST RÉSUMÉS EN ARRIÈRE-PLAN
+# -----------------------------------------------------------------
+LONG_CONTENU = "Compte rendu de la réunion hebdomadaire de l'équipe. " * 5
+
+
+def test_note_summary_generated_in_background(client, create_test_user):
+    from app.services.resumes import summary_pool
+
+    note_id = client.post("/notes/", json={"titre": "R", "contenu": LONG_CONTENU, "auteur_id": create_test_user["id"]}).json()["id"]
+    summary_pool.drain()
+
+    detail = client.get(f"/notes/{note_id}").json()
+    assert detail["resume_status"] == "ready"
+    assert detail["resume_ia"].startswith("Résumé automatique")
+
+    # ✏️ contenu modifié → ancien résumé effacé puis recalculé
+    client.put(f"/notes/{note_id}", data={"titre": "R", "contenu": "Nouveau contenu. " * 10})
+    summary_pool.drain()
+    detail = client.get(f"/notes/{note_id}").json()
+    assert detail["resume_status"] == "ready"
+    assert "Nouveau contenu" in detail["resume_ia"]
+
+
+def test_note_detail_never_generates_summary(client, create_test_user, monkeypatch):
+    from app.services import resumes
+
+    queued = []
+    monkeypatch.setattr(resumes.summary_pool, "enqueue", lambda bind, note_id: queued.append(note_id))
+    monkeypatch.setattr(resumes, "generate_summaries", lambda texts: pytest.fail("résumé calculé pendant la requête"))
+
+    note_id = client.post("/notes/", json={"titre": "R", "contenu": LONG_CONTENU, "auteur_id": create_test_user["id"]}).json()["id"]
+    detail = client.get(f"/notes/{note_id}").json()
+    assert detail["resume_ia"] is None
+    assert detail["resume_status"] == "pending"
+    assert queued == [note_id, note_id]
+
+    short_id = client.post("/notes/", json={"titre": "C", "contenu": "court", "auteur_id": create_test_user["id"]}).json()["id"]
+    assert client.get(f"/notes/{short_id}").json()["resume_status"] == "none"
+
+
+def test_templated_notes_reuse_cached_summary(client, create_test_user, monkeypatch):
+    from app.services import resumes
+
+    calls = []
+    real = resumes.generate_summaries
+    monkeypatch.setattr(resumes, "generate_summaries", lambda texts: calls.append(len(texts)) or real(texts))
+
+    uid = create_test_user["id"]
+    first = client.post("/notes/", json={"titre": "T1", "contenu": LONG_CONTENU, "auteur_id": uid}).json()["id"]
+    resumes.summary_pool.drain()
+
+    # 📋 même contenu (gabarit) → résumé immédiat depuis le cache
+    second = client.post("/notes/", json={"titre": "T2", "contenu": LONG_CONTENU, "auteur_id": uid}).json()
+    assert second["resume_ia"] == client.get(f"/notes/{first}").json()["resume_ia"]
+
+    # ✏️ titre seul modifié → résumé conservé, aucun recalcul
+    client.put(f"/notes/{first}", data={"titre": "T1 bis", "contenu": LONG_CONTENU})
+    resumes.summary_pool.drain()
+    assert client.get(f"/notes/{first}").json()["resume_status"] == "ready"
+    assert calls == [1]
+
+
+# -----------------------------------------------------------------
+# ✅ TEST NOTES SIMILAIRES
+# -----------------------------------------------------------------
+def test_related_notes(client, create_test_user):
+    uid = create_test_user["id"]
+
+    def create(titre, contenu):
+        return client.post("/notes/", json={"titre": titre, "contenu": contenu, "auteur_id": uid}).json()["id"]
+
+    base = create("Migration PostgreSQL", "Planifier la migration de la base PostgreSQL vers la version 16")
+    proche = create("Base PostgreSQL", "Sauvegarde de la base PostgreSQL avant migration")
+    autre = create("Pique-nique", "Organisation du pique-nique annuel au parc")
+
+    r = client.get(f"/notes/{base}/related", params={"k": 5})
+    assert r.status_code == 200
+    related = r.json()
+    assert [n["id"] for n in related] == [proche]
+    assert 0 < related[0]["score"] <= 1 and related[0]["titre"] == "Base PostgreSQL"
+
+    # ✏️ modification → index mis à jour
+    client.put(f"/notes/{autre}", data={"titre": "Migration", "contenu": "Migration PostgreSQL terminée"})
+    assert {n["id"] for n in client.get(f"/notes/{base}/related").json()} == {proche, autre}
+
+    # 🗑️ suppression → retirée des résultats
+    client.delete(f"/notes/{proche}")
+    assert [n["id"] for n in client.get(f"/notes/{base}/related").json()] == [autre]
+
+
+def test_related_notes_not_found_and_invalid_k(client):
+    assert client.get("/notes/999999/related").status_code == 404
+    assert client.get("/notes/1/related", params={"k": 0}).status_code == 422
+
+
+# -----------------------------------------------------------------
+# ✅ TEST QUASI-DOUBLONS
+# -----------------------------------------------------------------
+DOUBLON = (
+    "Procédure de mise en production : geler la branche principale, lancer la suite de tests, "
+    "construire l'image, déployer sur la préproduction puis valider avec l'équipe QA avant la production."
+)
+
+
+def test_create_note_reports_near_duplicates(client, create_test_user):
+    uid = create_test_user["id"]
+    first = client.post("/notes/", json={"titre": "Mise en production", "contenu": DOUBLON, "auteur_id": uid}).json()
+    assert first["doublons_possibles"] == []
+
+    client.post("/notes/", json={"titre": "Pique-nique", "contenu": "Organisation du pique-nique annuel au parc", "auteur_id": uid})
+    second = client.post("/notes/", json={"titre": "Mise en production", "contenu": DOUBLON + " Merci.", "auteur_id": uid}).json()
+    doublons = second["doublons_possibles"]
+    assert [d["id"] for d in doublons] == [first["id"]]
+    assert 0.8 <= doublons[0]["similarite"] <= 1
+
+    # 🗑️ note supprimée → n'est plus proposée
+    client.delete(f"/notes/{first['id']}")
+    third = client.post("/notes/", json={"titre": "Mise en prod", "contenu": DOUBLON, "auteur_id": uid}).json()
+    assert [d["id"] for d in third["doublons_possibles"]] == [second["id"]]
+
+
+def test_duplicate_clusters_admin(client, create_test_user):
+    uid = create_test_user["id"]
+    ids = [client.post("/notes/", json={"titre": "Mise en production", "contenu": DOUBLON, "auteur_id": uid}).json()["id"] for _ in range(3)]
+    client.post("/notes/", json={"titre": "Autre", "contenu": "Compte rendu de la réunion budget", "auteur_id": uid})
+
+    r = client.get("/notes/doublons")
+    assert r.status_code == 200
+    body = r.json()
+    assert body["seuil"] == 0.8
+    assert [c["taille"] for c in body["clusters"]] == [3]
+    assert sorted(n["id"] for n in body["clusters"][0]["notes"]) == ids
+
+
+def test_duplicate_clusters_requires_admin(client, create_test_user):
+    current_test_user.update({"email": "user@test.com", "nom": "User", "type": "user", "equipe": "Dev"})
+    assert client.get("/notes/doublons").status_code == 403
+
+
+# -----------------------------------------------------------------
+# ✅ TEST SUGGESTION CATÉGORIE / PRIORITÉ
+# -----------------------------------------------------------------
+def test_suggest_categorie_priorite(client, tmp_path, monkeypatch):
+    from app.config import settings
+    from app.services.suggestions import save_models
+    from app.tests.test_service_suggestions import _train
+
+    monkeypatch.setattr(settings, "SUGGEST_MODEL_PATH", str(tmp_path / "model.npz"))
+    assert client.post("/notes/suggest", json={"contenu": "panne"}).status_code == 503
+
+    save_models(_train(), settings.SUGGEST_MODEL_PATH)
+    single = client.post("/notes/suggest", json={"titre": "Panne", "contenu": "incident serveur critique"})
+    assert single.status_code == 200
+    assert single.json()["categorie"]["valeur"] == "Incident"
+    assert single.json()["priorite"]["valeur"] == "Haute"
+    assert 0.5 < single.json()["categorie"]["confiance"] <= 1
+
+    batch = client.post("/notes/suggest", json=[{"contenu": "incident réseau"}, {"contenu": "pique-nique au parc"}] * 50)
+    assert batch.status_code == 200
+    assert [s["categorie"]["valeur"] for s in batch.json()[:2]] == ["Incident", "Social"]
+    assert len(batch.json()) == 100
+
+    monkeypatch.setattr(settings, "SUGGEST_MAX_BATCH", 10)
+    assert client.post("/notes/suggest", json=[{"contenu": "x"}] * 11).status_code == 413
+
+
+# -----------------------------------------------------------------
+# ✅ TEST NOTES TENDANCE
+# -----------------------------------------------------------------
+def test_trending_notes(client, create_test_user):
+    uid = create_test_user["id"]
+    ids = [client.post("/notes/", json={"titre": f"T{i}", "contenu": "c", "auteur_id": uid}).json()["id"] for i in range(3)]
+
+    client.post(f"/notes/{ids[0]}/like")
+    client.post(f"/notes/{ids[1]}/commentaires", json={"contenu": "Bravo", "auteur_id": uid})
+
+    r = client.get("/notes/trending")
+    assert r.status_code == 200
+    assert [n["id"] for n in r.json()] == [ids[1], ids[0]]
+    assert r.json()[0]["score"] > r.json()[1]["score"] > 0
+
+    # unlike : la note sort du classement
+    client.delete(f"/notes/{ids[0]}/like")
+    assert [n["id"] for n in client.get("/notes/trending").json()] == [ids[1]]
+    assert client.get("/notes/trending", params={"limit": 0}).status_code == 422
+
+
+# -----------------------------------------------------------------
+# ✅ TEST FIL D'ACTUALITÉ
+# -----------------------------------------------------------------
+def test_feed_lists_team_activity(client, create_test_user):
+    uid = create_test_user["id"]
+    note_id = client.post("/notes/", json={"titre": "Pour l'équipe", "contenu": "c", "equipe": "Dev", "auteur_id": uid}).json()["id"]
+    client.post("/notes/", json={"titre": "Ailleurs", "contenu": "c", "equipe": "QA", "auteur_id": uid})
+    client.post(f"/notes/{note_id}/commentaires", json={"contenu": "Merci", "auteur_id": uid})
+
+    r = client.get("/feed", params={"limit": 1})
+    assert r.status_code == 200
+    first = r.json()
+    assert len(first["items"]) == 1 and first["next_cursor"]
+
+    second = client.get("/feed", params={"limit": 1, "cursor": first["next_cursor"]}).json()
+    items = first["items"] + second["items"]
+    assert {(i["type"], i["titre"]) for i in items} == {("note", "Pour l'équipe"), ("commentaire", "Pour l'équipe")}
+    assert second["next_cursor"] is None
+
+
+# -----------------------------------------------------------------
+# ✅ TEST PIÈCES JOINTES EN FLUX
+# -----------------------------------------------------------------
+def test_note_attachments_hash_size_and_limit(client, create_test_user, tmp_path, monkeypatch):
+    import hashlib
+
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    data = b"contenu du rapport" * 1000
+    r = client.post("/notes/", data={"titre": "Rapport", "contenu": "x"}, files=[("fichiers", ("rapport.pdf", data, "application/pdf"))])
+    assert r.status_code == 200
+    fichier = client.get(f"/notes/{r.json()['id']}").json()["fichiers"][0]
+    assert fichier["taille"] == len(data)
+    assert fichier["sha256"] == hashlib.sha256(data).hexdigest()
+
+    monkeypatch.setattr(settings, "UPLOAD_MAX_BYTES", 1000)
+    r = client.post("/notes/", data={"titre": "Trop gros", "contenu": "x"}, files=[("fichiers", ("gros.bin", data, "application/octet-stream"))])
+    assert r.status_code == 413
+    assert [n["titre"] for n in client.get("/notes/").json()["notes"]] == ["Rapport"]
+
+
+def test_note_attachments_share_content_addressed_blobs(client, create_test_user, tmp_path, monkeypatch):
+    from app.tests.conftest import TestingSessionLocal
+    from app.models.fichier import BlobFichier
+
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    files = [("fichiers", ("rapport.pdf", b"%PDF identique", "application/pdf"))]
+    first = client.post("/notes/", data={"titre": "A", "contenu": "x"}, files=files).json()
+    second = client.post("/notes/", data={"titre": "B", "contenu": "x"}, files=files).json()
+
+    a, b = first["fichiers"][0], second["fichiers"][0]
+    assert a["chemin"] == b["chemin"] and a["nom_fichier"] == b["nom_fichier"] == "rapport.pdf"
+    with TestingSessionLocal() as db:
+        assert db.get(BlobFichier, a["sha256"]).nb_references == 2
+
+    client.delete(f"/notes/fichiers/{a['id']}")
+    client.delete(f"/notes/{second['id']}")
+    with TestingSessionLocal() as db:
+        assert db.get(BlobFichier, a["sha256"]).nb_references == 0
+
+
+# -----------------------------------------------------------------
+# ✅ TEST TÉLÉCHARGEMENT (ETag, 304, Range)
+# -----------------------------------------------------------------
+def test_download_attachment_conditional_and_range(client, create_test_user, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    data = bytes(range(256)) * 40
+    note = client.post("/notes/", data={"titre": "PDF", "contenu": "x"}, files=[("fichiers", ("doc.pdf", data, "application/pdf"))]).json()
+    fichier = note["fichiers"][0]
+    assert fichier["url"] == f"/notes/fichiers/{fichier['id']}?v={fichier['sha256']}"
+
+    r = client.get(f"/notes/fichiers/{fichier['id']}")
+    assert r.status_code == 200 and r.content == data
+    assert r.headers["etag"] == f'"{fichier["sha256"]}"'
+    assert r.headers["accept-ranges"] == "bytes"
+    assert r.headers["cache-control"] == "no-cache"
+    assert r.headers["content-type"] == "application/pdf"
+
+    assert client.get(fichier["url"]).headers["cache-control"] == "public, max-age=31536000, immutable"
+
+    r = client.get(f"/notes/fichiers/{fichier['id']}", headers={"If-None-Match": r.headers["etag"]})
+    assert r.status_code == 304 and r.content == b""
+
+    r = client.get(f"/notes/fichiers/{fichier['id']}", headers={"Range": "bytes=100-199"})
+    assert r.status_code == 206 and r.content == data[100:200]
+    assert r.headers["content-range"] == f"bytes 100-199/{len(data)}"
+
+    assert client.get("/notes/fichiers/9999").status_code == 404
+
+
+def test_download_image_attachment_preview(client, create_test_user, tmp_path, monkeypatch):
+    import io
+    from PIL import Image
+
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    image = io.BytesIO()
+    Image.new("RGB", (2000, 1500), "green").save(image, format="JPEG")
+    note = client.post("/notes/", data={"titre": "Photo", "contenu": "x"}, files=[("fichiers", ("photo.jpg", image.getvalue(), "image/jpeg"))]).json()
+    fichier = note["fichiers"][0]
+
+    r = client.get(f"{fichier['url']}&size=600", headers={"Accept": "image/webp"})
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "image/webp" and r.headers["vary"] == "Accept"
+    assert r.headers["etag"] == f'"{fichier["sha256"]}~640.webp"'
+    assert r.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert Image.open(io.BytesIO(r.content)).size == (640, 480)
+
+    r = client.get(f"/notes/fichiers/{fichier['id']}?size=600", headers={"Accept": "image/webp", "If-None-Match": r.headers["etag"]})
+    assert r.status_code == 304
+
+    pdf = client.post("/notes/", data={"titre": "PDF", "contenu": "x"}, files=[("fichiers", ("doc.pdf", b"%PDF-1.4", "application/pdf"))]).json()
+    assert client.get(f"/notes/fichiers/{pdf['fichiers'][0]['id']}?size=320").status_code == 415
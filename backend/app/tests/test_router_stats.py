@@ -0,0 +1,24 @@
+# app/tests/test_router_stats.py
+from app.tests.conftest import current_test_user
+
+
+def test_stats_overview(client, create_test_user):
+    uid = create_test_user["id"]
+    note_id = client.post("/notes/", json={"titre": "N", "contenu": "c", "equipe": "Dev", "auteur_id": uid}).json()["id"]
+    client.post(f"/notes/{note_id}/commentaires", json={"contenu": "Bravo", "auteur_id": uid})
+    client.post(f"/notes/{note_id}/like")
+
+    r = client.get("/stats/overview", params={"jours": 7})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["jours"] == 7
+    dev = next(e for e in body["equipes"] if e["equipe"] == "Dev")
+    assert (dev["notes"], dev["commentaires"], dev["likes"]) == (1, 1, 1)
+    assert dev["top_auteurs"][0]["auteur_id"] == uid
+    assert body["totaux"]["notes"] == 1
+
+
+def test_stats_overview_requires_admin(client, create_test_user):
+    current_test_user.update({"email": "user@test.com", "nom": "User", "type": "user", "equipe": "Dev"})
+    assert client.get("/stats/overview").status_code == 403
+    assert client.get("/stats/overview", params={"jours": 0}).status_code == 422
@@ -115,4 +115,38 @@ def test_create_user_email_duplicate(client):
 # Get user not found
 def test_get_user_not_found(client):
     r = client.get("/utilisateurs/9999")
-    assert r.status_code == 404
\ No newline at end of file
+    assert r.status_code == 404
+
+def test_avatar_thumbnails_router(client, create_test_user, tmp_path, monkeypatch):
+    import hashlib
+    import io
+    from PIL import Image
+    from app.config import settings
+    from app.services.vignettes import variant_pool
+
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    photo = io.BytesIO()
+    Image.new("RGB", (800, 600), "blue").save(photo, format="PNG")
+    user_id = create_test_user["id"]
+
+    r = client.post(f"/utilisateurs/{user_id}/avatar", files={"file": ("photo.png", photo.getvalue(), "image/png")})
+    assert r.status_code == 200
+    # URL de l'API versionnée par le contenu : mise en cache immuable
+    avatar_url = r.json()["avatar_url"]
+    assert avatar_url == f"/utilisateurs/{user_id}/avatar?v={hashlib.sha256(photo.getvalue()).hexdigest()}"
+    r = client.get(avatar_url)
+    assert r.content == photo.getvalue() and "immutable" in r.headers["cache-control"]
+    variant_pool.drain()  # vignettes WebP calculées après l'envoi
+    assert (tmp_path / "avatars" / f"user_{user_id}_photo.png~64.webp").exists()
+
+    r = client.get(f"/utilisateurs/{user_id}/avatar?size=40", headers={"Accept": "image/webp,*/*"})
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "image/webp" and r.headers["vary"] == "Accept"
+    assert Image.open(io.BytesIO(r.content)).size == (64, 64)
+
+    # JPEG calculé à la première demande pour un client sans WebP
+    r = client.get(f"/utilisateurs/{user_id}/avatar?size=256", headers={"Accept": "image/*"})
+    assert r.headers["content-type"] == "image/jpeg"
+    assert Image.open(io.BytesIO(r.content)).size == (256, 256)
+
+    assert client.get(f"/utilisateurs/{user_id}/avatar").content == photo.getvalue()
@@ -0,0 +1,31 @@
+# app/tests/test_schema.py
+from sqlalchemy import create_engine, inspect
+
+from app.db import Base
+from app.schema import upgrade_schema
+
+
+def _columns(engine, table):
+    return {col["name"] for col in inspect(engine).get_columns(table)}
+
+
+def test_upgrade_schema_adds_missing_columns_once():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    # Base créée avant l'ajout des colonnes
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ALTER TABLE notes DROP COLUMN contenu_hash")
+        conn.exec_driver_sql("DROP TABLE fichiers_notes")
+        conn.exec_driver_sql(
+            "CREATE TABLE fichiers_notes (id INTEGER PRIMARY KEY, nom_fichier VARCHAR(255) NOT NULL, "
+            "chemin VARCHAR(255) NOT NULL, note_id INTEGER REFERENCES notes (id) ON DELETE CASCADE)"
+        )
+    assert "contenu_hash" not in _columns(engine, "notes")
+
+    for _ in range(2):  # idempotent
+        with engine.begin() as conn:
+            upgrade_schema(conn)
+    assert "contenu_hash" in _columns(engine, "notes")
+    assert {"taille", "sha256"} <= _columns(engine, "fichiers_notes")
+    assert "idx_fichier_sha256" in {index["name"] for index in inspect(engine).get_indexes("fichiers_notes")}
+    assert {fk["referred_table"] for fk in inspect(engine).get_foreign_keys("fichiers_notes")} == {"notes", "fichiers_blobs"}
@@ -0,0 +1,77 @@
+# app/tests/test_service_doublons.py
+import numpy as np
+from app.tests.conftest import TestingSessionLocal
+from app.models.note import Note
+from app.services.doublons import DuplicateIndex, jaccard_estimate, minhash_signature
+
+TEXTE = " ".join(f"mot{i}" for i in range(200))
+
+
+def _shingles(text, size=3):
+    words = text.split()
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def test_minhash_estimates_jaccard():
+    autre = TEXTE.replace("mot50 ", "x ").replace("mot150 ", "y ")
+    a, b = _shingles(TEXTE), _shingles(autre)
+    exact = len(a & b) / len(a | b)
+    estimate = jaccard_estimate(minhash_signature("", TEXTE), minhash_signature("", autre))
+    assert abs(estimate - exact) < 0.1
+    # accents et casse ignorés, signature stable
+    assert np.array_equal(minhash_signature("Élève", "Réunion"), minhash_signature("eleve", "reunion"))
+    assert minhash_signature("", "") is None
+
+
+def test_index_similar_and_clusters():
+    index = DuplicateIndex()
+    index.ready = True
+    index.upsert(1, "t", TEXTE)
+    index.upsert(2, "t", TEXTE + " fin")
+    index.upsert(3, "t", " ".join(f"autre{i}" for i in range(200)))
+    index.upsert(4, "t", " ".join(f"autre{i}" for i in range(200)))
+
+    assert [i for i, _ in index.similar(1, 0.8)] == [2]
+    assert index.clusters(0.8) == [[1, 2], [3, 4]]
+
+    index.remove(2)
+    index.upsert(4, "t", "contenu complètement différent")
+    assert index.similar(1, 0.8) == []
+    assert index.clusters(0.8) == []
+
+
+def test_snapshot_reload_indexes_notes_missing_below_last_id(tmp_path):
+    db = TestingSessionLocal()
+    notes = [Note(titre="t", contenu=TEXTE), Note(titre="t", contenu=TEXTE + " fin"), Note(titre="t", contenu="autre")]
+    db.add_all(notes)
+    db.commit()
+    path = str(tmp_path / "doublons.npz")
+    index = DuplicateIndex()
+    index.build(db.get_bind())
+    # Note validée après l'instantané malgré un id plus petit
+    index.remove(notes[1].id)
+    index.save(path)
+
+    reloaded = DuplicateIndex()
+    assert reloaded.load(path, db.get_bind())
+    assert [i for i, _ in reloaded.similar(notes[0].id, 0.8)] == [notes[1].id]
+    db.close()
+
+
+def test_catch_up_applies_writes_from_other_workers():
+    db = TestingSessionLocal()
+    notes = [Note(titre="t", contenu=TEXTE), Note(titre="t", contenu="autre")]
+    db.add_all(notes)
+    db.commit()
+    index = DuplicateIndex()
+    index.build(db.get_bind())
+
+    # Écritures d'un autre worker : une note modifiée en doublon, une créée
+    db.query(Note).filter(Note.id == notes[1].id).update({"contenu": TEXTE + " fin"})
+    copie = Note(titre="t", contenu=TEXTE + " copie")
+    db.add(copie)
+    db.commit()
+
+    index.catch_up(db.get_bind())
+    assert {i for i, _ in index.similar(notes[0].id, 0.8)} == {notes[1].id, copie.id}
+    db.close()
@@ -0,0 +1,91 @@
+# app/tests/test_service_feed.py
+import pytest
+from fastapi import HTTPException
+from app.tests.conftest import TestingSessionLocal
+from app.config import settings
+from app.models.feed import FeedItem
+from app.models.utilisateur import Utilisateur
+from app.schemas.schemas import CommentaireCreate
+from app.services.commentaires import add_commentaire_service
+from app.services.feed import feed_service
+from app.services.notes import bulk_create_notes_service, create_note_service, delete_note_service
+
+
+@pytest.fixture
+def db():
+    db = TestingSessionLocal()
+    for nom, equipe in [("Alice", "Dev"), ("Bob", "Dev"), ("Chloé", "QA")]:
+        db.add(Utilisateur(nom=nom, email=f"{nom}@test.com", mot_de_passe="12345678", type="user", equipe=equipe))
+    db.commit()
+    yield db
+    db.close()
+
+
+def _user(db, nom):
+    return db.query(Utilisateur).filter(Utilisateur.nom == nom).first()
+
+
+def _populate(db):
+    alice, chloe = _user(db, "Alice"), _user(db, "Chloé")
+    first = create_note_service("Dev 1", "contenu", alice.id, None, None, None, [], db, alice)
+    create_note_service("QA 1", "contenu", chloe.id, None, None, None, [], db, chloe)
+    bulk_create_notes_service([{"titre": f"Dev lot {i}", "contenu": "c"} for i in range(3)], db, alice)
+    add_commentaire_service(first.id, CommentaireCreate(contenu="Bien vu", auteur_id=chloe.id), db)
+    return first
+
+
+def _all_pages(db, user, limit):
+    items, cursor = [], ""
+    while True:
+        page = feed_service(db, user, cursor=cursor, limit=limit)
+        items += page["items"]
+        cursor = page["next_cursor"]
+        if not cursor:
+            return items
+
+
+def test_fan_out_on_write(db):
+    first = _populate(db)
+    bob = _user(db, "Bob")
+
+    # 4 notes + 1 commentaire de l'équipe Dev, pour chacun des 2 membres
+    assert db.query(FeedItem).filter(FeedItem.user_id == bob.id).count() == 5
+    assert db.query(FeedItem).count() == 10 + 1  # + la note QA pour Chloé
+
+    items = _all_pages(db, bob, limit=2)
+    assert len(items) == 5
+    assert {i["titre"] for i in items} == {"Dev 1", "Dev lot 0", "Dev lot 1", "Dev lot 2"}
+    comment = next(i for i in items if i["type"] == "commentaire")
+    assert (comment["note_id"], comment["auteur_nom"], comment["extrait"]) == (first.id, "Chloé", "Bien vu")
+
+    # note supprimée : elle disparaît du fil
+    delete_note_service(first.id, db)
+    assert {i["titre"] for i in _all_pages(db, bob, limit=10)} == {"Dev lot 0", "Dev lot 1", "Dev lot 2"}
+
+
+def test_large_team_reads_on_the_fly_in_same_order(db, monkeypatch):
+    _populate(db)
+    bob = _user(db, "Bob")
+    fanned_out = _all_pages(db, bob, limit=2)
+
+    monkeypatch.setattr(settings, "FEED_FANOUT_MAX_MEMBERS", 1)
+    create_note_service("Dev 2", "contenu", bob.id, None, None, None, [], db, bob)
+    assert db.query(FeedItem).filter(FeedItem.user_id == bob.id).count() == 5  # pas de fan-out
+
+    on_read = _all_pages(db, bob, limit=2)
+    assert on_read[0]["titre"] == "Dev 2"
+    assert on_read[1:] == fanned_out
+
+
+def test_new_member_and_invalid_cursor(db):
+    _populate(db)
+    dana = Utilisateur(nom="Dana", email="dana@test.com", mot_de_passe="12345678", type="user", equipe="Dev")
+    db.add(dana)
+    db.commit()
+    # arrivée après coup : fil calculé à la lecture
+    assert len(feed_service(db, dana, limit=10)["items"]) == 5
+    assert feed_service(db, {"id": dana.id, "equipe": None})["items"] == []
+
+    with pytest.raises(HTTPException) as exc:
+        feed_service(db, dana, cursor="pas-un-curseur")
+    assert exc.value.status_code == 400
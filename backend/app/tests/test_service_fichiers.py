@@ -0,0 +1,125 @@
+# app/tests/test_service_fichiers.py
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from app.tests.conftest import TestingSessionLocal
+from app.config import settings
+from app.models.fichier import BlobFichier
+from app.services import fichiers
+from app.services.fichiers import blob_key, release_blobs, safe_filename, store_blobs, store_upload
+from app.services.stockage import LocalStorage
+
+
+class CountingReader(io.BytesIO):
+    """Enregistre la taille des lectures (mémoire bornée par UPLOAD_CHUNK_SIZE)."""
+    def __init__(self, data):
+        super().__init__(data)
+        self.reads = []
+
+    def read(self, size=-1):
+        self.reads.append(size)
+        return super().read(size)
+
+
+@pytest.fixture
+def db():
+    db = TestingSessionLocal()
+    yield db
+    db.close()
+
+
+def _files(root):
+    return sorted(os.path.relpath(os.path.join(d, f), root) for d, _, names in os.walk(root) for f in names)
+
+
+def test_store_upload_streams_in_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(fichiers, "UPLOAD_CHUNK_SIZE", 1000)
+    data = os.urandom(10_500)
+    reader = CountingReader(data)
+
+    stocke = store_upload(UploadFile(reader, filename="../../avatar.png"), "avatars", storage=LocalStorage(str(tmp_path)))
+
+    assert stocke["nom_fichier"] == "avatar.png"
+    assert stocke["chemin"] == "avatars/avatar.png"
+    assert stocke["taille"] == len(data)
+    assert stocke["sha256"] == hashlib.sha256(data).hexdigest()
+    assert (tmp_path / "avatars" / "avatar.png").read_bytes() == data
+    assert set(reader.reads) == {1000}  # jamais de lecture complète
+    assert _files(tmp_path) == [os.path.join("avatars", "avatar.png")]
+
+
+def test_store_blobs_deduplicates_and_counts_references(db, tmp_path, monkeypatch):
+    data = os.urandom(5000)
+    sha256 = hashlib.sha256(data).hexdigest()
+
+    storage = LocalStorage(str(tmp_path))
+
+    stockes = store_blobs(db, [UploadFile(io.BytesIO(data), filename="a.pdf"), UploadFile(io.BytesIO(data), filename="b.pdf")], storage)
+    db.commit()
+    assert [s["nom_fichier"] for s in stockes] == ["a.pdf", "b.pdf"]
+    assert {s["chemin"] for s in stockes} == {blob_key(sha256)}
+    assert _files(tmp_path) == [os.path.join("blobs", sha256[:2], sha256[2:4], sha256)]
+
+    # contenu déjà connu : aucune écriture disque
+    monkeypatch.setattr(storage, "save", lambda *a: pytest.fail("écriture inattendue"))
+    store_blobs(db, [UploadFile(io.BytesIO(data), filename="c.pdf")], storage)
+    db.commit()
+    assert db.get(BlobFichier, sha256).nb_references == 3
+
+    release_blobs(db, [sha256, sha256, sha256, sha256])
+    db.commit()
+    db.expire_all()
+    assert db.get(BlobFichier, sha256).nb_references == 0
+
+
+def test_store_blobs_enforces_max_size_before_writing(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_MAX_BYTES", 100)
+    petit = UploadFile(io.BytesIO(b"x" * 100), filename="petit.txt")
+    gros = UploadFile(io.BytesIO(b"y" * 101), filename="gros.txt")
+
+    with pytest.raises(HTTPException) as exc:
+        store_blobs(db, [petit, gros], LocalStorage(str(tmp_path)))
+    assert exc.value.status_code == 413
+    assert _files(tmp_path) == []
+    assert db.query(BlobFichier).count() == 0
+
+
+def test_safe_filename():
+    assert safe_filename("C:\\docs\\a.txt") == "a.txt"
+    assert safe_filename("") == "fichier"
+
+
+def test_download_response_for_files_outside_the_blob_store(tmp_path):
+    from app.services.fichiers import download_response
+
+    chemin = tmp_path / "avatar.png"
+    chemin.write_bytes(b"v1")
+    etag = f'"{hashlib.sha256(b"v1").hexdigest()}"'
+    assert download_response(str(chemin)).headers["etag"] == etag
+    assert download_response(str(chemin), if_none_match=f'W/"autre", {etag}').status_code == 304
+
+    # contenu remplacé (même nom) : nouvel ETag
+    chemin.write_bytes(b"version 2")
+    os.utime(chemin, ns=(0, 10 ** 9))
+    assert download_response(str(chemin), if_none_match=etag).status_code == 200
+
+    with pytest.raises(HTTPException):
+        download_response(str(tmp_path / "absent.png"))
+
+
+def test_local_storage_resolves_keys_and_legacy_paths(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    storage.save("avatars/a.png", io.BytesIO(b"png"))
+
+    assert (tmp_path / "avatars" / "a.png").read_bytes() == b"png"
+    assert storage.exists("avatars/a.png") and not storage.exists("avatars/b.png")
+    # anciennes lignes : chemin complet sous la racine, inchangé
+    assert storage.path(os.path.join(str(tmp_path), "Note_1_a.txt")) == os.path.join(str(tmp_path), "Note_1_a.txt")
+    assert LocalStorage("uploads").path("uploads/Note_1_a.txt") == "uploads/Note_1_a.txt"
+
+    storage.delete("avatars/a.png")
+    storage.delete("avatars/a.png")  # déjà supprimé : sans erreur
+    assert _files(tmp_path) == []
@@ -0,0 +1,146 @@
+# app/tests/test_service_nettoyage.py
+import hashlib
+import io
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import UploadFile
+from app.tests.conftest import TestingSessionLocal, engine
+from app.models.fichier import BlobFichier, FichierNote
+from app.models.utilisateur import Utilisateur
+from app.services.fichiers import blob_key, release_blobs, store_blobs
+from app.services.nettoyage import collect_orphans
+from app.services.stockage import LocalStorage
+
+OLD = time.time() - 3 * 24 * 3600
+
+
+@pytest.fixture
+def db():
+    db = TestingSessionLocal()
+    yield db
+    db.close()
+
+
+def _sha(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _write(storage, key, data, mtime=OLD):
+    storage.save(key, io.BytesIO(data))
+    os.utime(storage.path(key), (mtime, mtime))
+
+
+def _files(root):
+    return sorted(os.path.relpath(os.path.join(d, f), root).replace(os.sep, "/") for d, _, names in os.walk(root) for f in names)
+
+
+def _populate(db, storage, tmp_path):
+    # 📎 Contenus adressés : un référencé, un libéré, un fichier sans ligne
+    store_blobs(db, [UploadFile(io.BytesIO(b"garde"), filename="a.pdf"), UploadFile(io.BytesIO(b"libere"), filename="b.pdf")], storage)
+    db.add(FichierNote(nom_fichier="a.pdf", chemin=blob_key(_sha(b"garde")), sha256=_sha(b"garde")))
+    release_blobs(db, [_sha(b"libere")])
+    db.commit()
+    db.query(BlobFichier).update({"updated_at": datetime.now(timezone.utc) - timedelta(days=3)})
+    db.commit()
+    for data in (b"garde", b"libere"):
+        os.utime(storage.path(blob_key(_sha(data))), (OLD, OLD))
+    _write(storage, blob_key(_sha(b"perdu")), b"perdu")
+    _write(storage, "blobs/.abc.part", b"tronque")
+    _write(storage, blob_key(_sha(b"garde")) + "~320.webp", b"apercu")
+    _write(storage, blob_key(_sha(b"inconnu")) + "~320.webp", b"apercu orphelin")
+
+    # 📁 Anciennes pièces jointes (chemin local complet), dont une récente
+    _write(storage, "Note_1_ref.txt", b"ref")
+    db.add(FichierNote(nom_fichier="ref.txt", chemin=os.path.join(str(tmp_path), "Note_1_ref.txt")))
+    _write(storage, "Note_2_orphelin.txt", b"orphelin")
+    _write(storage, "Note_3_recent.txt", b"recent", mtime=time.time())
+    _write(storage, "Note_1_ref.txt~320.webp", b"apercu ancien")
+    _write(storage, "Note_2_orphelin.txt~640.jpg", b"apercu ancien orphelin")
+
+    # 🖼️ Avatars : actuel, remplacé, utilisateur supprimé, ancienne URL /uploads/…
+    user = Utilisateur(nom="Ana", email="ana@test.com", mot_de_passe="12345678", type="user")
+    ancien = Utilisateur(nom="Bob", email="bob@test.com", mot_de_passe="12345678", type="user")
+    db.add_all([user, ancien])
+    db.commit()
+    user.avatar_chemin = f"avatars/user_{user.id}_b.png"
+    user.avatar_url = f"/utilisateurs/{user.id}/avatar?v={_sha(b'actuel')}"
+    ancien.avatar_url = f"http://127.0.0.1:8000/uploads/avatars/user_{ancien.id}_c.png"
+    db.commit()
+    _write(storage, f"avatars/user_{ancien.id}_c.png", b"ancienne url")
+    _write(storage, f"avatars/user_{user.id}_a.png", b"ancien")
+    _write(storage, f"avatars/user_{user.id}_b.png", b"actuel")
+    _write(storage, f"avatars/user_{user.id}_b.png~64.webp", b"vignette")
+    _write(storage, f"avatars/user_{user.id}_a.png~64.webp", b"vignette perimee")
+    _write(storage, "avatars/user_9999_x.png", b"supprime")
+    return user, ancien
+
+
+def test_collect_orphans(db, tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    user, ancien = _populate(db, storage, tmp_path)
+    before = _files(tmp_path)
+
+    dry = collect_orphans(engine, storage, grace_seconds=24 * 3600, rate=0, dry_run=True)
+    assert _files(tmp_path) == before
+    assert db.query(BlobFichier).count() == 2
+
+    report = collect_orphans(engine, storage, grace_seconds=24 * 3600, rate=0)
+    assert _files(tmp_path) == sorted([
+        blob_key(_sha(b"garde")),
+        blob_key(_sha(b"garde")) + "~320.webp",
+        "Note_1_ref.txt",
+        "Note_1_ref.txt~320.webp",
+        "Note_3_recent.txt",
+        f"avatars/user_{user.id}_b.png",
+        f"avatars/user_{user.id}_b.png~64.webp",
+        f"avatars/user_{ancien.id}_c.png",
+    ])
+    supprimes = [b"libere", b"perdu", b"tronque", b"apercu orphelin", b"orphelin", b"apercu ancien orphelin", b"ancien", b"vignette perimee", b"supprime"]
+    assert report["supprimes"] == dry["supprimes"] == len(supprimes)
+    assert report["octets"] == dry["octets"] == sum(len(d) for d in supprimes)
+    assert report["examines"] == len(before) - 1  # fichier récent non examiné
+    db.expire_all()
+    assert [b.sha256 for b in db.query(BlobFichier)] == [_sha(b"garde")]
+
+    # Relance : plus rien à collecter
+    assert collect_orphans(engine, storage, grace_seconds=24 * 3600, rate=0)["supprimes"] == 0
+
+
+def test_collect_orphans_keeps_blob_reused_after_release(db, tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    store_blobs(db, [UploadFile(io.BytesIO(b"x"), filename="a.pdf")], storage)
+    release_blobs(db, [_sha(b"x")])
+    db.commit()
+    db.query(BlobFichier).update({"updated_at": datetime.now(timezone.utc) - timedelta(days=3)})
+    db.commit()
+    # réutilisé avant la collecte : compteur et date remis à jour
+    stocke = store_blobs(db, [UploadFile(io.BytesIO(b"x"), filename="b.pdf")], storage)
+    db.add(FichierNote(**stocke[0]))
+    db.commit()
+
+    assert collect_orphans(engine, storage, grace_seconds=0, rate=0)["supprimes"] == 0
+    assert storage.exists(blob_key(_sha(b"x")))
+
+
+def test_collect_orphans_repairs_drifted_reference_counts(db, tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    store_blobs(db, [UploadFile(io.BytesIO(b"cascade"), filename="a.pdf"), UploadFile(io.BytesIO(b"sous"), filename="b.pdf")], storage)
+    # ligne fichiers_notes supprimée sans décompte ; compteur resté sous le réel
+    db.query(BlobFichier).filter(BlobFichier.sha256 == _sha(b"sous")).update({"nb_references": 0})
+    db.add(FichierNote(nom_fichier="b.pdf", chemin=blob_key(_sha(b"sous")), sha256=_sha(b"sous")))
+    db.query(BlobFichier).update({"updated_at": datetime.now(timezone.utc) - timedelta(days=3)})
+    db.commit()
+
+    dry = collect_orphans(engine, storage, grace_seconds=0, rate=0, dry_run=True)
+    assert (dry["compteurs_corriges"], dry["supprimes"]) == (2, 1)
+    db.expire_all()
+    assert db.get(BlobFichier, _sha(b"cascade")).nb_references == 1
+
+    report = collect_orphans(engine, storage, grace_seconds=0, rate=0)
+    assert (report["compteurs_corriges"], report["supprimes"]) == (2, 1)
+    db.expire_all()
+    assert [(b.sha256, b.nb_references) for b in db.query(BlobFichier)] == [(_sha(b"sous"), 1)]
+    assert not storage.exists(blob_key(_sha(b"cascade"))) and storage.exists(blob_key(_sha(b"sous")))
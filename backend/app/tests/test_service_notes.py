@@ -116,3 +116,33 @@ def test_get_note_not_found(client):
     r = client.get("/notes/999")
     assert r.status_code == 404
 
+
+
+# -----------------------------------------------------------------
+# ✅ TEST LIKES (SERVICE) : plusieurs utilisateurs, suppression
+# -----------------------------------------------------------------
+def test_like_note_service_counts_distinct_users():
+    from app.models.note import Note
+    from app.models.like import NoteLike
+    from app.models.utilisateur import Utilisateur
+    from app.services.notes import like_note_service, unlike_note_service, delete_note_service
+
+    db = TestingSessionLocal()
+    users = [Utilisateur(nom=f"U{i}", email=f"u{i}@test.com", mot_de_passe="x", type="user") for i in range(3)]
+    db.add_all(users)
+    db.commit()
+    note = Note(titre="T", contenu="C", auteur_id=users[0].id)
+    db.add(note)
+    db.commit()
+
+    for user in users:
+        like_note_service(note.id, db, user)
+    like_note_service(note.id, db, {"id": users[0].id})
+    assert like_note_service(note.id, db, users[1])["likes"] == 3
+
+    assert unlike_note_service(note.id, db, users[2])["likes"] == 2
+    assert db.query(NoteLike).filter_by(note_id=note.id).count() == 2
+
+    delete_note_service(note.id, db)
+    assert db.query(NoteLike).count() == 0
+    db.close()
@@ -0,0 +1,99 @@
+# app/tests/test_service_related.py
+import numpy as np
+from app.tests.conftest import TestingSessionLocal
+from app.models.note import Note
+from app.models.utilisateur import Utilisateur
+from app.services.related import RelatedNotesIndex
+
+TEXTES = [
+    ("Budget 2025", "Préparation du budget annuel de l'équipe"),
+    ("Budget serveurs", "Budget des serveurs et de l'hébergement"),
+    ("Recrutement", "Entretiens pour le poste de développeur"),
+    ("Développeur junior", "Recrutement d'un développeur junior"),
+]
+
+
+def _seed(db):
+    user = Utilisateur(nom="Alice", email="alice@test.com", mot_de_passe="12345678", type="admin", equipe="Dev")
+    db.add(user)
+    db.commit()
+    notes = [Note(titre=t, contenu=c, auteur_id=user.id) for t, c in TEXTES]
+    db.add_all(notes)
+    db.commit()
+    return [n.id for n in notes]
+
+
+def test_incremental_updates_match_full_build():
+    db = TestingSessionLocal()
+    ids = _seed(db)
+    incremental = RelatedNotesIndex()
+    incremental.build(db.get_bind())
+
+    for i in range(30):  # dépasse le seuil de compactage et de rafraîchissement IDF
+        incremental.upsert(ids[2], "Recrutement", f"Entretiens pour le poste de développeur {i}")
+    incremental.upsert(ids[2], *TEXTES[2])
+    incremental.related(ids[0])
+
+    full = RelatedNotesIndex()
+    full.build(db.get_bind())
+    for note_id in ids:
+        got, expected = incremental.related(note_id), full.related(note_id)
+        assert [i for i, _ in got] == [i for i, _ in expected]
+        assert np.allclose([s for _, s in got], [s for _, s in expected], atol=1e-5)
+    db.close()
+
+
+def test_snapshot_reload_catches_up_with_database(tmp_path):
+    db = TestingSessionLocal()
+    ids = _seed(db)
+    path = str(tmp_path / "related.npz")
+    index = RelatedNotesIndex()
+    index.build(db.get_bind())
+    index.save(path)
+
+    # Modifications faites pendant que l'application est arrêtée
+    db.query(Note).filter(Note.id == ids[1]).delete()
+    db.add(Note(titre="Budget formation", contenu="Budget de formation de l'équipe", auteur_id=None))
+    db.commit()
+    new_id = db.query(Note.id).filter(Note.titre == "Budget formation").scalar()
+
+    reloaded = RelatedNotesIndex()
+    assert reloaded.load(path, db.get_bind())
+    related = [i for i, _ in reloaded.related(ids[0])]
+    assert new_id in related and ids[1] not in related
+    db.close()
+
+
+def test_snapshot_reload_indexes_notes_missing_below_last_id(tmp_path):
+    db = TestingSessionLocal()
+    ids = _seed(db)
+    path = str(tmp_path / "related.npz")
+    index = RelatedNotesIndex()
+    index.build(db.get_bind())
+    # Note validée après l'instantané malgré un id plus petit
+    index.remove(ids[1])
+    index.save(path)
+
+    reloaded = RelatedNotesIndex()
+    assert reloaded.load(path, db.get_bind())
+    assert ids[1] in [i for i, _ in reloaded.related(ids[0])]
+    db.close()
+
+
+def test_catch_up_applies_writes_from_other_workers():
+    db = TestingSessionLocal()
+    ids = _seed(db)
+    index = RelatedNotesIndex()
+    index.build(db.get_bind())
+
+    # Écritures d'un autre worker : modification, suppression, création
+    db.query(Note).filter(Note.id == ids[3]).update({"titre": "Budget matériel", "contenu": "Budget du matériel de l'équipe"})
+    db.query(Note).filter(Note.id == ids[1]).delete()
+    db.add(Note(titre="Budget formation", contenu="Budget de formation de l'équipe", auteur_id=None))
+    db.commit()
+    new_id = db.query(Note.id).filter(Note.titre == "Budget formation").scalar()
+
+    index.catch_up(db.get_bind())
+    related = [i for i, _ in index.related(ids[0])]
+    assert new_id in related and ids[3] in related and ids[1] not in related
+    db.close()
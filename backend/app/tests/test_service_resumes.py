@@ -0,0 +1,64 @@
+# app/tests/test_service_resumes.py
+from app.services.some_ai_module import SUMMARY_PREFIX, generate_summaries, generate_summary
+
+TEXTE = (
+    "Le projet de refonte du site web a commencé lundi. "
+    "L'équipe de développement a défini les priorités du sprint. "
+    "Le site web doit être livré avant la fin du mois. "
+    "La météo était agréable ce jour-là. "
+    "Les priorités du sprint incluent la refonte du site web et les tests de performance. "
+    "Un café a été renversé sur le clavier. "
+    "Les tests de performance du site web seront automatisés."
+)
+
+
+def test_generate_summary_keeps_central_sentences_in_order():
+    resume = generate_summary(TEXTE)
+    assert resume.startswith(SUMMARY_PREFIX)
+    assert "météo" not in resume and "café" not in resume
+    assert resume.index("refonte du site web a commencé") < resume.index("seront automatisés")
+
+
+def test_generate_summary_short_or_empty_text():
+    assert generate_summary("") == ""
+    assert generate_summary("Une seule phrase") == SUMMARY_PREFIX + "Une seule phrase"
+
+
+def test_generate_summaries_batch_matches_single_calls():
+    autre = " ".join(f"Réunion {i} sur le budget annuel et les recrutements de l'équipe." for i in range(12))
+    texts = [TEXTE, None, autre, "court", TEXTE[::-1]]
+    assert generate_summaries(texts) == [generate_summary(t) for t in texts]
+
+
+# -----------------------------------------------------------------
+# ✅ CACHE DES RÉSUMÉS PAR EMPREINTE
+# -----------------------------------------------------------------
+def test_content_hash_normalizes_whitespace_and_unicode():
+    from app.services.resumes import content_hash
+
+    assert content_hash("  Réunion\n\tdu  lundi ") == content_hash("Réunion du lundi")
+    assert content_hash("Réunion") == content_hash("Réunion")
+    assert content_hash("Réunion du lundi") != content_hash("Réunion du mardi")
+
+
+def test_get_or_create_summaries_computes_each_content_once(monkeypatch):
+    from app.tests.conftest import TestingSessionLocal
+    from app.models.resume import NoteSummary
+    from app.services import resumes
+
+    calls = []
+    real = resumes.generate_summaries
+    monkeypatch.setattr(resumes, "generate_summaries", lambda texts: calls.append(list(texts)) or real(texts))
+
+    db = TestingSessionLocal()
+    autre = TEXTE.replace("site web", "intranet")
+    first = resumes.get_or_create_summaries(db, [TEXTE, TEXTE + "  ", autre])
+    assert calls == [[TEXTE, autre]]  # doublon normalisé calculé une seule fois
+    assert first[0] == first[1]
+    assert db.query(NoteSummary).count() == 2
+
+    # 💾 LRU vidé → relu depuis note_summaries, sans recalcul
+    resumes.clear_summary_cache()
+    assert resumes.get_or_create_summaries(db, [autre]) == [first[2]]
+    assert len(calls) == 1
+    db.close()
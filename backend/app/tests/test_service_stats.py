@@ -0,0 +1,115 @@
+# app/tests/test_service_stats.py
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from app.tests.conftest import TestingSessionLocal
+from app.models.like import NoteLike
+from app.models.stats import StatsAuteurJour, StatsEquipeJour
+from app.models.utilisateur import Utilisateur
+from app.schemas.schemas import CommentaireCreate, EleveCreate, EleveUpdate
+from app.services.commentaires import add_commentaire_service
+from app.services.eleves import create_eleve_service, delete_eleve_service, update_eleve_service
+from app.services.notes import (
+    create_note_service,
+    delete_note_service,
+    like_note_service,
+    unlike_note_service,
+    update_note_service,
+)
+from app.services.stats import _today, rebuild_stats, record_stats, stats_overview_service
+
+
+@pytest.fixture
+def db():
+    db = TestingSessionLocal()
+    for nom, equipe in [("Alice", "Dev"), ("Bob", "QA")]:
+        db.add(Utilisateur(nom=nom, email=f"{nom}@test.com", mot_de_passe="12345678", type="admin", equipe=equipe))
+    db.commit()
+    yield db
+    db.close()
+
+
+def _user(db, nom):
+    return db.query(Utilisateur).filter(Utilisateur.nom == nom).first()
+
+
+def _rows(db):
+    db.expire_all()
+    equipes = sorted(
+        (r.jour, r.equipe, r.notes, r.commentaires, r.likes, r.vues, r.eleves_actifs)
+        for r in db.query(StatsEquipeJour)
+        if any((r.notes, r.commentaires, r.likes, r.vues, r.eleves_actifs))
+    )
+    auteurs = sorted(
+        (r.jour, r.equipe, r.auteur_id, r.notes, r.commentaires)
+        for r in db.query(StatsAuteurJour)
+        if r.notes or r.commentaires
+    )
+    return equipes, auteurs
+
+
+@pytest.mark.asyncio
+async def test_rollups_follow_writes_and_match_rebuild(db):
+    alice, bob = _user(db, "Alice"), _user(db, "Bob")
+    n1 = create_note_service("A", "a", alice.id, None, None, None, [], db, alice)
+    n2 = create_note_service("B", "b", bob.id, "QA", None, None, [], db, bob)
+    n3 = create_note_service("C", "c", alice.id, None, None, None, [], db, alice)
+    add_commentaire_service(n1.id, CommentaireCreate(contenu="ok", auteur_id=bob.id), db)
+    add_commentaire_service(n3.id, CommentaireCreate(contenu="ok", auteur_id=bob.id), db)
+    like_note_service(n1.id, db, bob)
+    like_note_service(n2.id, db, alice)
+    unlike_note_service(n2.id, db, alice)
+    eleve = create_eleve_service(EleveCreate(nom="E", prenom="F"), alice, db)
+    create_eleve_service(EleveCreate(nom="G", prenom="H"), bob, db)
+    update_eleve_service(eleve.id, EleveUpdate(actif=False, updated_by=alice.id), db)
+    update_eleve_service(eleve.id, EleveUpdate(actif=True, updated_by=alice.id), db)
+    autre = create_eleve_service(EleveCreate(nom="I", prenom="J"), alice, db)
+    delete_eleve_service(autre.id, alice, db)
+    # la note C passe chez QA avec son commentaire, puis la note A est supprimée
+    await update_note_service(n3.id, "C", "c", "QA", None, None, [], db)
+    delete_note_service(n1.id, db)
+
+    jour = _today()
+    equipes, auteurs = _rows(db)
+    assert equipes == [(jour, "Dev", 0, 0, 0, 0, 1), (jour, "QA", 2, 1, 0, 0, 1)]
+    assert auteurs == [(jour, "QA", alice.id, 1, 0), (jour, "QA", bob.id, 1, 1)]
+
+    # le recalcul complet retrouve les mêmes cumuls
+    assert rebuild_stats(db.get_bind()) > 0
+    assert _rows(db) == (equipes, auteurs)
+
+
+def test_unlike_is_removed_from_the_day_of_the_like(db):
+    alice, bob = _user(db, "Alice"), _user(db, "Bob")
+    note = create_note_service("A", "a", alice.id, None, None, None, [], db, alice)
+    # like enregistré trois jours plus tôt (comme par like_note_service ce jour-là)
+    liked_at = datetime.now(timezone.utc) - timedelta(days=3)
+    db.add(NoteLike(note_id=note.id, user_id=bob.id, created_at=liked_at))
+    record_stats(db, [("Dev", None, {"likes": 1})], jour=liked_at.date())
+    db.commit()
+
+    unlike_note_service(note.id, db, bob)
+    equipes, auteurs = _rows(db)
+    assert equipes == [(_today(), "Dev", 1, 0, 0, 0, 0)]
+    rebuild_stats(db.get_bind())
+    assert _rows(db) == (equipes, auteurs)
+
+
+def test_overview_windows_and_top_authors(db):
+    alice, bob = _user(db, "Alice"), _user(db, "Bob")
+    today = _today()
+    record_stats(db, [("Dev", alice.id, {"notes": 3, "vues": 10}), ("Dev", bob.id, {"notes": 1, "eleves_actifs": 2})])
+    record_stats(db, [("Dev", bob.id, {"notes": 5, "eleves_actifs": 1})], jour=today - timedelta(days=40))
+    record_stats(db, [(None, None, {"likes": 2})])
+    db.commit()
+
+    overview = stats_overview_service(db, alice, jours=30)
+    dev = next(e for e in overview["equipes"] if e["equipe"] == "Dev")
+    assert (dev["notes"], dev["vues"], dev["eleves_actifs"], dev["eleves_actifs_variation"]) == (4, 10, 3, 2)
+    assert [(a["nom"], a["notes"]) for a in dev["top_auteurs"]] == [("Alice", 3), ("Bob", 1)]
+    assert overview["totaux"]["likes"] == 2
+    assert overview["debut"] == today - timedelta(days=29)
+
+    yearly = stats_overview_service(db, alice, jours=365, equipe="Dev", top=1)
+    assert [e["equipe"] for e in yearly["equipes"]] == ["Dev"]
+    assert [(a["nom"], a["notes"]) for a in yearly["equipes"][0]["top_auteurs"]] == [("Bob", 6)]
@@ -0,0 +1,75 @@
+# app/tests/test_service_stockage.py
+# Stockage S3 contre moto (stand-in local de S3) ; ignoré si boto3 / moto manquent.
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi import UploadFile
+
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+
+from app.tests.conftest import TestingSessionLocal
+from app.models.fichier import BlobFichier
+from app.services.fichiers import blob_key, download_response, store_blobs
+from app.services.stockage import S3Storage
+
+PART_SIZE = 5 * 1024 * 1024  # minimum S3 pour les parties non finales
+
+
+@pytest.fixture
+def s3():
+    with moto.mock_aws():
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="notes")
+        yield S3Storage("notes", prefix="pj", region="us-east-1", part_size=PART_SIZE, max_concurrency=3)
+
+
+@pytest.fixture
+def db():
+    db = TestingSessionLocal()
+    yield db
+    db.close()
+
+
+class CountingReader(io.BytesIO):
+    def __init__(self, data):
+        super().__init__(data)
+        self.max_read = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.max_read = max(self.max_read, len(data))
+        return data
+
+
+def test_s3_multipart_upload_streams_parts(s3):
+    data = os.urandom(2 * PART_SIZE + 1000)
+    reader = CountingReader(data)
+
+    s3.save("blobs/gros.bin", reader)
+
+    obj = s3.client.get_object(Bucket="notes", Key="pj/blobs/gros.bin")
+    assert obj["Body"].read() == data
+    assert obj["ETag"].strip('"').endswith("-3")  # trois parties
+    assert reader.max_read <= PART_SIZE           # jamais le fichier entier en mémoire
+    assert s3.exists("blobs/gros.bin") and not s3.exists("blobs/absent.bin")
+
+    s3.delete("blobs/gros.bin")
+    assert not s3.exists("blobs/gros.bin")
+
+
+def test_s3_store_blobs_and_download_redirect(db, s3):
+    data = b"%PDF contenu"
+    sha256 = hashlib.sha256(data).hexdigest()
+
+    stockes = store_blobs(db, [UploadFile(io.BytesIO(data), filename="a.pdf")], s3)
+    db.commit()
+    assert stockes[0]["chemin"] == blob_key(sha256)
+    assert db.get(BlobFichier, sha256).nb_references == 1
+
+    r = download_response(stockes[0]["chemin"], sha256, filename="a.pdf", storage=s3)
+    assert r.status_code == 307
+    assert r.headers["etag"] == f'"{sha256}"'
+    assert f"pj/{blob_key(sha256)}" in r.headers["location"]
+    assert download_response(stockes[0]["chemin"], sha256, if_none_match=f'"{sha256}"', storage=s3).status_code == 304
@@ -0,0 +1,48 @@
+# app/tests/test_service_suggestions.py
+import numpy as np
+from app.services.suggestions import NaiveBayesModel, canonical_labels, label_key, load_models, save_models, train_models
+
+TEXTES = [
+    (("Panne serveur", "Le serveur de production ne répond plus, incident critique"), "Incident", "Haute"),
+    (("Incident base", "La base de données est en panne, incident en cours"), "incident", "haute"),
+    (("Coupure réseau", "Incident réseau : panne du routeur principal"), "Incident", "Haute"),
+    (("Pique-nique", "Organisation du pique-nique annuel de l'équipe au parc"), "Social", "Basse"),
+    (("Anniversaire", "Gâteau pour l'anniversaire de Marie vendredi"), "social", "Basse"),
+    (("Sortie d'équipe", "Sortie bowling de l'équipe le mois prochain"), "Social", "Moyenne"),
+]
+
+
+def _train():
+    texts = [t for t, _, _ in TEXTES]
+    return train_models(texts, {
+        "categorie": [c for _, c, _ in TEXTES],
+        "priorite": [p for _, _, p in TEXTES],
+    })
+
+
+def test_canonical_labels_merges_spellings():
+    canon = canonical_labels(["Moyenne", "moyenne", " Moyenne ", "Élevée", "elevee", None, ""])
+    assert canon[label_key("MOYENNE")] == "Moyenne"
+    assert canon[label_key("élevée")] == "Élevée"
+    assert len(canon) == 2
+
+
+def test_naive_bayes_predicts_and_batches(tmp_path):
+    models = _train()
+    categorie = models["categorie"]
+    assert categorie.labels == ["Incident", "Social"]
+
+    batch = [("Serveur en panne", "incident sur le serveur"), ("", "anniversaire et gâteau pour l'équipe"), ("", "")]
+    proba = categorie.predict_proba(batch)
+    assert proba.shape == (3, 2) and np.allclose(proba.sum(axis=1), 1)
+    assert [categorie.labels[i] for i in proba[:2].argmax(axis=1)] == ["Incident", "Social"]
+    # texte vide → probabilités a priori
+    assert np.allclose(proba[2], np.exp(categorie.log_prior))
+    # lot = appels unitaires
+    assert np.allclose(proba, np.vstack([categorie.predict_proba([t]) for t in batch]), atol=1e-6)
+
+    path = str(tmp_path / "model.npz")
+    save_models(models, path)
+    reloaded = load_models(path)
+    assert reloaded["priorite"].labels == models["priorite"].labels
+    assert np.allclose(reloaded["categorie"].predict_proba(batch), proba)
@@ -0,0 +1,120 @@
+# app/tests/test_service_trending.py
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from app.tests.conftest import TestingSessionLocal
+from app.config import Settings, settings
+from app.models.note import Note
+from app.models.trending import NoteTrending
+from app.models.utilisateur import Utilisateur
+from app.services.trending import (
+    REBASE_HALF_LIVES, current_epoch, rebase_trending_scores, record_trending, trending_notes_service,
+)
+from app.services import trending
+from app.services.notes import like_note_service, unlike_note_service
+from app.services.vues import ViewCounterBuffer
+
+
+@pytest.fixture
+def db():
+    db = TestingSessionLocal()
+    user = Utilisateur(nom="Alice", email="alice@test.com", mot_de_passe="12345678", type="admin", equipe="Dev")
+    db.add(user)
+    db.commit()
+    for titre, equipe in [("Ancienne", "Dev"), ("Récente", "Dev"), ("QA", "QA")]:
+        db.add(Note(titre=titre, contenu="c", auteur_id=user.id, equipe=equipe))
+    db.commit()
+    yield db
+    db.close()
+
+
+def _ids(db):
+    return {titre: note_id for note_id, titre in db.query(Note.id, Note.titre)}
+
+
+def test_recent_events_outweigh_older_ones(db):
+    ids = _ids(db)
+    now = datetime.now(timezone.utc)
+    half_life = timedelta(hours=settings.TRENDING_HALF_LIFE_HOURS)
+
+    # 3 likes il y a deux demi-vies (= 9 / 4) < 1 commentaire maintenant (= 5)
+    record_trending(db, [(ids["Ancienne"], "like", 3)], at=now - 2 * half_life)
+    record_trending(db, [(ids["Récente"], "comment", 1)], at=now)
+    db.commit()
+
+    notes = trending_notes_service(db)
+    assert [n["titre"] for n in notes] == ["Récente", "Ancienne"]
+    assert notes[0]["score"] == pytest.approx(5, rel=1e-3)
+    assert notes[1]["score"] == pytest.approx(9 / 4, rel=1e-3)
+    assert [n["titre"] for n in trending_notes_service(db, equipe="QA")] == []
+
+
+def test_unlike_never_goes_negative(db):
+    note_id = _ids(db)["QA"]
+    record_trending(db, [(note_id, "like", 1)])
+    record_trending(db, [(note_id, "like", -1), (note_id, "like", -1)])
+    db.commit()
+    assert db.query(NoteTrending.score).filter(NoteTrending.note_id == note_id).scalar() == 0
+    assert trending_notes_service(db) == []
+
+
+def test_late_unlike_removes_only_the_like(db, monkeypatch):
+    note_id = _ids(db)["Récente"]
+    user = {"id": db.query(Utilisateur.id).scalar()}
+    now = datetime.now(timezone.utc)
+    like_note_service(note_id, db, user)
+    record_trending(db, [(note_id, "comment", 1)], at=now)
+    db.commit()
+
+    # Retrait deux demi-vies plus tard : le commentaire reste (5 décru de 4)
+    later = now + 2 * timedelta(hours=settings.TRENDING_HALF_LIFE_HOURS)
+    monkeypatch.setattr(trending, "_now", lambda: later)
+    unlike_note_service(note_id, db, user)
+    assert trending_notes_service(db)[0]["score"] == pytest.approx(5 / 4, rel=1e-3)
+
+
+def test_view_flush_feeds_trending(db):
+    ids = _ids(db)
+    buffer = ViewCounterBuffer()
+    buffer.record(db.get_bind(), ids["QA"], 4)
+    buffer.record(db.get_bind(), 9999)  # note supprimée : ignorée
+    buffer.flush()
+
+    notes = trending_notes_service(db)
+    assert [n["id"] for n in notes] == [ids["QA"]]
+    assert notes[0]["score"] == pytest.approx(4, rel=1e-3)
+
+
+def test_rebase_keeps_decayed_scores(db):
+    note_id = _ids(db)["Récente"]
+    record_trending(db, [(note_id, "like", 1)])
+    db.commit()
+    before = trending_notes_service(db)[0]["score"]
+
+    now = datetime.now(timezone.utc)
+    assert rebase_trending_scores(db.get_bind(), now)
+    assert not rebase_trending_scores(db.get_bind(), now)  # époque récente : inchangée
+    db.expire_all()
+    assert current_epoch(db) == now
+    assert trending_notes_service(db)[0]["score"] == pytest.approx(before, rel=1e-3)
+
+
+def test_short_half_life_never_overflows(db, monkeypatch):
+    monkeypatch.setattr(settings, "TRENDING_HALF_LIFE_HOURS", 0.01)
+    note_id = _ids(db)["QA"]
+    rebase_trending_scores(db.get_bind())
+    record_trending(db, [(note_id, "comment", 1)])
+    db.commit()
+
+    # Des années plus tard : époque avancée par le rebasage périodique
+    later = datetime.now(timezone.utc) + timedelta(days=3 * 365)
+    assert rebase_trending_scores(db.get_bind(), later)
+    record_trending(db, [(note_id, "like", 1)], at=later + timedelta(hours=REBASE_HALF_LIVES * 0.01))
+    db.commit()
+    assert db.query(NoteTrending.score).filter(NoteTrending.note_id == note_id).scalar() == pytest.approx(3 * 2 ** 16)
+
+
+def test_half_life_must_be_positive():
+    for value in (0, -1):
+        with pytest.raises(ValueError):
+            Settings(TRENDING_HALF_LIFE_HOURS=value)
@@ -1,8 +1,15 @@
 # app/tests/test_service_utilisateurs.py
+import io
+
 import pytest
+from fastapi import UploadFile
 from starlette.background import BackgroundTasks
 from app.tests.conftest import TestingSessionLocal
+from app.models.fichier import BlobFichier, FichierNote
+from app.models.note import Note
 from app.models.utilisateur import Utilisateur
+from app.services.fichiers import store_blobs
+from app.services.stockage import LocalStorage
 from app.services.utilisateurs import (
     create_user_service,
     list_users_service,
@@ -138,3 +145,20 @@ def test_delete_user_service(db_session):
 
     delete_user_service(u.id, db_session, fake_admin)
     assert db_session.query(Utilisateur).count() == 0
+
+
+def test_delete_user_releases_attachments_of_their_notes(db_session, tmp_path):
+    u = Utilisateur(nom="Eve", email="eve@test.com", mot_de_passe="12345678", type="user")
+    db_session.add(u)
+    db_session.commit()
+    note = Note(titre="n", contenu="c", auteur_id=u.id)
+    db_session.add(note)
+    db_session.commit()
+    stocke = store_blobs(db_session, [UploadFile(io.BytesIO(b"pj"), filename="a.pdf")], LocalStorage(str(tmp_path)))[0]
+    db_session.add(FichierNote(**stocke, note_id=note.id))
+    db_session.commit()
+
+    delete_user_service(u.id, db_session, fake_admin)
+    db_session.expire_all()
+    assert db_session.query(FichierNote).count() == 0
+    assert db_session.get(BlobFichier, stocke["sha256"]).nb_references == 0
@@ -0,0 +1,86 @@
+# app/tests/test_service_vignettes.py
+import io
+
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+from app.config import settings
+from app.services.stockage import LocalStorage
+from app.services.vignettes import (
+    APERCU, AVATAR, pick_format, pick_size, render_variants, variant_for, variant_key, variant_pool,
+)
+
+
+def _png(width, height, mode="RGB"):
+    out = io.BytesIO()
+    Image.new(mode, (width, height), "red").save(out, format="PNG")
+    return out.getvalue()
+
+
+def _size(data):
+    with Image.open(io.BytesIO(data)) as img:
+        return img.format, img.size
+
+
+def test_render_avatar_variants_are_square():
+    variants = render_variants(io.BytesIO(_png(600, 400)), AVATAR, "webp")
+    assert {size: _size(data) for size, data in variants.items()} == {
+        64: ("WEBP", (64, 64)), 128: ("WEBP", (128, 128)), 256: ("WEBP", (256, 256)),
+    }
+
+
+def test_render_previews_keep_ratio_and_never_upscale():
+    variants = render_variants(io.BytesIO(_png(2000, 1000, "RGBA")), APERCU, "jpg")
+    assert _size(variants[320]) == ("JPEG", (320, 160))
+    assert _size(variants[1280]) == ("JPEG", (1280, 640))
+    assert _size(render_variants(io.BytesIO(_png(100, 50)), APERCU, "webp")[640])[1] == (100, 50)
+
+    with pytest.raises(ValueError):
+        render_variants(io.BytesIO(b"%PDF-1.4 pas une image"), APERCU, "webp")
+
+
+def test_render_rejects_oversized_sources(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "THUMBNAIL_MAX_PIXELS", 100 * 100)
+    source = tmp_path / "grande.png"
+    source.write_bytes(_png(200, 100))
+    with pytest.raises(ValueError):
+        render_variants(str(source), APERCU, "webp")
+    # sous la limite : lue depuis le chemin
+    source.write_bytes(_png(100, 100))
+    assert _size(render_variants(str(source), AVATAR, "webp")[64]) == ("WEBP", (64, 64))
+
+
+def test_pick_size_and_format():
+    assert pick_size(AVATAR, 40) == 64
+    assert pick_size(AVATAR, 128) == 128
+    assert pick_size(APERCU, 5000) == 1280
+    assert pick_format("image/avif,image/webp,*/*") == "webp"
+    assert pick_format(None) == "jpg"
+
+
+def test_variant_for_generates_lazily_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    storage = LocalStorage(str(tmp_path))
+    storage.save("avatars/user_1_a.png", io.BytesIO(_png(300, 300)))
+
+    key, size, ext = variant_for("avatars/user_1_a.png", AVATAR, 100, "image/webp")
+    assert (key, size, ext) == (variant_key("avatars/user_1_a.png", 128, "webp"), 128, "webp")
+    # toutes les tailles du format calculées d'un coup
+    assert all(storage.exists(variant_key("avatars/user_1_a.png", s, "webp")) for s in (64, 128, 256))
+    assert not storage.exists(variant_key("avatars/user_1_a.png", 64, "jpg"))
+
+    monkeypatch.setattr(variant_pool, "generate", lambda *a: pytest.fail("déjà calculée"))
+    assert variant_for("avatars/user_1_a.png", AVATAR, 64, "image/webp")[0] == variant_key("avatars/user_1_a.png", 64, "webp")
+
+    with pytest.raises(HTTPException) as exc:
+        variant_for("avatars/absent.png", AVATAR, 64)
+    assert exc.value.status_code == 404
+
+
+def test_variant_for_rejects_non_images(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    LocalStorage(str(tmp_path)).save("blobs/ab/cd/abcd", io.BytesIO(b"%PDF-1.4"))
+
+    with pytest.raises(HTTPException) as exc:
+        variant_for("blobs/ab/cd/abcd", APERCU, 320)
+    assert exc.value.status_code == 415
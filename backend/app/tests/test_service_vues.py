@@ -0,0 +1,81 @@
+# app/tests/test_service_vues.py
+import pytest
+from app.tests.conftest import TestingSessionLocal
+from app.models.note import Note
+from app.models.utilisateur import Utilisateur
+from app.services.notes import get_note_detail_service
+from app.services.vues import ViewCounterBuffer, view_counter
+
+
+@pytest.fixture
+def db():
+    db = TestingSessionLocal()
+    user = Utilisateur(nom="Alice", email="alice@test.com", mot_de_passe="12345678", type="admin", equipe="Dev")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    note = Note(titre="Note", contenu="Contenu", auteur_id=user.id, equipe="Dev")
+    db.add(note)
+    db.commit()
+    db.refresh(note)
+    view_counter.flush()  # vide les vues d'autres tests
+    yield db
+    db.close()
+
+
+def _nb_vues(db, note_id):
+    db.expire_all()
+    return db.query(Note).filter(Note.id == note_id).first().nb_vues
+
+
+def test_detail_is_read_only_until_flush(db):
+    note_id = db.query(Note.id).scalar()
+
+    for _ in range(3):
+        get_note_detail_service(note_id, db)
+
+    assert _nb_vues(db, note_id) == 0
+    assert view_counter.pending(note_id) == 3
+
+    assert view_counter.flush() == 3
+    assert _nb_vues(db, note_id) == 3
+    assert view_counter.pending(note_id) == 0
+
+
+def test_flush_batches_several_notes(db):
+    bind = db.get_bind()
+    other = Note(titre="Autre", contenu="x", auteur_id=db.query(Utilisateur.id).scalar(), nb_vues=None)
+    db.add(other)
+    db.commit()
+    first_id = db.query(Note.id).filter(Note.titre == "Note").scalar()
+
+    buffer = ViewCounterBuffer()
+    buffer.record(bind, first_id, 2)
+    buffer.record(bind, other.id)
+    buffer.record(bind, first_id)
+
+    assert buffer.flush() == 4
+    assert _nb_vues(db, first_id) == 3
+    assert _nb_vues(db, other.id) == 1
+
+
+def test_flush_failure_keeps_pending_views(db):
+    class BrokenBind:
+        def begin(self):
+            raise RuntimeError("base indisponible")
+
+    buffer = ViewCounterBuffer()
+    broken = BrokenBind()
+    buffer.record(broken, 1, 5)
+
+    assert buffer.flush() == 0
+    assert buffer.pending(1) == 5
+
+
+def test_stop_flushes_remaining_views(db):
+    note_id = db.query(Note.id).scalar()
+    buffer = ViewCounterBuffer()
+    buffer.start(interval=60)
+    buffer.record(db.get_bind(), note_id, 4)
+    buffer.stop()
+    assert _nb_vues(db, note_id) == 4
@@ -0,0 +1,76 @@
+# app/tests/test_tool_backfill_summaries.py
+import json
+import sys
+from datetime import datetime
+
+from sqlalchemy import inspect
+from app.tests.conftest import TestingSessionLocal, engine
+from app.models.note import Note
+from app.models.utilisateur import Utilisateur
+from app.tools.backfill_summaries import backfill, main
+
+LONG = "Le comité valide le budget annuel de l'équipe. Les recrutements sont reportés au printemps. " * 3
+
+
+def _seed(db):
+    user = Utilisateur(nom="Alice", email="alice@test.com", mot_de_passe="12345678", type="admin", equipe="Dev")
+    db.add(user)
+    db.commit()
+    notes = [
+        Note(titre="A", contenu=LONG, equipe="Dev", auteur_id=user.id),
+        Note(titre="B", contenu=LONG + " Fin.", equipe="QA", auteur_id=user.id),
+        Note(titre="C", contenu="court", equipe="Dev", auteur_id=user.id),
+        Note(titre="D", contenu=LONG, equipe="Dev", auteur_id=user.id, resume_ia="déjà fait"),
+    ]
+    db.add_all(notes)
+    db.commit()
+    return [n.id for n in notes]
+
+
+def _resumes(db):
+    db.expire_all()
+    return {n.titre: n.resume_ia for n in db.query(Note).order_by(Note.id)}
+
+
+def test_backfill_dry_run_writes_nothing(tmp_path):
+    db = TestingSessionLocal()
+    _seed(db)
+    checkpoint = tmp_path / "ckpt.json"
+
+    assert backfill(db.get_bind(), dry_run=True, workers=1, checkpoint=str(checkpoint)) == 2
+    assert _resumes(db)["A"] is None
+    assert not checkpoint.exists()
+    db.close()
+
+
+def test_backfill_with_filters_and_checkpoint(tmp_path):
+    db = TestingSessionLocal()
+    ids = _seed(db)
+    checkpoint = tmp_path / "ckpt.json"
+
+    done = backfill(db.get_bind(), equipe="Dev", since=datetime(2000, 1, 1), chunk_size=1, write_every=1,
+                    workers=2, checkpoint=str(checkpoint))
+    assert done == 1
+    resumes = _resumes(db)
+    assert resumes["A"].startswith("Résumé automatique")
+    assert resumes["B"] is None and resumes["C"] is None and resumes["D"] == "déjà fait"
+    assert json.loads(checkpoint.read_text())["last_id"] == ids[0]
+
+    # ↩️ relance : reprend après le dernier id, rien à refaire
+    assert backfill(db.get_bind(), equipe="Dev", since=datetime(2000, 1, 1), workers=1, checkpoint=str(checkpoint)) == 0
+
+    # 🔁 autres filtres → point de reprise ignoré
+    assert backfill(db.get_bind(), workers=1, checkpoint=str(checkpoint)) == 1
+    assert _resumes(db)["B"].startswith("Résumé automatique")
+    db.close()
+
+
+def test_main_upgrades_legacy_schema(tmp_path, monkeypatch):
+    # Base antérieure à notes.contenu_hash, API jamais démarrée
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ALTER TABLE notes DROP COLUMN contenu_hash")
+    monkeypatch.setattr("app.db.engine", engine)
+    monkeypatch.setattr(sys, "argv", ["backfill_summaries", "--dry-run", "--checkpoint", str(tmp_path / "ckpt.json")])
+
+    main()
+    assert "contenu_hash" in {col["name"] for col in inspect(engine).get_columns("notes")}
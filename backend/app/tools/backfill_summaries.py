@@ -0,0 +1,204 @@
+# app/tools/backfill_summaries.py
+# =====================================================
+# Calcul en masse des résumés manquants (resume_ia NULL).
+# - parcours des notes par tranches ordonnées par id
+# - résumés calculés dans un ProcessPoolExecutor
+#   (le cache par empreinte évite les doublons)
+# - écriture par lots (UPDATE executemany) + point de reprise
+#
+# Usage (depuis backend/) :
+#   python -m app.tools.backfill_summaries --equipe Dev --since 2025-01-01
+#   python -m app.tools.backfill_summaries --dry-run
+#   python -m app.tools.backfill_summaries --reset   # ignore le point de reprise
+# =====================================================
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from sqlalchemy import bindparam, func
+from sqlalchemy.orm import Session
+
+from app.models.utilisateur import Utilisateur  # noqa: F401
+from app.models.note import Note
+from app.models.commentaire import Commentaire  # noqa: F401
+from app.models.fichier import FichierNote  # noqa: F401
+from app.models.eleve import Eleve  # noqa: F401
+from app.models.like import NoteLike  # noqa: F401
+from app.models.resume import NoteSummary
+from app.models.trending import NoteTrending  # noqa: F401
+from app.models.stats import StatsEquipeJour, StatsAuteurJour  # noqa: F401
+from app.models.feed import FeedItem  # noqa: F401
+from app.schema import upgrade_schema
+from app.services.resumes import SUMMARY_MIN_LENGTH, get_or_create_summaries
+from app.services.some_ai_module import generate_summaries
+
+DEFAULT_CHECKPOINT = ".backfill_summaries.json"
+
+notes_table = Note.__table__
+
+_write_stmt = (
+    notes_table.update()
+    .where(notes_table.c.id == bindparam("b_id"), notes_table.c.resume_ia.is_(None))
+    .values(resume_ia=bindparam("b_resume"), contenu_hash=bindparam("b_hash"))
+)
+
+
+# -------------------------------------------------------
+# 🔹 Point de reprise
+# -------------------------------------------------------
+def _load_checkpoint(path, filters):
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("filters") != filters:
+        print("⚠️ Point de reprise ignoré (filtres différents)")
+        return 0
+    return data.get("last_id", 0)
+
+
+def _save_checkpoint(path, filters, last_id):
+    if not path:
+        return
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"filters": filters, "last_id": last_id}, f)
+    os.replace(tmp, path)  # écriture atomique
+
+
+# -------------------------------------------------------
+# 🔹 Calcul parallèle
+# -------------------------------------------------------
+def _parallel_summarizer(pool, workers):
+    """Découpe un lot de contenus entre les processus du pool."""
+    def summarize(texts):
+        if pool is None:
+            return generate_summaries(texts)
+        step = max(1, -(-len(texts) // workers))
+        parts = [texts[i:i + step] for i in range(0, len(texts), step)]
+        return [summary for part in pool.map(generate_summaries, parts) for summary in part]
+    return summarize
+
+
+def _candidates(db: Session, after_id, chunk_size, equipe=None, since=None):
+    query = db.query(Note.id, Note.contenu).filter(
+        Note.id > after_id,
+        Note.resume_ia.is_(None),
+        func.length(Note.contenu) > SUMMARY_MIN_LENGTH,
+    )
+    if equipe:
+        query = query.filter(Note.equipe == equipe)
+    if since:
+        query = query.filter(Note.created_at >= since)
+    return query.order_by(Note.id).limit(chunk_size).all()
+
+
+# -------------------------------------------------------
+# 🧠 Backfill
+# -------------------------------------------------------
+def backfill(
+    bind,
+    equipe=None,
+    since=None,
+    dry_run=False,
+    chunk_size=500,
+    write_every=2000,
+    workers=None,
+    checkpoint=DEFAULT_CHECKPOINT,
+):
+    """
+    Résume les notes sans résumé ; retourne le nombre de notes traitées
+    (ou éligibles en --dry-run). Reprend après le dernier id enregistré.
+    """
+    filters = {"equipe": equipe, "since": since.isoformat() if since else None}
+    last_id = _load_checkpoint(checkpoint, filters)
+    if last_id:
+        print(f"↩️ Reprise après la note {last_id}")
+
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 and not dry_run else None
+    summarize = _parallel_summarizer(pool, workers)
+
+    done, pending = 0, []
+    t0 = time.perf_counter()
+
+    def flush(db):
+        nonlocal done
+        if pending:
+            db.execute(_write_stmt, pending)
+            db.commit()
+            done += len(pending)
+            pending.clear()
+        _save_checkpoint(checkpoint, filters, last_id)
+        rate = done / max(time.perf_counter() - t0, 1e-9)
+        print(f"✅ {done} notes résumées ({rate:.0f} notes/s) — dernier id {last_id}")
+
+    try:
+        with Session(bind=bind) as db:
+            while True:
+                rows = _candidates(db, last_id, chunk_size, equipe, since)
+                if not rows:
+                    break
+                last_id = rows[-1].id
+                if dry_run:
+                    done += len(rows)
+                    continue
+
+                results = get_or_create_summaries(db, [r.contenu for r in rows], summarize=summarize)
+                pending.extend(
+                    {"b_id": r.id, "b_resume": summary, "b_hash": digest}
+                    for r, (digest, summary) in zip(rows, results)
+                )
+                if len(pending) >= write_every:
+                    flush(db)
+
+            if dry_run:
+                print(f"🔎 {done} notes à résumer (aucune écriture)")
+            elif pending:
+                flush(db)
+    finally:
+        if pool:
+            pool.shutdown()
+    return done
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calcule les résumés manquants des notes")
+    parser.add_argument("--equipe", help="limiter à une équipe")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="notes créées depuis (AAAA-MM-JJ)")
+    parser.add_argument("--dry-run", action="store_true", help="compte les notes sans rien écrire")
+    parser.add_argument("--chunk-size", type=int, default=500, help="notes lues par tranche")
+    parser.add_argument("--write-every", type=int, default=2000, help="notes écrites par lot")
+    parser.add_argument("--workers", type=int, default=None, help="processus de calcul (défaut : nb de CPU)")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="fichier de point de reprise")
+    parser.add_argument("--reset", action="store_true", help="repart du début")
+    args = parser.parse_args()
+
+    if args.reset and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    from app.db import engine
+
+    NoteSummary.__table__.create(bind=engine, checkfirst=True)
+    with engine.begin() as conn:
+        upgrade_schema(conn)  # 🧩 notes.contenu_hash sur une base antérieure, même sans démarrage de l'API
+    t0 = time.perf_counter()
+    total = backfill(
+        engine,
+        equipe=args.equipe,
+        since=args.since,
+        dry_run=args.dry_run,
+        chunk_size=args.chunk_size,
+        write_every=args.write_every,
+        workers=args.workers,
+        checkpoint=args.checkpoint,
+    )
+    print(f"🏁 Terminé : {total} notes en {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# app/tools/gc_uploads.py
+# =====================================================
+# Supprime les fichiers orphelins du stockage (pièces
+# jointes sans référence, avatars remplacés ou d'utilisateurs
+# supprimés, envois interrompus) plus anciens que le délai
+# de grâce, et affiche l'espace récupéré. L'application le
+# fait aussi périodiquement (UPLOAD_GC_INTERVAL).
+#
+# Usage (depuis backend/) :
+#   python -m app.tools.gc_uploads [--dry-run] [--grace-hours 24] [--rate 100]
+# =====================================================
+
+import argparse
+import time
+
+from app.config import settings
+from app.models.utilisateur import Utilisateur  # noqa: F401
+from app.models.note import Note  # noqa: F401
+from app.models.commentaire import Commentaire  # noqa: F401
+from app.models.fichier import FichierNote, BlobFichier  # noqa: F401
+from app.models.eleve import Eleve  # noqa: F401
+from app.models.like import NoteLike  # noqa: F401
+from app.models.resume import NoteSummary  # noqa: F401
+from app.models.trending import NoteTrending  # noqa: F401
+from app.models.stats import StatsEquipeJour, StatsAuteurJour  # noqa: F401
+from app.models.feed import FeedItem  # noqa: F401
+from app.services.nettoyage import collect_orphans
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Supprime les fichiers orphelins du stockage")
+    parser.add_argument("--dry-run", action="store_true", help="affiche ce qui serait supprimé, sans rien modifier")
+    parser.add_argument("--grace-hours", type=float, default=settings.UPLOAD_GC_GRACE_SECONDS / 3600)
+    parser.add_argument("--rate", type=float, default=settings.UPLOAD_GC_MAX_OPS, help="opérations max par seconde (0 = sans limite)")
+    args = parser.parse_args()
+
+    from app.db import engine
+
+    t0 = time.perf_counter()
+    report = collect_orphans(engine, grace_seconds=args.grace_hours * 3600, rate=args.rate, dry_run=args.dry_run)
+    action, gain = ("à supprimer", "récupérables") if args.dry_run else ("supprimés", "récupérés")
+    print(
+        f"🏁 Terminé : {report['examines']} fichiers examinés, {report['supprimes']} orphelins {action}, "
+        f"{report['octets'] / 1024 / 1024:.1f} Mo {gain} en {time.perf_counter() - t0:.1f}s"
+    )
+    if report["compteurs_corriges"]:
+        corriges = "à corriger" if args.dry_run else "corrigés"
+        print(f"🔢 {report['compteurs_corriges']} compteurs de références {corriges}")
+
+
+if __name__ == "__main__":
+    main()
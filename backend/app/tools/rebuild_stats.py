@@ -0,0 +1,41 @@
+# app/tools/rebuild_stats.py
+# =====================================================
+# Recalcule les tables de cumul des statistiques
+# (stats_equipe_jour, stats_auteur_jour) depuis les tables
+# sources. À lancer une fois après la migration, puis
+# périodiquement (cron) pour réconcilier les cumuls.
+#
+# Usage (depuis backend/) :
+#   python -m app.tools.rebuild_stats
+# =====================================================
+
+import argparse
+import time
+
+from app.models.utilisateur import Utilisateur  # noqa: F401
+from app.models.note import Note  # noqa: F401
+from app.models.commentaire import Commentaire  # noqa: F401
+from app.models.fichier import FichierNote  # noqa: F401
+from app.models.eleve import Eleve  # noqa: F401
+from app.models.like import NoteLike  # noqa: F401
+from app.models.resume import NoteSummary  # noqa: F401
+from app.models.trending import NoteTrending  # noqa: F401
+from app.models.stats import StatsEquipeJour, StatsAuteurJour
+from app.models.feed import FeedItem  # noqa: F401
+from app.services.stats import rebuild_stats
+
+
+def main():
+    argparse.ArgumentParser(description="Recalcule les statistiques journalières des équipes").parse_args()
+
+    from app.db import engine
+
+    StatsEquipeJour.__table__.create(bind=engine, checkfirst=True)
+    StatsAuteurJour.__table__.create(bind=engine, checkfirst=True)
+    t0 = time.perf_counter()
+    rows = rebuild_stats(engine)
+    print(f"🏁 Terminé : {rows} lignes de statistiques en {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
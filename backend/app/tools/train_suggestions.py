@@ -0,0 +1,82 @@
+# app/tools/train_suggestions.py
+# =====================================================
+# (Ré)entraîne le modèle de suggestion catégorie / priorité
+# (Bayes naïf, services/suggestions.py) à partir des notes
+# existantes et l'enregistre dans SUGGEST_MODEL_PATH.
+# L'API recharge le modèle dès que le fichier change.
+#
+# Usage (depuis backend/) :
+#   python -m app.tools.train_suggestions
+#   python -m app.tools.train_suggestions --holdout 0.2   # + précision sur 20 % de test
+# =====================================================
+
+import argparse
+import random
+import time
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.utilisateur import Utilisateur  # noqa: F401
+from app.models.note import Note
+from app.models.commentaire import Commentaire  # noqa: F401
+from app.models.fichier import FichierNote  # noqa: F401
+from app.models.eleve import Eleve  # noqa: F401
+from app.models.like import NoteLike  # noqa: F401
+from app.models.resume import NoteSummary  # noqa: F401
+from app.models.trending import NoteTrending  # noqa: F401
+from app.models.stats import StatsEquipeJour, StatsAuteurJour  # noqa: F401
+from app.models.feed import FeedItem  # noqa: F401
+from app.services.suggestions import TARGETS, label_key, canonical_labels, save_models, train_models
+
+
+def evaluate(texts, targets, holdout, seed=42):
+    """Précision de chaque cible sur une partie des notes tenue à l'écart."""
+    order = list(range(len(texts)))
+    random.Random(seed).shuffle(order)
+    cut = int(len(order) * (1 - holdout))
+    train, test = order[:cut], order[cut:]
+    models = train_models([texts[i] for i in train], {t: [v[i] for i in train] for t, v in targets.items()})
+    scores = {}
+    for target, model in models.items():
+        canon = canonical_labels(targets[target])
+        labelled = [i for i in test if targets[target][i] and targets[target][i].strip()]
+        if not labelled:
+            continue
+        proba = model.predict_proba([texts[i] for i in labelled])
+        predicted = [model.labels[j] for j in proba.argmax(axis=1)]
+        expected = [canon[label_key(targets[target][i])] for i in labelled]
+        scores[target] = sum(p == e for p, e in zip(predicted, expected)) / len(labelled)
+    return scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entraîne le modèle de suggestion catégorie / priorité")
+    parser.add_argument("--output", default=settings.SUGGEST_MODEL_PATH)
+    parser.add_argument("--holdout", type=float, default=0.0, help="part des notes réservée à l'évaluation")
+    args = parser.parse_args()
+
+    from app.db import engine
+
+    t0 = time.perf_counter()
+    with Session(engine) as db:
+        rows = db.query(Note.titre, Note.contenu, Note.categorie, Note.priorite).all()
+    texts = [(r.titre, r.contenu) for r in rows]
+    targets = {target: [getattr(r, target) for r in rows] for target in TARGETS}
+
+    if args.holdout:
+        for target, accuracy in evaluate(texts, targets, args.holdout).items():
+            print(f"🎯 {target} : précision {accuracy:.1%} sur {args.holdout:.0%} des notes")
+
+    models = train_models(texts, targets)
+    if not models:
+        print("⚠️ Pas assez de notes étiquetées (au moins deux valeurs distinctes par cible)")
+        return
+    save_models(models, args.output)
+    for target, model in models.items():
+        print(f"✅ {target} : {len(model.labels)} classes ({', '.join(model.labels)})")
+    print(f"🏁 {len(rows)} notes, modèle enregistré dans {args.output} ({time.perf_counter() - t0:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
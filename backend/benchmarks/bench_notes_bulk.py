@@ -0,0 +1,83 @@
+# benchmarks/bench_notes_bulk.py
+# =====================================================
+# Débit d'insertion (notes/s) : create_note_service appelé
+# note par note vs bulk_create_notes_service par lots.
+#
+# Usage (depuis backend/) :
+#   python -m benchmarks.bench_notes_bulk --count 5000 --batch 1000
+#   python -m benchmarks.bench_notes_bulk --url postgresql://... --count 20000
+# =====================================================
+
+import argparse
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.db import Base
+from app.models.utilisateur import Utilisateur
+from app.models.note import Note  # noqa: F401
+from app.models.commentaire import Commentaire  # noqa: F401
+from app.models.fichier import FichierNote  # noqa: F401
+from app.models.eleve import Eleve  # noqa: F401
+from app.models.like import NoteLike  # noqa: F401
+from app.models.resume import NoteSummary  # noqa: F401
+from app.models.trending import NoteTrending  # noqa: F401
+from app.models.stats import StatsEquipeJour, StatsAuteurJour  # noqa: F401
+from app.models.feed import FeedItem  # noqa: F401
+from app.services.notes import bulk_create_notes_service, create_note_service
+
+
+def _reset(engine):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as db:
+        user = Utilisateur(nom="Bench", email="bench@test.com", mot_de_passe="x", type="admin", equipe="Dev")
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        db.expunge(user)
+        return user
+
+
+def _payload(i):
+    return {"titre": f"Note importée {i}", "contenu": "Contenu importé " * 20, "priorite": "Moyenne"}
+
+
+def bench_unitaire(engine, count):
+    user = _reset(engine)
+    with Session(engine) as db:
+        t0 = time.perf_counter()
+        for i in range(count):
+            p = _payload(i)
+            create_note_service(p["titre"], p["contenu"], None, None, p["priorite"], None, None, db, user)
+        return count / (time.perf_counter() - t0)
+
+
+def bench_lot(engine, count, batch):
+    user = _reset(engine)
+    with Session(engine) as db:
+        t0 = time.perf_counter()
+        for start in range(0, count, batch):
+            items = [_payload(i) for i in range(start, min(start + batch, count))]
+            bulk_create_notes_service(items, db, user)
+        return count / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark insertion de notes : unitaire vs lot")
+    parser.add_argument("--url", default="sqlite:///bench_notes.db")
+    parser.add_argument("--count", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    unitaire = bench_unitaire(engine, args.count)
+    lot = bench_lot(engine, args.count, args.batch)
+    print(f"\n📦 {args.count} notes ({engine.dialect.name}, lots de {args.batch})")
+    print(f"{'create_note_service':<28}{unitaire:>12.0f} notes/s")
+    print(f"{'bulk_create_notes_service':<28}{lot:>12.0f} notes/s  ({lot / unitaire:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
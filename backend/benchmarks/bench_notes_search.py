@@ -0,0 +1,125 @@
+# benchmarks/bench_notes_search.py
+# =====================================================
+# Compare la recherche ILIKE '%terme%' (ancien chemin) et la
+# recherche plein texte (FTS5 / tsvector) sur N notes.
+#
+# Usage (depuis backend/) :
+#   python -m benchmarks.bench_notes_search --sizes 100000,1000000
+#   python -m benchmarks.bench_notes_search --url postgresql://... --sizes 100000
+# =====================================================
+
+import argparse
+import random
+import statistics
+import time
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from app.db import Base
+from app.models.utilisateur import Utilisateur
+from app.models.note import Note
+from app.models.commentaire import Commentaire  # noqa: F401 (relations)
+from app.models.fichier import FichierNote  # noqa: F401
+from app.models.eleve import Eleve  # noqa: F401
+from app.models.like import NoteLike  # noqa: F401
+from app.models.resume import NoteSummary  # noqa: F401
+from app.models.trending import NoteTrending  # noqa: F401
+from app.models.stats import StatsEquipeJour, StatsAuteurJour  # noqa: F401
+from app.models.feed import FeedItem  # noqa: F401
+from app.search import apply_fulltext_search
+
+SYLLABES = "ba be bi bo bu da de di do du la le li lo lu ma me mi mo mu ra re ri ro ru ta te ti to tu".split()
+MOTS_METIER = (
+    "réunion budget serveur migration client équipe rapport élève suivi projet "
+    "planning incident sécurité déploiement formation évaluation absence parent"
+).split()
+
+# Requêtes : mot fréquent, deux mots, mot accentué, mot absent
+REQUETES = ["budget", "migration serveur", "evaluation", "zzzintrouvable"]
+
+
+def _vocabulaire(rng, taille=20_000):
+    """Vocabulaire synthétique ; les mots métier restent peu fréquents (sélectifs)."""
+    mots = {"".join(rng.choice(SYLLABES) for _ in range(rng.randint(2, 4))) for _ in range(taille)}
+    return sorted(mots)
+
+
+def _texte(rng, vocabulaire, n_mots):
+    # Distribution de type Zipf : quelques mots très fréquents, une longue traîne
+    mots = [vocabulaire[min(int(rng.paretovariate(1.1)) - 1, len(vocabulaire) - 1)] for _ in range(n_mots)]
+    if rng.random() < 0.02:
+        mots[rng.randrange(n_mots)] = rng.choice(MOTS_METIER)
+    return " ".join(mots)
+
+
+def populate(engine, size, batch=10_000):
+    rng = random.Random(42)
+    vocabulaire = _vocabulaire(rng)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as db:
+        user = Utilisateur(nom="Bench", email="bench@test.com", mot_de_passe="x", type="admin", equipe="Dev")
+        db.add(user)
+        db.commit()
+        for start in range(0, size, batch):
+            rows = [
+                {
+                    "titre": _texte(rng, vocabulaire, 4),
+                    "contenu": _texte(rng, vocabulaire, 120),
+                    "equipe": "Dev",
+                    "auteur_id": user.id,
+                    "likes": 0,
+                    "nb_vues": 0,
+                }
+                for _ in range(min(batch, size - start))
+            ]
+            db.execute(Note.__table__.insert(), rows)
+            db.commit()
+
+
+def _ancien(db, terme):
+    q = select(Note.id).where(Note.titre.ilike(f"%{terme}%") | Note.contenu.ilike(f"%{terme}%"))
+    q = q.order_by(Note.created_at.desc()).limit(20)
+    total = db.execute(select(func.count()).select_from(q.limit(None).order_by(None).subquery())).scalar()
+    return total, db.execute(q).all()
+
+
+def _nouveau(db, terme):
+    q = db.query(Note.id)
+    q, rank = apply_fulltext_search(q, terme, db.get_bind().dialect.name, Note.id)
+    total = q.count()
+    return total, q.order_by(rank, Note.created_at.desc()).limit(20).all()
+
+
+def _chrono(fn, db, terme, repeats):
+    durees = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn(db, terme)
+        durees.append(time.perf_counter() - t0)
+    return statistics.median(durees) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark recherche notes : ILIKE vs plein texte")
+    parser.add_argument("--url", default="sqlite:///bench_notes.db")
+    parser.add_argument("--sizes", default="100000,1000000")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    for size in (int(s) for s in args.sizes.split(",")):
+        t0 = time.perf_counter()
+        populate(engine, size)
+        print(f"\n📦 {size} notes insérées en {time.perf_counter() - t0:.1f}s ({engine.dialect.name})")
+        print(f"{'requête':<22}{'ILIKE (ms)':>12}{'plein texte (ms)':>18}{'gain':>8}")
+        with Session(engine) as db:
+            for terme in REQUETES:
+                ancien = _chrono(_ancien, db, terme, args.repeats)
+                nouveau = _chrono(_nouveau, db, terme, args.repeats)
+                print(f"{terme:<22}{ancien:>12.1f}{nouveau:>18.1f}{ancien / nouveau:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
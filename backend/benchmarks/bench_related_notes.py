@@ -0,0 +1,61 @@
+# benchmarks/bench_related_notes.py
+# =====================================================
+# Index des notes similaires : temps de construction,
+# latence de GET /notes/{id}/related (top-k cosinus) et
+# coût d'une mise à jour incrémentale, sur N notes.
+#
+# Usage (depuis backend/) :
+#   python -m benchmarks.bench_related_notes --size 200000
+# =====================================================
+
+import argparse
+import random
+import statistics
+import time
+
+from sqlalchemy import create_engine
+
+from app.services.related import RelatedNotesIndex
+from benchmarks.bench_notes_search import populate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark index des notes similaires")
+    parser.add_argument("--url", default="sqlite:///bench_related.db")
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    populate(engine, args.size)
+
+    index = RelatedNotesIndex()
+    t0 = time.perf_counter()
+    index.build(engine)
+    build = time.perf_counter() - t0
+
+    rng = random.Random(7)
+    ids = list(index.ids)
+    durations = []
+    for note_id in rng.sample(ids, min(args.queries, len(ids))):
+        t0 = time.perf_counter()
+        index.related(note_id, args.k)
+        durations.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    for note_id in rng.sample(ids, 1000):
+        index.upsert(note_id, "note modifiée", "contenu modifié pour le benchmark")
+    index.related(ids[0], args.k)  # matérialise les mises à jour
+    update = (time.perf_counter() - t0) * 1000 / 1000
+
+    durations.sort()
+    print(f"\n🔗 {args.size} notes ({engine.dialect.name})")
+    print(f"{'construction':<22}{build:>10.1f} s")
+    print(f"{'related p50':<22}{statistics.median(durations):>10.2f} ms")
+    print(f"{'related p95':<22}{durations[int(len(durations) * 0.95) - 1]:>10.2f} ms")
+    print(f"{'mise à jour (moy.)':<22}{update:>10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
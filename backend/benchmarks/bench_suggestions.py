@@ -0,0 +1,62 @@
+# benchmarks/bench_suggestions.py
+# =====================================================
+# Suggestion catégorie / priorité (Bayes naïf) : textes/s
+# classés un par un vs par lots (inférence vectorisée).
+#
+# Usage (depuis backend/) :
+#   python -m benchmarks.bench_suggestions --train 20000 --count 5000
+# =====================================================
+
+import argparse
+import random
+import time
+
+from app.services.suggestions import train_models
+
+CATEGORIES = {
+    "Incident": "panne serveur incident réseau erreur production alerte base",
+    "Réunion": "réunion compte rendu ordre du jour décision participants",
+    "RH": "congé recrutement entretien contrat formation absence",
+    "Projet": "sprint livraison planning fonctionnalité client jalon",
+}
+COMMUNS = "le la les de des un une et pour avec sur dans équipe note semaine".split()
+
+
+def _texte(rng, categorie, n_mots=60):
+    mots = CATEGORIES[categorie].split()
+    return " ".join(rng.choice(mots) if rng.random() < 0.3 else rng.choice(COMMUNS) for _ in range(n_mots))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suggestion catégorie : unitaire vs lot")
+    parser.add_argument("--train", type=int, default=20000)
+    parser.add_argument("--count", type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    labels = [rng.choice(list(CATEGORIES)) for _ in range(args.train)]
+    texts = [("", _texte(rng, c)) for c in labels]
+    t0 = time.perf_counter()
+    model = train_models(texts, {"categorie": labels})["categorie"]
+    train = time.perf_counter() - t0
+
+    labels = [rng.choice(list(CATEGORIES)) for _ in range(args.count)]
+    requests = [("", _texte(rng, c)) for c in labels]
+
+    t0 = time.perf_counter()
+    for text in requests:
+        model.predict_proba([text])
+    unitaire = args.count / (time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    proba = model.predict_proba(requests)
+    lot = args.count / (time.perf_counter() - t0)
+    precision = sum(model.labels[i] == c for i, c in zip(proba.argmax(axis=1), labels)) / args.count
+
+    print(f"\n🏷️ entraînement sur {args.train} notes : {train:.2f}s (précision {precision:.1%})")
+    print(f"{'unitaire':<12}{unitaire:>12.0f} textes/s")
+    print(f"{'lot':<12}{lot:>12.0f} textes/s  ({lot / unitaire:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
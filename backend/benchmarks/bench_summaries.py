@@ -0,0 +1,56 @@
+# benchmarks/bench_summaries.py
+# =====================================================
+# Débit du résumé extractif (notes/s) sur des notes
+# longues : generate_summary appelé note par note vs
+# generate_summaries par lots.
+#
+# Usage (depuis backend/) :
+#   python -m benchmarks.bench_summaries --count 2000 --sentences 40
+# =====================================================
+
+import argparse
+import random
+import time
+
+from app.services.some_ai_module import generate_summaries, generate_summary
+
+SUJETS = ["budget", "recrutement", "sprint", "client", "livraison", "sécurité", "formation", "serveur", "audit", "planning"]
+VERBES = ["valide", "reporte", "analyse", "prépare", "présente", "corrige", "finalise", "relance"]
+COMPLEMENTS = ["avant vendredi", "avec l'équipe produit", "pour le comité", "en priorité", "après la revue", "sans retard"]
+
+
+def _note(rng, sentences):
+    phrases = [
+        f"L'équipe {rng.choice(VERBES)} le {rng.choice(SUJETS)} et le {rng.choice(SUJETS)} {rng.choice(COMPLEMENTS)}."
+        for _ in range(sentences)
+    ]
+    return " ".join(phrases)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark résumé extractif : unitaire vs lot")
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--sentences", type=int, default=40)
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    notes = [_note(rng, rng.randint(args.sentences // 2, args.sentences)) for _ in range(args.count)]
+
+    t0 = time.perf_counter()
+    for note in notes:
+        generate_summary(note)
+    unitaire = args.count / (time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    for start in range(0, args.count, args.batch):
+        generate_summaries(notes[start:start + args.batch])
+    lot = args.count / (time.perf_counter() - t0)
+
+    print(f"\n🧠 {args.count} notes de {args.sentences // 2}-{args.sentences} phrases (lots de {args.batch})")
+    print(f"{'generate_summary':<22}{unitaire:>12.0f} notes/s")
+    print(f"{'generate_summaries':<22}{lot:>12.0f} notes/s  ({lot / unitaire:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -49,7 +49,7 @@ export class UtilisateurDetailComponent implements OnInit {
     this.api.getUtilisateurDetail(id).subscribe({
       next: (data) => {
         this.utilisateur = data;
-        this.avatarUrl = data.avatar_url || 'http://127.0.0.1:8000/uploads/avatars/default-avatar.png';
+        this.avatarUrl = data.avatar_url ? this.api.avatarSrc(data.avatar_url) : 'http://127.0.0.1:8000/uploads/avatars/default-avatar.png';
         this.isLoading = false;
       },
       error: () => {
@@ -115,7 +115,7 @@ export class UtilisateurDetailComponent implements OnInit {
       next: (res: any) => {
         if (this.utilisateur) {
           this.utilisateur.avatar_url = res.avatar_url;
-          this.avatarUrl = res.avatar_url;
+          this.avatarUrl = this.api.avatarSrc(res.avatar_url);
           this.toast.show("✅ Avatar mis à jour avec succès !", "success");
         }
       },
@@ -117,6 +117,11 @@ getAvatar(userId: number): Observable<Blob> {
   return this.http.get(`${this.baseUrl}utilisateurs/${userId}/avatar`, { responseType: 'blob' });
 }
 
+// avatar_url relative (/utilisateurs/{id}/avatar?v=…) : servie par l'API
+avatarSrc(avatarUrl: string): string {
+  return avatarUrl.startsWith('/') ? `${this.baseUrl}${avatarUrl.slice(1)}` : avatarUrl;
+}
+
 // URL de fallback par défaut côté backend
 getDefaultAvatarUrl() {
   return `${this.baseUrl}avatars/default`;